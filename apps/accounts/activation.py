@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.utils import timezone
+from loguru import logger
+
+from .models import BankAccount
+from apps.common import outbox
+
+from .services import chunked
+
+STATUS_CHUNK_SIZE = 1000
+
+
+def account_ids_for(numbers):
+    ids = {}
+    for chunk in chunked(list(dict.fromkeys(numbers)), STATUS_CHUNK_SIZE):
+        ids.update(
+            BankAccount.objects.filter(account_number__in=chunk).values_list(
+                "account_number", "pk"
+            )
+        )
+    return ids
+
+
+def set_status(account_ids, status, notify=True):
+    # One UPDATE per thousand accounts. Only rows whose status actually changes
+    # are touched, and only those owners are emailed, in a single Celery job
+    # queued by the outbox relay once the change has committed. Rows are locked
+    # in primary key order, chunk by chunk, like every other account lock, so
+    # two overlapping runs or a transfer cannot deadlock against this one.
+    now = timezone.now()
+    changed = []
+    with transaction.atomic():
+        for chunk in chunked(sorted(set(account_ids)), STATUS_CHUNK_SIZE):
+            pending = (
+                BankAccount.objects.select_for_update()
+                .filter(pk__in=chunk)
+                .exclude(account_status=status)
+                .order_by("pk")
+            )
+            ids = list(pending.values_list("pk", flat=True))
+            if ids:
+                BankAccount.objects.filter(pk__in=ids).update(
+                    account_status=status, updated_at=now
+                )
+                changed.extend(ids)
+
+        if notify and changed and status == BankAccount.AccountStatus.ACTIVE:
+            outbox.publish("accounts.activation_emails", account_ids=changed)
+
+    logger.info(f"{len(changed)} accounts set to {status}")
+    return changed
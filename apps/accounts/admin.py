@@ -1,6 +1,11 @@
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.forms.models import BaseInlineFormSet
 from django.utils.translation import gettext_lazy as _
-from .models import BankAccount
+from . import activation
+from .fx import FXError, announce, validate_rates
+from .models import BankAccount, FXRate, FXRateSnapshot
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -26,7 +31,7 @@ class BankAccountAdmin(admin.ModelAdmin):
         "user__first_name",
         "user__last_name",
     ]
-    readonly_fields = ["account_number", "created_at", "updated_at"]
+    readonly_fields = ["account_number", "account_balance", "created_at", "updated_at"]
     fieldsets = (
         (
             None,
@@ -61,4 +66,89 @@ class BankAccountAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         if not obj:
             return True
-        return request.user.is_superuser 
\ No newline at end of file
+        return request.user.is_superuser
+
+    actions = ["activate_accounts", "deactivate_accounts"]
+
+    def has_activate_permission(self, request):
+        return request.user.is_superuser
+
+    @admin.action(description=_("Activate selected accounts"), permissions=["activate"])
+    def activate_accounts(self, request, queryset):
+        changed = activation.set_status(
+            queryset.values_list("pk", flat=True), BankAccount.AccountStatus.ACTIVE
+        )
+        self.message_user(
+            request,
+            _("%(count)d accounts activated; activation emails are being sent.")
+            % {"count": len(changed)},
+        )
+
+    @admin.action(
+        description=_("Deactivate selected accounts"), permissions=["activate"]
+    )
+    def deactivate_accounts(self, request, queryset):
+        changed = activation.set_status(
+            queryset.values_list("pk", flat=True), BankAccount.AccountStatus.INACTIVE
+        )
+        self.message_user(
+            request, _("%(count)d accounts deactivated.") % {"count": len(changed)}
+        )
+
+
+class FXRateInlineFormSet(BaseInlineFormSet):
+    # Rates entered here go through the same checks as fx.publish.
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        rates = [
+            (
+                form.cleaned_data.get("base_currency"),
+                form.cleaned_data.get("quote_currency"),
+                form.cleaned_data.get("rate"),
+            )
+            for form in self.forms
+            if form.cleaned_data and not form.cleaned_data.get("DELETE")
+        ]
+        try:
+            validate_rates(rates)
+        except FXError as e:
+            raise ValidationError(str(e))
+
+
+class FXRateInline(admin.TabularInline):
+    model = FXRate
+    formset = FXRateInlineFormSet
+    extra = 3
+
+    def has_change_permission(self, request, obj=None):
+        return obj is None
+
+
+@admin.register(FXRateSnapshot)
+class FXRateSnapshotAdmin(admin.ModelAdmin):
+    list_display = ["version", "source", "published_by", "created_at"]
+    readonly_fields = ["version", "published_by", "created_at"]
+    fields = ["version", "source", "published_by", "created_at"]
+    inlines = [FXRateInline]
+
+    # Published rates are history for the quotes priced from them; a change is
+    # a new snapshot.
+    def has_change_permission(self, request, obj=None):
+        return obj is None
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            latest = FXRateSnapshot.objects.order_by("-version").first()
+            obj.version = (latest.version if latest else 0) + 1
+            obj.published_by = request.user
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        snapshot = form.instance
+        transaction.on_commit(lambda: announce(snapshot))
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import (
+    BankAccount,
+    LedgerEntry,
+    MonthlyAccountActivity,
+    RollupWatermark,
+)
+from .partitions import add_months
+from .snapshots import ROLLUP_ACCOUNT_CHUNK, settled_upto
+
+ROLLUP_NAME = "monthly-activity"
+ROLLUP_BATCH_SIZE = 50_000
+MAX_MONTHS = getattr(settings, "ACCOUNT_ANALYTICS_MAX_MONTHS", 120)
+
+ZERO = Decimal("0.00")
+DIRECTIONS = {
+    LedgerEntry.EntryType.CREDIT: MonthlyAccountActivity.Direction.INFLOW,
+    LedgerEntry.EntryType.DEBIT: MonthlyAccountActivity.Direction.OUTFLOW,
+}
+
+# Customer ledger legs are folded into one row per account, month, transaction
+# type and direction, past a watermark like the daily balance snapshots. A chart
+# over any range then reads at most a handful of rows per month.
+
+
+def _movements(after_id, upto_id):
+    rows = (
+        LedgerEntry.objects.filter(
+            id__gt=after_id, id__lte=upto_id, account__isnull=False
+        )
+        .annotate(month=TruncMonth("created_at", output_field=DateField()))
+        .values("account_id", "month", "transaction__transaction_type", "entry_type")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    movements = defaultdict(dict)
+    for row in rows:
+        key = (
+            row["month"],
+            row["transaction__transaction_type"],
+            DIRECTIONS[row["entry_type"]],
+        )
+        movements[row["account_id"]][key] = (Decimal(row["total"]), row["count"])
+    return movements
+
+
+def _apply(movements):
+    existing = {
+        (row.account_id, row.month, row.transaction_type, row.direction): row
+        for row in MonthlyAccountActivity.objects.filter(
+            account_id__in=movements,
+            month__in={month for keys in movements.values() for month, *_ in keys},
+        )
+    }
+    to_create, to_update = [], []
+    for account_id, keys in movements.items():
+        for (month, transaction_type, direction), (total, count) in keys.items():
+            row = existing.get((account_id, month, transaction_type, direction))
+            if row is None:
+                to_create.append(
+                    MonthlyAccountActivity(
+                        account_id=account_id,
+                        month=month,
+                        transaction_type=transaction_type,
+                        direction=direction,
+                        total=total,
+                        count=count,
+                    )
+                )
+            else:
+                row.total += total
+                row.count += count
+                to_update.append(row)
+    MonthlyAccountActivity.objects.bulk_create(to_create, batch_size=1000)
+    MonthlyAccountActivity.objects.bulk_update(
+        to_update, ["total", "count"], batch_size=1000
+    )
+
+
+def rollup(batch_size=ROLLUP_BATCH_SIZE) -> int:
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+            name=ROLLUP_NAME
+        )
+        # Same settle delay as the balance snapshots, for the same reason.
+        upto_id = settled_upto(watermark.last_entry_id, batch_size)
+        if upto_id is None:
+            return 0
+
+        processed = LedgerEntry.objects.filter(
+            id__gt=watermark.last_entry_id, id__lte=upto_id
+        ).count()
+        movements = _movements(watermark.last_entry_id, upto_id)
+        account_ids = sorted(movements)
+        for i in range(0, len(account_ids), ROLLUP_ACCOUNT_CHUNK):
+            chunk = account_ids[i : i + ROLLUP_ACCOUNT_CHUNK]
+            _apply({pk: movements[pk] for pk in chunk})
+
+        watermark.last_entry_id = upto_id
+        watermark.save(update_fields=["last_entry_id", "updated_at"])
+    return processed
+
+
+def monthly_summary(account: BankAccount, first_month, last_month):
+    months = {}
+    month = first_month
+    while month <= last_month:
+        months[month] = {
+            "month": f"{month:%Y-%m}",
+            "inflow": ZERO,
+            "outflow": ZERO,
+            "count": 0,
+            "by_type": {},
+        }
+        month = add_months(month, 1)
+
+    rows = MonthlyAccountActivity.objects.filter(
+        account=account, month__gte=first_month, month__lte=last_month
+    ).values_list("month", "transaction_type", "direction", "total", "count")
+    for month, transaction_type, direction, total, count in rows:
+        summary = months[month]
+        summary[direction] += total
+        summary["count"] += count
+        by_type = summary["by_type"].setdefault(
+            transaction_type, {"inflow": ZERO, "outflow": ZERO, "count": 0}
+        )
+        by_type[direction] += total
+        by_type["count"] += count
+
+    for summary in months.values():
+        summary["net"] = summary["inflow"] - summary["outflow"]
+    watermark = RollupWatermark.objects.filter(name=ROLLUP_NAME).first()
+    return list(months.values()), watermark.updated_at if watermark else None
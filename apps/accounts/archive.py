@@ -0,0 +1,219 @@
+import gzip
+import json
+import shutil
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from loguru import logger
+
+from . import partitions
+from .models import (
+    FXQuote,
+    LedgerEntry,
+    ScheduledTransfer,
+    Transaction,
+    TransactionArchive,
+)
+from .services import pk_bounds
+
+ARCHIVE_DIR = Path(
+    getattr(
+        settings,
+        "TRANSACTION_ARCHIVE_DIR",
+        Path(settings.BASE_DIR) / "archive" / "transactions",
+    )
+)
+AFTER_MONTHS = getattr(settings, "TRANSACTION_ARCHIVE_AFTER_MONTHS", 12)
+BUCKETS = getattr(settings, "TRANSACTION_ARCHIVE_BUCKETS", 32)
+EXPORT_CHUNK_SIZE = 5000
+
+FIELDS = [
+    "id",
+    "created_at",
+    "transaction_type",
+    "status",
+    "amount",
+    "description",
+    "user_id",
+    "sender_id",
+    "receiver_id",
+    "sender_account_id",
+    "receiver_account_id",
+]
+
+# A month of transactions is written as gzipped JSON lines, split into buckets
+# by account so a statement only opens the one file its account hashes to.
+# A transfer is written to the buckets of both accounts it touched.
+
+
+def bucket_for(account_id) -> int:
+    return uuid.UUID(str(account_id)).int % BUCKETS
+
+
+def month_dir(month) -> Path:
+    return ARCHIVE_DIR / f"{month:%Y-%m}"
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def month_transactions(month):
+    start, end = partitions.month_bounds(month)
+    return Transaction.objects.filter(created_at__gte=start, created_at__lt=end)
+
+
+def due_months(after_months=AFTER_MONTHS) -> list:
+    cutoff = partitions.add_months(
+        partitions.month_start(timezone.localdate()), -after_months
+    )
+    oldest = Transaction.objects.order_by("created_at").values_list(
+        "created_at", flat=True
+    ).first()
+    if oldest is None:
+        return []
+    archived = set(TransactionArchive.objects.values_list("month", flat=True))
+    months = []
+    month = partitions.month_start(timezone.localdate(oldest))
+    while month < cutoff:
+        if month not in archived:
+            months.append(month)
+        month = partitions.add_months(month, 1)
+    return months
+
+
+def export_month(month) -> int:
+    # Written to a scratch directory first and renamed into place, so a
+    # half-written month is never picked up by a reader.
+    target = month_dir(month)
+    scratch = target.with_name(target.name + ".tmp")
+    shutil.rmtree(scratch, ignore_errors=True)
+    scratch.mkdir(parents=True)
+
+    files = {}
+    count = 0
+    try:
+        rows = month_transactions(month)
+        for start, end in pk_bounds(rows, EXPORT_CHUNK_SIZE):
+            chunk = rows
+            if start is not None:
+                chunk = chunk.filter(pk__gte=start)
+            if end is not None:
+                chunk = chunk.filter(pk__lt=end)
+            chunk = list(chunk.values(*FIELDS))
+            accounts = {}
+            for transaction_id, account_id in LedgerEntry.objects.filter(
+                transaction_id__in=[row["id"] for row in chunk],
+                account__isnull=False,
+            ).values_list("transaction_id", "account_id"):
+                accounts.setdefault(transaction_id, set()).add(str(account_id))
+            for row in chunk:
+                touched = accounts.get(row["id"], set())
+                for key in ("sender_account_id", "receiver_account_id"):
+                    if row[key]:
+                        touched.add(str(row[key]))
+                row["accounts"] = sorted(touched)
+                line = json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+                for bucket in {bucket_for(account) for account in touched}:
+                    if bucket not in files:
+                        files[bucket] = gzip.open(
+                            scratch / f"{bucket:02d}.jsonl.gz", "wt"
+                        )
+                    files[bucket].write(line)
+                count += 1
+    finally:
+        for f in files.values():
+            f.close()
+
+    shutil.rmtree(target, ignore_errors=True)
+    scratch.rename(target)
+    return count
+
+
+def _remove_month(month, partition) -> int:
+    # Quotes and standing orders point at transactions without a constraint;
+    # they lose the link rather than keep an id that no longer resolves. Every
+    # quote here expired long ago, so clearing its transaction cannot reopen it.
+    archived = month_transactions(month).values("id")
+    FXQuote.objects.filter(transaction__in=archived).update(transaction=None)
+    ScheduledTransfer.objects.filter(last_transaction__in=archived).update(
+        last_transaction=None
+    )
+
+    removed = 0
+    if partition:
+        removed = partitions.row_count(partition)
+        partitions.drop_partition(month)
+    # Without a partition of its own the month sits in the default partition (or
+    # the plain table) and goes in key ranges. Ledger legs keep pointing at the
+    # ids.
+    rows = month_transactions(month)
+    while True:
+        ids = list(rows.values_list("id", flat=True)[:EXPORT_CHUNK_SIZE])
+        if not ids:
+            break
+        removed += Transaction.objects.filter(pk__in=ids)._raw_delete(
+            Transaction.objects.db
+        )
+    return removed
+
+
+def archive_month(month) -> TransactionArchive:
+    month = partitions.month_start(month)
+    # The month is locked against writes from before the export until the rows
+    # are gone, so nothing can land in it that the archive does not hold.
+    with transaction.atomic():
+        partition = partitions.lock_month(month)
+        count = export_month(month)
+        archive, _created = TransactionArchive.objects.update_or_create(
+            month=month,
+            defaults={"path": str(month_dir(month)), "row_count": count},
+        )
+        removed = _remove_month(month, partition)
+        if removed != count:
+            # Rolls back the drop and the deletes with it.
+            raise ArchiveError(
+                f"Exported {count} transactions for {month:%Y-%m} but would "
+                f"remove {removed}"
+            )
+    logger.info(f"Archived {count} transactions for {month:%Y-%m}")
+    return archive
+
+
+class ArchiveReader:
+    # Looks up archived transactions for one account. Each month's bucket is
+    # read once and only the rows touching the account are kept.
+    def __init__(self, account_id):
+        self.account_id = str(account_id)
+        self.bucket = bucket_for(account_id)
+        self.months = {}
+        self.archived = set(
+            TransactionArchive.objects.values_list("month", flat=True)
+        )
+
+    def _load(self, month):
+        if month not in self.months:
+            rows = {}
+            path = month_dir(month) / f"{self.bucket:02d}.jsonl.gz"
+            if month in self.archived and path.exists():
+                with gzip.open(path, "rt") as f:
+                    for line in f:
+                        row = json.loads(line)
+                        if self.account_id in row["accounts"]:
+                            rows[row["id"]] = row
+            self.months[month] = rows
+        return self.months[month]
+
+    def get(self, transaction_id, posted_at):
+        # A transaction is created just before its ledger legs, so it sits in
+        # the month of the posting or, across midnight, the month before.
+        month = partitions.month_start(timezone.localdate(posted_at))
+        for candidate in (month, partitions.add_months(month, -1)):
+            row = self._load(candidate).get(str(transaction_id))
+            if row is not None:
+                return row
+        return None
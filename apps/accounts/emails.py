@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
@@ -23,6 +23,7 @@ def send_account_creation_email(user, bank_account):
         logger.error(
             f"Failed to send account created email to {email}: Error: {str(e)}"
         )
+        raise
 
 
 def send_full_activation_email(account: BankAccount) -> None:
@@ -43,6 +44,28 @@ def send_full_activation_email(account: BankAccount) -> None:
         )
 
 
+def send_full_activation_emails(accounts) -> int:
+    # The whole batch goes out over one SMTP connection.
+    subject = _("Your Bank Account is now fully activated")
+    from_email = settings.DEFAULT_FROM_EMAIL
+    messages = []
+    for account in accounts:
+        context = {"account": account, "site_name": settings.SITE_NAME}
+        html_email = render_to_string("emails/bank_account_activated.html", context)
+        email = EmailMultiAlternatives(
+            subject, strip_tags(html_email), from_email, [account.user.email]
+        )
+        email.attach_alternative(html_email, "text/html")
+        messages.append(email)
+    try:
+        sent = get_connection().send_messages(messages) or 0
+        logger.info(f"Account Fully Activated email sent to {sent} account holders")
+        return sent
+    except Exception as e:
+        logger.error(f"Failed to send Fully Activated emails: Error: {str(e)}")
+        return 0
+
+
 def send_deposit_email(
     user, user_email, amount, currency, new_balance, account_number
 ) -> None:
@@ -68,6 +91,7 @@ def send_deposit_email(
         logger.error(
             f"Failed to send deposit confirmation email to  {user_email}. Error: {str(e)}"
         )
+        raise
 
 
 def send_withdrawal_email(
@@ -95,6 +119,7 @@ def send_withdrawal_email(
         logger.error(
             f"Failed to send withdrawal confirmation email to  {user_email}. Error: {str(e)}"
         )
+        raise
 
 
 def send_transfer_email(
@@ -159,6 +184,7 @@ def send_transfer_email(
         )
     except Exception as e:
         logger.error(f"Failed to send transfer notification emails. Error: {str(e)}")
+        raise
 
 
 def send_transfer_otp_email(email, otp) -> None:
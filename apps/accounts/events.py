@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+
+from apps.common.outbox import handler
+
+from . import monitoring
+from .emails import (
+    send_account_creation_email,
+    send_deposit_email,
+    send_transfer_email,
+    send_withdrawal_email,
+)
+from .models import BankAccount, Transaction
+from .tasks import send_activation_emails
+
+User = get_user_model()
+
+# Side effects of committed account changes, run by the outbox relay rather
+# than by the request that made the change. The email helpers re-raise a failed
+# send, so the relay retries it and dead-letters it in the end.
+
+
+@handler("accounts.account_created")
+def account_created(account_id):
+    account = BankAccount.objects.select_related("user").get(pk=account_id)
+    send_account_creation_email(account.user, account)
+
+
+@handler("accounts.deposit_email")
+def deposit_email(user_id, **details):
+    send_deposit_email(user=User.objects.get(pk=user_id), **details)
+
+
+@handler("accounts.withdrawal_email")
+def withdrawal_email(user_id, **details):
+    send_withdrawal_email(user=User.objects.get(pk=user_id), **details)
+
+
+@handler("accounts.transfer_email")
+def transfer_email(**details):
+    send_transfer_email(**details)
+
+
+@handler("accounts.monitor")
+def monitor(transaction_ids):
+    transactions = Transaction.objects.select_related("sender_account").filter(
+        pk__in=transaction_ids
+    )
+    monitoring.observe(list(transactions), raise_errors=True)
+
+
+@handler("accounts.activation_emails")
+def activation_emails(account_ids):
+    send_activation_emails.delay(account_ids)
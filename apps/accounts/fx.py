@@ -0,0 +1,178 @@
+import time
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from loguru import logger
+
+from .models import BankAccount, FXQuote, FXRate, FXRateSnapshot
+
+VERSION_CACHE_KEY = "fx:version"
+VERSION_CHECK_INTERVAL = getattr(settings, "FX_VERSION_CHECK_INTERVAL", 30)
+PIVOT_CURRENCY = BankAccount.AccountCurrency.DOLLAR
+RATE_PLACES = Decimal("0.00000001")
+CENT = Decimal("0.01")
+
+
+class FXError(Exception):
+    pass
+
+
+class RateTable:
+    def __init__(self, version, snapshot_id, rates):
+        self.version = version
+        self.snapshot_id = snapshot_id
+        self.rates = rates
+
+    def rate(self, base, quote) -> Decimal:
+        if base == quote:
+            return Decimal("1")
+        if (base, quote) in self.rates:
+            return self.rates[(base, quote)]
+        if (quote, base) in self.rates:
+            return (Decimal("1") / self.rates[(quote, base)]).quantize(
+                RATE_PLACES, rounding=ROUND_HALF_UP
+            )
+        if PIVOT_CURRENCY not in (base, quote):
+            cross = self.rate(base, PIVOT_CURRENCY) * self.rate(PIVOT_CURRENCY, quote)
+            return cross.quantize(RATE_PLACES, rounding=ROUND_HALF_UP)
+        raise FXError(
+            _("No exchange rate from %(base)s to %(quote)s.")
+            % {"base": base, "quote": quote}
+        )
+
+    def convert(self, amount: Decimal, base, quote):
+        rate = self.rate(base, quote)
+        return (amount * rate).quantize(CENT, rounding=ROUND_HALF_UP), rate
+
+
+# The table for the published version lives in this process. Requests only
+# compare a version number, read from the shared cache at most once per
+# VERSION_CHECK_INTERVAL; the database is read when a new version appears.
+_table = None
+_checked_at = 0.0
+
+
+def _latest_version():
+    snapshots = FXRateSnapshot.objects.filter(rates__isnull=False)
+    return snapshots.aggregate(version=Max("version"))["version"]
+
+
+def _published_version():
+    try:
+        version = caches["redis"].get(VERSION_CACHE_KEY)
+        if version is None:
+            version = _latest_version()
+            caches["redis"].set(VERSION_CACHE_KEY, version, timeout=None)
+        return version
+    except Exception as e:
+        logger.warning(f"FX version cache unavailable, using database: {str(e)}")
+        return _latest_version()
+
+
+def _load(version) -> RateTable:
+    snapshot = FXRateSnapshot.objects.get(version=version)
+    rates = {
+        (rate.base_currency, rate.quote_currency): rate.rate
+        for rate in snapshot.rates.all()
+    }
+    logger.info(f"Loaded FX rates v{version} ({len(rates)} pairs)")
+    return RateTable(version, snapshot.pk, rates)
+
+
+def current_table() -> RateTable:
+    global _table, _checked_at
+    now = time.monotonic()
+    if _table is None or now - _checked_at >= VERSION_CHECK_INTERVAL:
+        version = _published_version()
+        if version is None:
+            raise FXError(_("No exchange rates have been published."))
+        if _table is None or _table.version != version:
+            _table = _load(version)
+        _checked_at = now
+    return _table
+
+
+def announce(snapshot: FXRateSnapshot):
+    global _table
+    _table = None
+    try:
+        caches["redis"].set(VERSION_CACHE_KEY, snapshot.version, timeout=None)
+    except Exception as e:
+        logger.warning(f"Could not announce FX rates v{snapshot.version}: {str(e)}")
+
+
+def validate_rates(rates):
+    # rates is an iterable of (base, quote, rate) tuples.
+    rows = []
+    currencies = set(BankAccount.AccountCurrency.values)
+    field = FXRate._meta.get_field("rate")
+    for base, quote, rate in rates:
+        if base not in currencies or quote not in currencies or base == quote:
+            raise FXError(f"Invalid currency pair: {base}/{quote}")
+        try:
+            rate = Decimal(str(rate)).quantize(RATE_PLACES, rounding=ROUND_HALF_UP)
+        except InvalidOperation:
+            raise FXError(f"Rate for {base}/{quote} is not a number: {rate!r}")
+        # NaN survives quantize, and comparing it raises.
+        if not rate.is_finite() or rate <= 0:
+            raise FXError(f"Rate for {base}/{quote} must be positive")
+        if rate.adjusted() >= field.max_digits - field.decimal_places:
+            raise FXError(f"Rate for {base}/{quote} is too large")
+        rows.append((base, quote, rate))
+    if not rows:
+        raise FXError("A rate snapshot needs at least one rate")
+    return rows
+
+
+def publish(rates, source="", published_by=None) -> FXRateSnapshot:
+    rows = validate_rates(rates)
+    for _attempt in range(3):
+        try:
+            with transaction.atomic():
+                latest = FXRateSnapshot.objects.aggregate(version=Max("version"))
+                version = (latest["version"] or 0) + 1
+                snapshot = FXRateSnapshot.objects.create(
+                    version=version, source=source, published_by=published_by
+                )
+                FXRate.objects.bulk_create(
+                    [
+                        FXRate(
+                            snapshot=snapshot,
+                            base_currency=base,
+                            quote_currency=quote,
+                            rate=rate,
+                        )
+                        for base, quote, rate in rows
+                    ]
+                )
+                transaction.on_commit(lambda: announce(snapshot))
+            return snapshot
+        except IntegrityError:
+            continue
+    raise FXError("Could not allocate a rate snapshot version")
+
+
+def create_quote(user, sender_account, receiver_account, amount) -> FXQuote:
+    table = current_table()
+    target_amount, rate = table.convert(
+        amount, sender_account.currency, receiver_account.currency
+    )
+    if target_amount <= 0:
+        raise FXError(_("Amount is too small to convert."))
+    return FXQuote.objects.create(
+        user=user,
+        snapshot_id=table.snapshot_id,
+        sender_account=sender_account,
+        receiver_account=receiver_account,
+        source_amount=amount,
+        source_currency=sender_account.currency,
+        target_amount=target_amount,
+        target_currency=receiver_account.currency,
+        rate=rate,
+        expires_at=timezone.now() + settings.FX_QUOTE_TTL,
+    )
@@ -0,0 +1,224 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.utils import timezone
+from loguru import logger
+
+from . import ledger, snapshots
+from .models import (
+    BankAccount,
+    InterestRun,
+    InterestRunChunk,
+    LedgerEntry,
+    Transaction,
+)
+from .services import add_per_account, chunked, pk_bounds
+
+CHUNK_SIZE = getattr(settings, "INTEREST_CHUNK_SIZE", 2000)
+DAYS_IN_YEAR = 365
+# Rates are in basis points and balances in minor units, so a day's interest is
+# balance * bps / (10_000 * 365) in plain integer arithmetic.
+DAILY_DIVISOR = 10_000 * DAYS_IN_YEAR
+
+
+def to_minor(amount: Decimal) -> int:
+    return int(amount.scaleb(2).to_integral_value())
+
+
+def from_minor(value: int) -> Decimal:
+    return Decimal(value).scaleb(-2)
+
+
+def daily_interest(balances, rates_bps, carries):
+    # Exact integer arithmetic over the chunk's columns, one divmod per account;
+    # the chunk's reads and writes are the bulk queries around it. What falls
+    # below a minor unit is returned as the new carry instead of being rounded
+    # away, so small balances still earn once it adds up to a whole unit.
+    results = []
+    for balance, rate, carry in zip(balances, rates_bps, carries):
+        value, carry = divmod(max(balance, 0) * rate + carry, DAILY_DIVISOR)
+        results.append((value, carry))
+    return results
+
+
+def savings_accounts():
+    return BankAccount.objects.filter(account_type=BankAccount.AccountType.SAVINGS)
+
+
+def chunk_bounds(size=CHUNK_SIZE):
+    return pk_bounds(savings_accounts(), size)
+
+
+def plan_run(accrual_date) -> InterestRun:
+    run = InterestRun.objects.filter(accrual_date=accrual_date).first()
+    if run:
+        return run
+    try:
+        with transaction.atomic():
+            run = InterestRun.objects.create(accrual_date=accrual_date)
+            chunks = InterestRunChunk.objects.bulk_create(
+                [
+                    InterestRunChunk(
+                        run=run, start_account_id=start, end_account_id=end
+                    )
+                    for start, end in chunk_bounds()
+                ],
+                batch_size=1000,
+            )
+            run.chunk_count = len(chunks)
+            run.save(update_fields=["chunk_count", "updated_at"])
+    except IntegrityError:
+        return InterestRun.objects.get(accrual_date=accrual_date)
+    logger.info(f"Planned interest run for {accrual_date} in {len(chunks)} chunks")
+    return run
+
+
+def _chunk_accounts(chunk: InterestRunChunk):
+    # Sharded accounts are settlement accounts, not customer savings.
+    accounts = savings_accounts().filter(
+        account_status=BankAccount.AccountStatus.ACTIVE,
+        shard_count=0,
+    )
+    if chunk.start_account_id:
+        accounts = accounts.filter(pk__gte=chunk.start_account_id)
+    if chunk.end_account_id:
+        accounts = accounts.filter(pk__lt=chunk.end_account_id)
+    return (
+        accounts.select_for_update()
+        .only(
+            "pk",
+            "user_id",
+            "currency",
+            "account_balance",
+            "entries_since_checkpoint",
+            "interest_carry",
+        )
+        .order_by("pk")
+    )
+
+
+def accrue_chunk(chunk_id) -> InterestRunChunk:
+    with transaction.atomic():
+        # The postings and the COMPLETED flag commit together, so re-running a
+        # chunk after a failure can never credit an account twice.
+        chunk = (
+            InterestRunChunk.objects.select_for_update()
+            .select_related("run")
+            .get(pk=chunk_id)
+        )
+        if chunk.status == InterestRunChunk.ChunkStatus.COMPLETED:
+            return chunk
+
+        rates = getattr(settings, "SAVINGS_INTEREST_RATES_BPS", {})
+        accounts = list(_chunk_accounts(chunk))
+        # Interest is on the balance the account closed the accrual date with,
+        # so a run resumed or replayed later still accrues on that day.
+        balances = snapshots.closing_balances(accounts, chunk.run.accrual_date)
+        interest = daily_interest(
+            [to_minor(balances[account.pk]) for account in accounts],
+            [rates.get(account.currency, 0) for account in accounts],
+            [account.interest_carry for account in accounts],
+        )
+        credited = []
+        carried = []
+        for account, (value, carry) in zip(accounts, interest):
+            if value > 0:
+                credited.append((account, from_minor(value)))
+            if carry != account.interest_carry:
+                account.interest_carry = carry
+                carried.append(account)
+        BankAccount.objects.bulk_update(carried, ["interest_carry"], batch_size=500)
+
+        description = f"Interest for {chunk.run.accrual_date:%Y-%m-%d}"
+        txns = [
+            Transaction(
+                amount=amount,
+                description=description,
+                receiver_id=account.user_id,
+                receiver_account=account,
+                status=Transaction.TransactionStatus.COMPLETED,
+                transaction_type=Transaction.TransactionType.INTEREST,
+            )
+            for account, amount in credited
+        ]
+        Transaction.objects.bulk_create(txns, batch_size=1000)
+        entries = ledger.post_many(
+            [
+                (
+                    txn,
+                    (
+                        ledger.credit(account, amount),
+                        ledger.debit(
+                            None, amount, LedgerEntry.LedgerAccount.INTEREST_EXPENSE
+                        ),
+                    ),
+                )
+                for txn, (account, amount) in zip(txns, credited)
+            ]
+        )
+        customer_entries = [entry for entry in entries if entry.account_id]
+
+        for batch in chunked(credited, 500):
+            pks = [account.pk for account, _a in batch]
+            BankAccount.objects.filter(pk__in=pks).update(
+                account_balance=add_per_account(
+                    "account_balance",
+                    {account.pk: amount for account, amount in batch},
+                    DecimalField(max_digits=12, decimal_places=2),
+                ),
+                entries_since_checkpoint=F("entries_since_checkpoint") + 1,
+            )
+
+        total = Decimal("0.00")
+        for (account, amount), entry in zip(credited, customer_entries):
+            account.account_balance += amount
+            account.entries_since_checkpoint += 1
+            ledger.checkpoint_if_due(account, entry)
+            total += amount
+
+        chunk.status = InterestRunChunk.ChunkStatus.COMPLETED
+        chunk.accounts_credited = len(credited)
+        chunk.total_interest = total
+        chunk.error = ""
+        chunk.save()
+
+    finish_run(chunk.run)
+    return chunk
+
+
+def record_failure(chunk_id, error):
+    InterestRunChunk.objects.filter(pk=chunk_id).exclude(
+        status=InterestRunChunk.ChunkStatus.COMPLETED
+    ).update(
+        status=InterestRunChunk.ChunkStatus.FAILED,
+        attempts=F("attempts") + 1,
+        error=str(error)[:2000],
+        updated_at=timezone.now(),
+    )
+
+
+def finish_run(run: InterestRun):
+    if run.chunks.exclude(status=InterestRunChunk.ChunkStatus.COMPLETED).exists():
+        return False
+    totals = run.chunks.aggregate(
+        accounts=Sum("accounts_credited"),
+        total=Sum("total_interest"),
+        chunks=Count("id"),
+    )
+    InterestRun.objects.filter(pk=run.pk).update(
+        status=InterestRun.RunStatus.COMPLETED,
+        accounts_credited=totals["accounts"] or 0,
+        total_interest=totals["total"] or 0,
+        updated_at=timezone.now(),
+    )
+    logger.info(
+        f"Interest run for {run.accrual_date} completed: {totals['accounts'] or 0} "
+        f"accounts credited {totals['total'] or 0} over {totals['chunks']} chunks"
+    )
+    return True
+
+
+def pending_chunks(run: InterestRun):
+    return run.chunks.exclude(status=InterestRunChunk.ChunkStatus.COMPLETED)
@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, F, Sum, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import BalanceCheckpoint, BankAccount, LedgerEntry
+
+CHECKPOINT_INTERVAL = getattr(settings, "LEDGER_CHECKPOINT_INTERVAL", 500)
+
+SIGNED_AMOUNT = Case(
+    When(entry_type=LedgerEntry.EntryType.CREDIT, then=F("amount")),
+    default=-F("amount"),
+)
+
+
+class UnbalancedPostingError(Exception):
+    pass
+
+
+def credit(account, amount, ledger_account=LedgerEntry.LedgerAccount.CUSTOMER):
+    return LedgerEntry(
+        account=account,
+        ledger_account=ledger_account,
+        entry_type=LedgerEntry.EntryType.CREDIT,
+        amount=amount,
+    )
+
+
+def debit(account, amount, ledger_account=LedgerEntry.LedgerAccount.CUSTOMER):
+    return LedgerEntry(
+        account=account,
+        ledger_account=ledger_account,
+        entry_type=LedgerEntry.EntryType.DEBIT,
+        amount=amount,
+    )
+
+
+def post(txn, *legs):
+    return post_many([(txn, legs)])
+
+
+def post_many(postings, batch_size=1000):
+    return LedgerEntry.objects.bulk_create(entries_for(postings), batch_size=batch_size)
+
+
+def entries_for(postings, backdated=False):
+    # Backdated legs take their transaction's created_at, for history loaded
+    # after the fact; live postings are stamped now.
+    now = timezone.now()
+    entries = []
+    for txn, legs in postings:
+        debits = sum(
+            leg.amount for leg in legs if leg.entry_type == LedgerEntry.EntryType.DEBIT
+        )
+        credits = sum(
+            leg.amount for leg in legs if leg.entry_type == LedgerEntry.EntryType.CREDIT
+        )
+        if debits != credits:
+            raise UnbalancedPostingError(
+                _("Debits and credits of a posting must balance.")
+            )
+        for leg in legs:
+            leg.transaction = txn
+            leg.created_at = txn.created_at if backdated else now
+            entries.append(leg)
+    return entries
+
+
+def checkpoint_if_due(account: BankAccount, entry: LedgerEntry):
+    # Callers hold the account row lock and have just refreshed the balance, so
+    # account_balance is exactly the balance after `entry`; nothing is summed.
+    if account.entries_since_checkpoint < CHECKPOINT_INTERVAL:
+        return None
+
+    checkpoint = BalanceCheckpoint.objects.create(
+        account=account,
+        entry=entry,
+        balance=account.account_balance,
+        as_of=entry.created_at,
+    )
+    BankAccount.objects.filter(pk=account.pk).update(entries_since_checkpoint=0)
+    account.entries_since_checkpoint = 0
+    return checkpoint
+
+
+def balance_at(account: BankAccount, at=None) -> Decimal:
+    at = at or timezone.now()
+
+    checkpoint = (
+        BalanceCheckpoint.objects.filter(account=account, as_of__lte=at)
+        .order_by("-as_of", "-id")
+        .first()
+    )
+
+    tail = LedgerEntry.objects.filter(account=account, created_at__lte=at)
+    opening = Decimal("0.00")
+    if checkpoint:
+        opening = checkpoint.balance
+        if checkpoint.entry_id:
+            tail = tail.filter(id__gt=checkpoint.entry_id)
+        else:
+            tail = tail.filter(created_at__gt=checkpoint.as_of)
+
+    movement = tail.aggregate(total=Sum(SIGNED_AMOUNT))["total"] or Decimal("0.00")
+    return (opening + movement).quantize(Decimal("0.01"))
@@ -0,0 +1,126 @@
+import time
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from loguru import logger
+
+from . import luhn
+from .models import BankAccount
+from .services import chunked
+
+
+def resolve_many(numbers):
+    # Numbers that fail the checksum never reach the database; the rest are
+    # resolved with one indexed IN query per thousand.
+    numbers = list(dict.fromkeys(numbers))
+    validity = luhn.validate_many(numbers)
+
+    accounts = {}
+    for chunk in chunked([number for number in numbers if validity[number]]):
+        accounts.update(
+            BankAccount.objects.filter(account_number__in=chunk)
+            .select_related("user")
+            .only(
+                "account_number",
+                "currency",
+                "account_status",
+                "user__first_name",
+                "user__last_name",
+            )
+            .in_bulk(field_name="account_number")
+        )
+
+    results = []
+    for number in numbers:
+        account = accounts.get(number)
+        results.append(
+            {
+                "account_number": number,
+                "valid": validity[number],
+                "exists": account is not None,
+                "account_name": account.user.full_name if account else None,
+                "currency": account.currency if account else None,
+                "active": (
+                    account.account_status == BankAccount.AccountStatus.ACTIVE
+                    if account
+                    else None
+                ),
+            }
+        )
+    return results
+
+
+# Name enquiry reads through two tiers: the per-process default cache answers
+# hot numbers without a network hop, and the shared Redis cache absorbs misses
+# across workers. Saves invalidate both tiers in this process and the shared
+# tier everywhere; other processes pick up changes within LOCAL_TTL.
+NAME_CACHE_TTL = 60 * 60
+NEGATIVE_CACHE_TTL = 5 * 60
+LOCAL_TTL = 60
+SHARED_BACKOFF_SECONDS = 30
+MISSING = "missing"
+
+_shared_skip_until = 0.0
+
+
+def name_cache_key(number: str) -> str:
+    return f"name-enquiry:{number}"
+
+
+def _shared(method, *args, **kwargs):
+    global _shared_skip_until
+    if time.monotonic() < _shared_skip_until:
+        return None
+    try:
+        return getattr(caches["redis"], method)(*args, **kwargs)
+    except Exception as e:
+        _shared_skip_until = time.monotonic() + SHARED_BACKOFF_SECONDS
+        logger.warning(f"Name enquiry cache unavailable: {str(e)}")
+        return None
+
+
+def _load_name(number: str, using=None):
+    account = (
+        BankAccount.objects.using(using)
+        .filter(account_number=number)
+        .select_related("user")
+        .only("account_number", "currency", "user__first_name", "user__last_name")
+        .first()
+    )
+    if account is None:
+        return MISSING
+    return {
+        "account_number": account.account_number,
+        "account_name": account.user.full_name,
+        "currency": account.currency,
+    }
+
+
+def name_enquiry(number: str):
+    key = name_cache_key(number)
+    local = caches["default"]
+
+    entry = local.get(key)
+    if entry is None:
+        entry = _shared("get", key)
+        if entry is None:
+            # Cache fills read the primary even inside replica_reads: a lagging
+            # replica would put a name back just after a rename invalidated it,
+            # or cache a miss for an account opened a moment ago.
+            entry = _load_name(number, using=DEFAULT_DB_ALIAS)
+            ttl = NEGATIVE_CACHE_TTL if entry == MISSING else NAME_CACHE_TTL
+            _shared("set", key, entry, timeout=ttl)
+        local_ttl = LOCAL_TTL
+        if entry == MISSING:
+            local_ttl = min(LOCAL_TTL, NEGATIVE_CACHE_TTL)
+        local.set(key, entry, timeout=local_ttl)
+
+    return None if entry == MISSING else entry
+
+
+def invalidate_names(numbers):
+    keys = [name_cache_key(number) for number in numbers]
+    if not keys:
+        return
+    caches["default"].delete_many(keys)
+    _shared("delete_many", keys)
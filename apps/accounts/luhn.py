@@ -0,0 +1,40 @@
+# Luhn digits from lookup tables instead of per-digit string and list work. A
+# digit is doubled when it sits an odd number of places left of the check digit.
+DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def check_digit(payload: str) -> int:
+    total = 0
+    double = True
+    for char in reversed(payload):
+        digit = ord(char) - 48
+        total += DOUBLED[digit] if double else digit
+        double = not double
+    return -total % 10
+
+
+# Each two-digit chunk of an even-length number, read from the right, adds its
+# doubled left digit and its plain right digit; one lookup covers both.
+PAIRS = {f"{a}{b}": DOUBLED[a] + b for a in range(10) for b in range(10)}
+
+
+def is_valid(number: str) -> bool:
+    if not number or not number.isascii() or not number.isdigit():
+        return False
+    if len(number) % 2:
+        number = f"0{number}"
+    return sum(PAIRS[number[i : i + 2]] for i in range(0, len(number), 2)) % 10 == 0
+
+
+def is_valid_legacy(number: str) -> bool:
+    # Numbers issued before the pool doubled the other set of digits, which is
+    # the same as computing the check digit over the payload with a 0 appended.
+    if not number or not number.isascii() or not number.isdigit():
+        return False
+    return int(number[-1]) == check_digit(f"{number[:-1]}0")
+
+
+def validate_many(numbers):
+    return {
+        number: is_valid(number) or is_valid_legacy(number) for number in numbers
+    }
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.accounts import interest
+from apps.accounts.tasks import accrue_interest
+
+
+class Command(BaseCommand):
+    help = (
+        "Accrue a day of savings interest. By default the chunks are queued for "
+        "the Celery workers; --inline runs them here. Re-running a date resumes "
+        "the chunks that did not complete."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date", help="Accrual date (YYYY-MM-DD), default yesterday."
+        )
+        parser.add_argument(
+            "--inline", action="store_true", help="Process chunks in this process."
+        )
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        if options["date"]:
+            accrual_date = date.fromisoformat(options["date"])
+        else:
+            accrual_date = timezone.localdate() - timedelta(days=1)
+
+        if not options["inline"]:
+            queued = accrue_interest.delay(accrual_date.isoformat())
+            self.stdout.write(f"Queued interest run for {accrual_date}: {queued.id}")
+            return
+
+        started = time.perf_counter()
+        run = interest.plan_run(accrual_date)
+        chunk_ids = list(interest.pending_chunks(run).values_list("pk", flat=True))
+        self.stdout.write(
+            f"{len(chunk_ids)} of {run.chunk_count} chunks pending for {accrual_date}"
+        )
+
+        failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = [pool.submit(self.process, chunk_id) for chunk_id in chunk_ids]
+            for future in as_completed(futures):
+                failed += not future.result()
+
+        run.refresh_from_db()
+        self.stdout.write(
+            f"{run.get_status_display()}: {run.accounts_credited} accounts credited "
+            f"{run.total_interest} in {time.perf_counter() - started:.1f}s"
+        )
+        if failed:
+            self.stderr.write(
+                f"{failed} chunks failed; run the command again to resume."
+            )
+
+    def process(self, chunk_id):
+        try:
+            interest.accrue_chunk(chunk_id)
+        except Exception as e:
+            interest.record_failure(chunk_id, e)
+            self.stderr.write(f"Chunk {chunk_id} failed: {e}")
+            return False
+        finally:
+            close_old_connections()
+        return True
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts import archive, partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Move whole months of transactions older than --older-than-months to "
+        "gzipped files in TRANSACTION_ARCHIVE_DIR. Statements keep reading them "
+        "from there; on PostgreSQL the month's partition is dropped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-months", type=int, default=archive.AFTER_MONTHS
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="List the months and stop."
+        )
+
+    def handle(self, *args, **options):
+        created = partitions.ensure_partitions()
+        if created:
+            self.stdout.write(
+                f"Created partitions for {', '.join(f'{m:%Y-%m}' for m in created)}"
+            )
+
+        months = archive.due_months(options["older_than_months"])
+        if not months:
+            self.stdout.write("Nothing to archive.")
+            return
+        for month in months:
+            if options["dry_run"]:
+                count = archive.month_transactions(month).count()
+                self.stdout.write(f"{month:%Y-%m}: {count} transactions")
+                continue
+            started = time.perf_counter()
+            try:
+                record = archive.archive_month(month)
+            except archive.ArchiveError as e:
+                raise CommandError(str(e))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{month:%Y-%m}: {record.row_count} transactions archived to "
+                    f"{record.path} in {elapsed:.1f}s"
+                )
+            )
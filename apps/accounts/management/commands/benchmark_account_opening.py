@@ -0,0 +1,119 @@
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, transaction
+
+from apps.accounts import numbering
+from apps.accounts.models import BankAccount
+
+User = get_user_model()
+
+FIXTURE_PREFIX = "BO"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure accounts opened per second with pooled account numbers, against "
+        "the old generate-and-check loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--accounts", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--currency", default=BankAccount.AccountCurrency.NAIRA)
+        parser.add_argument(
+            "--mode", choices=["pool", "loop", "both"], default="both"
+        )
+
+    def handle(self, *args, **options):
+        modes = ["loop", "pool"] if options["mode"] == "both" else [options["mode"]]
+        currency = options["currency"]
+
+        for mode in modes:
+            users = self.seed_users(options["accounts"])
+            if mode == "pool":
+                started = time.perf_counter()
+                numbering.refill(currency, target=options["accounts"])
+                self.stdout.write(
+                    f"pool refill: {options['accounts']} numbers in "
+                    f"{time.perf_counter() - started:.2f}s"
+                )
+            try:
+                self.run(mode, users, currency, options["threads"])
+            finally:
+                self.cleanup()
+
+    def seed_users(self, count):
+        return User.objects.bulk_create(
+            [
+                User(
+                    username=f"{FIXTURE_PREFIX}{uuid.uuid4().hex[:10]}",
+                    email=f"bench-open-{uuid.uuid4().hex}@example.com",
+                    first_name="Bench",
+                    last_name=str(i),
+                    id_no=random.randint(10**9, 4 * 10**9),
+                    security_question=User.SecurityQuestions.FAVORITE_COLOR,
+                    security_answer="blue",
+                    password="!",
+                )
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+
+    def open_with_pool(self, user, currency):
+        with transaction.atomic():
+            BankAccount.objects.create(
+                user=user,
+                account_number=numbering.claim(currency),
+                currency=currency,
+                account_type=BankAccount.AccountType.SAVINGS,
+            )
+
+    def open_with_loop(self, user, currency):
+        prefix = numbering.prefix_for(currency)
+        with transaction.atomic():
+            while True:
+                number = numbering.generate(prefix, 1).pop()
+                if not BankAccount.objects.filter(account_number=number).exists():
+                    break
+            BankAccount.objects.create(
+                user=user,
+                account_number=number,
+                currency=currency,
+                account_type=BankAccount.AccountType.SAVINGS,
+            )
+
+    def run(self, mode, users, currency, threads):
+        opener = self.open_with_pool if mode == "pool" else self.open_with_loop
+
+        def worker(batch):
+            timings = []
+            try:
+                for user in batch:
+                    started = time.perf_counter()
+                    opener(user, currency)
+                    timings.append(time.perf_counter() - started)
+            finally:
+                close_old_connections()
+            return timings
+
+        batches = [users[i::threads] for i in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            timings = sorted(t for result in pool.map(worker, batches) for t in result)
+        elapsed = time.perf_counter() - started
+
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)] * 1000
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(mode)
+            + f" {len(timings)} accounts in {elapsed:.2f}s: "
+            f"{len(timings) / elapsed:.0f} accounts/s, p95 {p95:.2f} ms"
+        )
+
+    def cleanup(self):
+        User.objects.filter(email__startswith="bench-open-").delete()
@@ -0,0 +1,234 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.accounts.models import BankAccount, Transaction
+
+User = get_user_model()
+
+FIXTURE_PREFIX = "BENCH"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a Transaction fixture and print EXPLAIN plans and latencies for the "
+        "account lookups the accounts API runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--accounts", type=int, default=1_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--skip-seed",
+            action="store_true",
+            help="Reuse the fixture left behind by a previous --keep run.",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the fixture data.")
+
+    def handle(self, *args, **options):
+        if not options["skip_seed"]:
+            self.seed(options["rows"], options["accounts"])
+
+        account_ids = list(
+            BankAccount.objects.filter(
+                account_number__startswith=FIXTURE_PREFIX
+            ).values_list("pk", flat=True)
+        )
+        if not account_ids:
+            self.stderr.write("No fixture found; run without --skip-seed first.")
+            return
+
+        try:
+            self.run_queries(account_ids, options["repeat"])
+        finally:
+            if not options["keep"]:
+                self.cleanup()
+
+    def queries(self, account_id):
+        now = timezone.now()
+        recent = Transaction.objects.filter(sender_account=account_id).order_by(
+            "-created_at", "-id"
+        )
+        deep_row = recent.values("created_at", "id")[200:201].first()
+        deep_page = recent
+        if deep_row:
+            deep_page = recent.filter(
+                Q(created_at__lt=deep_row["created_at"])
+                | Q(created_at=deep_row["created_at"], id__lt=deep_row["id"])
+            )
+
+        return {
+            "history: sent, first page": recent[:20],
+            "history: received, first page": Transaction.objects.filter(
+                receiver_account=account_id
+            ).order_by("-created_at", "-id")[:20],
+            "history: sent, keyset page 10": deep_page[:20],
+            "sent in the last 30 days": Transaction.objects.filter(
+                sender_account=account_id,
+                created_at__gte=now - timedelta(days=30),
+            ).order_by("-created_at")[:100],
+            "pending for account": Transaction.objects.filter(
+                sender_account=account_id,
+                status=Transaction.TransactionStatus.PENDING,
+            ).order_by("created_at")[:50],
+        }
+
+    def run_queries(self, account_ids, repeat):
+        sample = random.sample(account_ids, min(repeat, len(account_ids)))
+        names = self.queries(sample[0]).keys()
+
+        for name in names:
+            plan = self.queries(sample[0])[name].explain()
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+
+            timings = []
+            for account_id in sample:
+                qs = self.queries(account_id)[name]
+                started = time.perf_counter()
+                list(qs)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+            self.stdout.write(
+                f"median {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms "
+                f"over {len(timings)} accounts\n"
+            )
+
+    def seed(self, rows, accounts):
+        self.stdout.write(f"Seeding {accounts} accounts and {rows} transactions...")
+        started = time.perf_counter()
+
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"BN{uuid.uuid4().hex[:10]}",
+                    email=f"bench-{uuid.uuid4().hex}@example.com",
+                    first_name="Bench",
+                    last_name=str(i),
+                    id_no=random.randint(10**9, 4 * 10**9),
+                    security_question=User.SecurityQuestions.FAVORITE_COLOR,
+                    security_answer="blue",
+                    password="!",
+                )
+                for i in range(accounts)
+            ],
+            batch_size=1000,
+        )
+        bank_accounts = BankAccount.objects.bulk_create(
+            [
+                BankAccount(
+                    user=user,
+                    account_number=f"{FIXTURE_PREFIX}{i:012d}",
+                    currency=BankAccount.AccountCurrency.NAIRA,
+                    account_type=BankAccount.AccountType.CURRENT,
+                    account_status=BankAccount.AccountStatus.ACTIVE,
+                )
+                for i, user in enumerate(users)
+            ],
+            batch_size=1000,
+        )
+
+        if connection.vendor == "postgresql":
+            self.seed_postgres(rows)
+        else:
+            self.seed_orm(rows, bank_accounts)
+
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(f"ANALYZE {Transaction._meta.db_table}")
+            else:
+                cursor.execute("ANALYZE")
+
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    def seed_postgres(self, rows):
+        # Generating rows server-side is what makes a 10M-row fixture practical.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Transaction._meta.db_table} (
+                    id, created_at, updated_at, amount, description, status,
+                    transaction_type, sender_account_id, receiver_account_id
+                )
+                SELECT
+                    gen_random_uuid(),
+                    now() - random() * interval '730 days',
+                    now(),
+                    round((1 + random() * 5000)::numeric, 2),
+                    'benchmark fixture',
+                    CASE
+                        WHEN random() < 0.01 THEN 'pending'
+                        WHEN random() < 0.01 THEN 'failed'
+                        ELSE 'completed'
+                    END,
+                    (ARRAY['transfer', 'transfer', 'deposit', 'withdrawal'])[
+                        1 + floor(random() * 4)::int
+                    ],
+                    a.ids[1 + floor(random() * a.n)::int],
+                    a.ids[1 + floor(random() * a.n)::int]
+                FROM generate_series(1, %s),
+                    (
+                        SELECT array_agg(id) AS ids, count(*) AS n
+                        FROM {BankAccount._meta.db_table}
+                        WHERE account_number LIKE %s
+                    ) AS a
+                """,
+                [rows, f"{FIXTURE_PREFIX}%"],
+            )
+
+    def seed_orm(self, rows, bank_accounts):
+        statuses = [Transaction.TransactionStatus.COMPLETED] * 98 + [
+            Transaction.TransactionStatus.PENDING,
+            Transaction.TransactionStatus.FAILED,
+        ]
+        types = [Transaction.TransactionType.TRANSFER] * 2 + [
+            Transaction.TransactionType.DEPOSIT,
+            Transaction.TransactionType.WITHDRAWAL,
+        ]
+        now = timezone.now()
+        batch = []
+        for i in range(rows):
+            sender, receiver = random.sample(bank_accounts, 2)
+            batch.append(
+                Transaction(
+                    amount=random.randint(100, 500_000) / 100,
+                    description="benchmark fixture",
+                    sender_id=sender.user_id,
+                    receiver_id=receiver.user_id,
+                    sender_account=sender,
+                    receiver_account=receiver,
+                    status=random.choice(statuses),
+                    transaction_type=random.choice(types),
+                )
+            )
+            if len(batch) == 10_000:
+                self.flush(batch, now)
+                batch = []
+        if batch:
+            self.flush(batch, now)
+
+    def flush(self, batch, now):
+        Transaction.objects.bulk_create(batch, batch_size=2000)
+        # created_at is auto_now_add, so spread the rows over two years afterwards.
+        for txn in batch:
+            txn.created_at = now - timedelta(seconds=random.randint(0, 730 * 86400))
+        Transaction.objects.bulk_update(batch, ["created_at"], batch_size=2000)
+
+    def cleanup(self):
+        accounts = BankAccount.objects.filter(account_number__startswith=FIXTURE_PREFIX)
+        # The fixture has no ledger legs or FX quotes, so the rows go without the
+        # delete collector, which would otherwise bind every id in one UPDATE.
+        Transaction.objects.filter(sender_account__in=accounts)._raw_delete(
+            Transaction.objects.db
+        )
+        User.objects.filter(bank_accounts__in=accounts).delete()
@@ -0,0 +1,107 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.accounts import search
+from apps.accounts.models import BankAccount
+
+from .benchmark_transaction_queries import Command as QueryBenchmark
+
+PAGE_SIZE = 20
+
+
+class Command(QueryBenchmark):
+    help = (
+        "Seed a Transaction fixture and print EXPLAIN plans and latencies for the "
+        "filter mixes tellers use on the transaction search endpoint, plus the "
+        "shapes it refuses."
+    )
+
+    def mixes(self, account_number):
+        today = timezone.localdate()
+        month_ago = (today - timedelta(days=30)).isoformat()
+        week_ago = (today - timedelta(days=7)).isoformat()
+        return {
+            "account, first page": {"account": account_number},
+            "account, last 30 days": {
+                "account": account_number,
+                "created_after": month_ago,
+            },
+            "account + amount range": {
+                "account": account_number,
+                "amount_min": "1000",
+                "amount_max": "2000",
+            },
+            "sender + type + status": {
+                "sender_account": account_number,
+                "transaction_type": "transfer",
+                "status": "completed",
+            },
+            "type, first page": {"transaction_type": "withdrawal"},
+            "type + status + amount range": {
+                "transaction_type": "deposit",
+                "status": "completed",
+                "amount_min": "4900",
+            },
+            "type + pending, last 30 days": {
+                "transaction_type": "transfer",
+                "status": "pending",
+                "created_after": month_ago,
+            },
+            "7 day window + amount range": {
+                "created_after": week_ago,
+                "created_before": today.isoformat(),
+                "amount_min": "4000",
+            },
+        }
+
+    def first_page(self, qs):
+        # What KeysetPagination asks for on the first page.
+        return qs.order_by("-created_at", "-id")[: PAGE_SIZE + 1]
+
+    def run_queries(self, account_ids, repeat):
+        sample = random.sample(account_ids, min(repeat, len(account_ids)))
+        numbers = list(
+            BankAccount.objects.filter(pk__in=sample).values_list(
+                "account_number", flat=True
+            )
+        )
+
+        for name in self.mixes(numbers[0]):
+            querysets, errors = search.search_querysets(self.mixes(numbers[0])[name])
+            if errors:
+                self.stderr.write(f"{name}: rejected {errors}")
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for qs in querysets:
+                self.stdout.write(self.first_page(qs).explain())
+
+            timings = []
+            for number in numbers:
+                querysets, _errors = search.search_querysets(self.mixes(number)[name])
+                started = time.perf_counter()
+                for qs in querysets:
+                    list(self.first_page(qs))
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+            self.stdout.write(
+                f"median {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms "
+                f"over {len(timings)} accounts\n"
+            )
+
+        today = timezone.localdate()
+        for name, params in {
+            "amount range only": {"amount_min": "100", "amount_max": "200"},
+            "status only": {"status": "pending"},
+            "90 day window": {
+                "created_after": (today - timedelta(days=90)).isoformat(),
+                "created_before": today.isoformat(),
+            },
+        }.items():
+            _querysets, errors = search.search_querysets(params)
+            verdict = "rejected" if errors else "ACCEPTED"
+            self.stdout.write(f"{name}: {verdict}")
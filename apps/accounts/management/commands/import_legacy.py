@@ -0,0 +1,77 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts import importer
+
+
+class Command(BaseCommand):
+    help = (
+        "Load users (with their profiles), bank accounts or historical "
+        "transactions from a .csv or .jsonl file (optionally gzipped). Columns "
+        "are named after model fields; profile columns take a 'profile_' "
+        "prefix, accounts name their owner by user_email and transactions "
+        "their accounts by sender_account_number/receiver_account_number. "
+        "Import users, then accounts, then transactions. Re-running the same "
+        "file resumes after the last committed chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(importer.BUILDERS))
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type=int, default=importer.CHUNK_SIZE)
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore an earlier checkpoint."
+        )
+        parser.add_argument(
+            "--rejects",
+            help="Append rejected rows as JSON lines here (default: <path>.rejects).",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        kind = options["kind"]
+        rejects_path = options["rejects"] or f"{path}.rejects"
+
+        started = time.perf_counter()
+        imported = 0
+        checkpoint = None
+        try:
+            with open(rejects_path, "a") as rejects:
+                for checkpoint, rows, seconds in importer.run(
+                    kind,
+                    path,
+                    chunk_size=options["chunk_size"],
+                    restart=options["restart"],
+                    rejects=rejects,
+                ):
+                    imported += rows
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"  {checkpoint.rows_read} rows read, "
+                        f"{checkpoint.rows_rejected} rejected, "
+                        f"{rows / seconds:,.0f} rows/s this chunk, "
+                        f"{imported / elapsed:,.0f} rows/s overall"
+                    )
+        except importer.LegacyImportError as e:
+            raise CommandError(str(e))
+
+        if checkpoint is None:
+            self.stdout.write(
+                f"{path} was already imported; pass --restart to load it again."
+            )
+            return
+        elapsed = time.perf_counter() - started
+        style = self.style.WARNING if checkpoint.rows_rejected else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"{kind}: {checkpoint.rows_imported} imported, "
+                f"{checkpoint.rows_rejected} rejected in {elapsed:.1f}s "
+                f"({imported / elapsed:,.0f} rows/s)"
+            )
+        )
+        if checkpoint.rows_rejected:
+            self.stdout.write(f"Rejected rows are in {rejects_path}")
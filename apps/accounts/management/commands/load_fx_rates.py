@@ -0,0 +1,36 @@
+import csv
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts import fx
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish a new FX rate snapshot from a CSV (base,quote,rate) or JSON "
+        '([{"base": ..., "quote": ..., "rate": ...}]) file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+
+        with path.open(newline="") as f:
+            records = json.load(f) if path.suffix == ".json" else csv.DictReader(f)
+            rows = [(row["base"], row["quote"], row["rate"]) for row in records]
+
+        try:
+            snapshot = fx.publish(rows, source=path.name)
+        except fx.FXError as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Published FX rates v{snapshot.version} with {len(rows)} rates"
+            )
+        )
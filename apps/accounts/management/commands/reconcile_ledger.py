@@ -0,0 +1,106 @@
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.accounts import reconciliation
+from apps.accounts.models import ReconciliationRun
+from apps.accounts.tasks import reconcile_ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Check every account balance against the net of its ledger entries. By "
+        "default the ranges are queued for the Celery workers; --inline runs "
+        "them here. --run resumes or reports on an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--inline", action="store_true", help="Process ranges in this process."
+        )
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--chunk-size", type=int, default=reconciliation.CHUNK_SIZE
+        )
+        parser.add_argument("--run", help="Id of an earlier run to resume.")
+        parser.add_argument("--report", help="Write the discrepancies to this CSV.")
+
+    def handle(self, *args, **options):
+        if options["run"]:
+            try:
+                run = ReconciliationRun.objects.get(pk=options["run"])
+            except (ReconciliationRun.DoesNotExist, ValueError):
+                raise CommandError(f"No reconciliation run {options['run']}")
+        elif not options["inline"]:
+            queued = reconcile_ledger.delay()
+            self.stdout.write(f"Queued reconciliation: {queued.id}")
+            return
+        else:
+            run = reconciliation.plan_run(options["chunk_size"])
+
+        if options["inline"]:
+            self.process_all(run, options["workers"])
+
+        self.print_progress(run)
+        if options["report"]:
+            self.write_report(run, options["report"])
+
+    def process_all(self, run, workers):
+        pending = reconciliation.pending_chunks(run)
+        chunk_ids = list(pending.values_list("pk", flat=True))
+        self.stdout.write(f"Run {run.pk}: {len(chunk_ids)} of {run.chunk_count} ranges")
+
+        started = time.perf_counter()
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.process, chunk_id) for chunk_id in chunk_ids]
+            for future in as_completed(futures):
+                done += 1
+                failed += not future.result()
+                if done % 20 == 0 or done == len(futures):
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"  {done}/{len(futures)} ranges, {elapsed:.1f}s elapsed"
+                    )
+        if failed:
+            self.stderr.write(
+                f"{failed} ranges failed; run again with --run {run.pk} --inline."
+            )
+
+    def process(self, chunk_id):
+        try:
+            reconciliation.reconcile_chunk(chunk_id)
+        except Exception as e:
+            reconciliation.record_failure(chunk_id, e)
+            self.stderr.write(f"Range {chunk_id} failed: {e}")
+            return False
+        finally:
+            close_old_connections()
+        return True
+
+    def print_progress(self, run):
+        stats = reconciliation.progress(run)
+        style = self.style.ERROR if stats["discrepancies"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"{stats['status']}: {stats['chunks_completed']}/"
+                f"{stats['chunk_count']} ranges, {stats['accounts_checked']} accounts, "
+                f"{stats['discrepancies']} discrepancies"
+            )
+        )
+        self.stdout.write(
+            f"{stats['elapsed_seconds']}s elapsed, {stats['accounts_per_second']} "
+            f"accounts/s, {stats['chunk_seconds']}s spent in ranges"
+        )
+
+    def write_report(self, run, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["account_number", "recorded_balance", "ledger_balance", "difference"]
+            )
+            writer.writerows(reconciliation.discrepancy_report(run))
+        self.stdout.write(f"Discrepancy report written to {path}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts import shards
+from apps.accounts.models import BankAccount
+
+
+class Command(BaseCommand):
+    help = (
+        "Spread a hot account's balance over several shard rows so concurrent "
+        "postings stop queueing on its account row."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("account_number")
+        parser.add_argument("--shards", type=int, default=16)
+
+    def handle(self, *args, **options):
+        if options["shards"] < 2:
+            raise CommandError("--shards must be at least 2")
+        try:
+            account = BankAccount.objects.get(account_number=options["account_number"])
+        except BankAccount.DoesNotExist:
+            raise CommandError(f"No account {options['account_number']}")
+
+        try:
+            account = shards.enable(account, options["shards"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{account.account_number} now has {account.shard_count} balance "
+                f"shards holding {shards.balance(account)}"
+            )
+        )
@@ -0,0 +1,163 @@
+import random
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q, Sum
+from django.test.utils import override_settings
+
+from apps.accounts import ledger, services
+from apps.accounts.models import (
+    BalanceCheckpoint,
+    BankAccount,
+    LedgerEntry,
+    Transaction,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a small set of hot accounts with concurrent transfers and verify "
+        "that no balance update is lost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--accounts", type=int, default=4)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--transfers", type=int, default=2000)
+        parser.add_argument("--opening-balance", type=Decimal, default=Decimal("100000.00"))
+        parser.add_argument("--keep", action="store_true", help="Keep the fixture data.")
+
+    def handle(self, *args, **options):
+        run_id = secrets.token_hex(3).upper()
+        opening = options["opening_balance"]
+        # The fixture's emails and monitoring are never published, so the outbox
+        # relay has nothing to send to the stress-* addresses or to score.
+        with override_settings(OUTBOX_PUBLISH=False):
+            accounts = self.create_fixture(run_id, options["accounts"], opening)
+        account_ids = [account.pk for account in accounts]
+
+        def worker(count):
+            rng = random.Random()
+            ok = rejected = 0
+            try:
+                for _ in range(count):
+                    sender, receiver = rng.sample(accounts, 2)
+                    amount = Decimal(rng.randint(1, 5000)) / 100
+                    try:
+                        services.transfer(sender, receiver, amount)
+                        ok += 1
+                    except services.InsufficientFundsError:
+                        rejected += 1
+            finally:
+                connection.close()
+            return ok, rejected
+
+        threads = options["threads"]
+        per_thread = max(options["transfers"] // threads, 1)
+
+        with override_settings(OUTBOX_PUBLISH=False):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                futures = [executor.submit(worker, per_thread) for _ in range(threads)]
+                outcomes = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+
+        try:
+            self.verify(account_ids, opening)
+        finally:
+            if not options["keep"]:
+                self.cleanup(account_ids)
+
+        ok = sum(outcome[0] for outcome in outcomes)
+        rejected = sum(outcome[1] for outcome in outcomes)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{ok} transfers ({rejected} rejected for "
+                f"insufficient funds) across {len(accounts)} accounts on {threads} "
+                f"threads in {elapsed:.2f}s "
+                f"({(ok + rejected) / elapsed:.0f}/s). "
+                f"Balances are consistent."
+            )
+        )
+
+    def create_fixture(self, run_id, count, opening):
+        accounts = []
+        for i in range(count):
+            user = User(
+                username=f"ST{run_id}{i:04d}",
+                email=f"stress-{run_id.lower()}-{i}@example.com",
+                first_name="Stress",
+                last_name=f"Tester {i}",
+                id_no=random.randint(10**9, 4 * 10**9),
+                security_question=User.SecurityQuestions.FAVORITE_COLOR,
+                security_answer="blue",
+            )
+            user.set_unusable_password()
+            user.save()
+            account = BankAccount.objects.create(
+                user=user,
+                account_number=f"ST{run_id}{i:010d}",
+                currency=BankAccount.AccountCurrency.NAIRA,
+                account_type=BankAccount.AccountType.CURRENT,
+                account_status=BankAccount.AccountStatus.ACTIVE,
+            )
+            services.deposit(account, opening)
+            accounts.append(account)
+        return accounts
+
+    def verify(self, account_ids, opening):
+        completed = Transaction.objects.filter(
+            status=Transaction.TransactionStatus.COMPLETED,
+            transaction_type=Transaction.TransactionType.TRANSFER,
+        )
+        sent = dict(
+            completed.filter(sender_account__in=account_ids)
+            .values_list("sender_account")
+            .annotate(total=Sum("amount"))
+        )
+        received = dict(
+            completed.filter(receiver_account__in=account_ids)
+            .values_list("receiver_account")
+            .annotate(total=Sum("amount"))
+        )
+
+        balances = dict(
+            BankAccount.objects.filter(pk__in=account_ids).values_list(
+                "pk", "account_balance"
+            )
+        )
+        for pk, balance in balances.items():
+            expected = (opening - sent.get(pk, 0) + received.get(pk, 0)).quantize(
+                Decimal("0.01")
+            )
+            if balance != expected or balance != ledger.balance_at(pk):
+                raise CommandError(
+                    f"Account {pk} has balance {balance}, expected {expected} "
+                    f"(ledger: {ledger.balance_at(pk)})"
+                )
+            if balance < 0:
+                raise CommandError(f"Account {pk} went negative: {balance}")
+
+        total = sum(balances.values())
+        if total != opening * len(account_ids):
+            raise CommandError(
+                f"Money was created or destroyed: total is {total}, expected "
+                f"{opening * len(account_ids)}"
+            )
+
+    def cleanup(self, account_ids):
+        transactions = Transaction.objects.filter(
+            Q(sender_account__in=account_ids) | Q(receiver_account__in=account_ids)
+        )
+        BalanceCheckpoint.objects.filter(account__in=account_ids).delete()
+        # Legs go before their transactions, which they protect.
+        LedgerEntry.objects.filter(transaction__in=transactions).delete()
+        transactions.delete()
+        User.objects.filter(bank_accounts__in=account_ids).delete()
@@ -0,0 +1,158 @@
+# Generated by Django 5.2 on 2026-10-18 19:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def open_checkpoints(apps, schema_editor):
+    # Balances that predate the ledger have no entries behind them, so each
+    # existing account starts from an opening checkpoint.
+    BankAccount = apps.get_model("accounts", "BankAccount")
+    BalanceCheckpoint = apps.get_model("accounts", "BalanceCheckpoint")
+    now = timezone.now()
+    BalanceCheckpoint.objects.bulk_create(
+        [
+            BalanceCheckpoint(account_id=pk, balance=balance, as_of=now)
+            for pk, balance in BankAccount.objects.values_list(
+                "pk", "account_balance"
+            ).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bankaccount",
+            name="entries_since_checkpoint",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="Ledger Entries Since Checkpoint",
+            ),
+        ),
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "ledger_account",
+                    models.CharField(
+                        choices=[
+                            ("customer", "Customer Account"),
+                            ("cash", "Teller Cash"),
+                            ("interest_expense", "Interest Expense"),
+                        ],
+                        default="customer",
+                        max_length=20,
+                        verbose_name="Ledger Account",
+                    ),
+                ),
+                (
+                    "entry_type",
+                    models.CharField(
+                        choices=[("debit", "Debit"), ("credit", "Credit")],
+                        max_length=6,
+                        verbose_name="Entry Type",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=12, verbose_name="Amount"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, editable=False
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_entries",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="entries",
+                        to="accounts.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ledger Entry",
+                "verbose_name_plural": "Ledger Entries",
+            },
+        ),
+        migrations.CreateModel(
+            name="BalanceCheckpoint",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=12, verbose_name="Balance"
+                    ),
+                ),
+                ("as_of", models.DateTimeField(verbose_name="As Of")),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_checkpoints",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+                (
+                    "entry",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Last ledger entry included in the balance.",
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="accounts.ledgerentry",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Balance Checkpoint",
+                "verbose_name_plural": "Balance Checkpoints",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(
+                fields=["account", "id"], name="accounts_le_account_cd4a86_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(
+                fields=["account", "created_at"], name="accounts_le_account_a66391_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="balancecheckpoint",
+            index=models.Index(
+                fields=["account", "as_of"], name="accounts_ba_account_f0fc32_idx"
+            ),
+        ),
+        migrations.RunPython(open_checkpoints, migrations.RunPython.noop),
+    ]
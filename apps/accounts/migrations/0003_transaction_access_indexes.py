@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2026-10-18 19:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_ledger"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transaction",
+            name="receiver_account",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="received_transactions",
+                to="accounts.bankaccount",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="sender_account",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="sent_transactions",
+                to="accounts.bankaccount",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["sender_account", "-created_at", "-id"],
+                name="txn_sender_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["receiver_account", "-created_at", "-id"],
+                name="txn_receiver_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["sender_account", "created_at"],
+                name="txn_sender_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["receiver_account", "created_at"],
+                name="txn_receiver_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2 on 2026-10-18 19:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_transaction_access_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=50, unique=True, verbose_name="Name"),
+                ),
+                (
+                    "last_entry_id",
+                    models.BigIntegerField(default=0, verbose_name="Last Ledger Entry"),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Rollup Watermark",
+                "verbose_name_plural": "Rollup Watermarks",
+            },
+        ),
+        migrations.CreateModel(
+            name="AccountBalanceSnapshot",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("date", models.DateField(verbose_name="Date")),
+                (
+                    "opening_balance",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=12, verbose_name="Opening Balance"
+                    ),
+                ),
+                (
+                    "closing_balance",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=12, verbose_name="Closing Balance"
+                    ),
+                ),
+                (
+                    "total_credits",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="Total Credits",
+                    ),
+                ),
+                (
+                    "total_debits",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="Total Debits",
+                    ),
+                ),
+                (
+                    "entry_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Entry Count"),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_snapshots",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Account Balance Snapshot",
+                "verbose_name_plural": "Account Balance Snapshots",
+                "ordering": ["-date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "date"), name="unique_account_snapshot_date"
+                    )
+                ],
+            },
+        ),
+    ]
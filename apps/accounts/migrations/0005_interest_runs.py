@@ -0,0 +1,146 @@
+# Generated by Django 5.2 on 2026-10-18 19:59
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_balance_snapshots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InterestRun",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "accrual_date",
+                    models.DateField(unique=True, verbose_name="Accrual Date"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("running", "Running"), ("completed", "Completed")],
+                        default="running",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "chunk_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Chunk Count"),
+                ),
+                (
+                    "accounts_credited",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Credited"
+                    ),
+                ),
+                (
+                    "total_interest",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=16,
+                        verbose_name="Total Interest",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Interest Run",
+                "verbose_name_plural": "Interest Runs",
+                "ordering": ["-accrual_date"],
+            },
+        ),
+        migrations.CreateModel(
+            name="InterestRunChunk",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "start_account_id",
+                    models.UUIDField(
+                        blank=True, null=True, verbose_name="First Account"
+                    ),
+                ),
+                (
+                    "end_account_id",
+                    models.UUIDField(blank=True, null=True, verbose_name="End Account"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Attempts"
+                    ),
+                ),
+                (
+                    "accounts_credited",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Credited"
+                    ),
+                ),
+                (
+                    "total_interest",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=16,
+                        verbose_name="Total Interest",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Last Error")),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="accounts.interestrun",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Interest Run Chunk",
+                "verbose_name_plural": "Interest Run Chunks",
+                "indexes": [
+                    models.Index(
+                        fields=["run", "status"], name="accounts_in_run_id_f1ccf8_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_interest_runs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailableAccountNumber",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "number",
+                    models.CharField(
+                        max_length=20, unique=True, verbose_name="Account Number"
+                    ),
+                ),
+                (
+                    "currency",
+                    models.CharField(
+                        choices=[
+                            ("us_dollar", "US Dollar"),
+                            ("pound_sterling", "Pound Sterling"),
+                            ("naira", "Naira"),
+                        ],
+                        max_length=20,
+                        verbose_name="Currency",
+                    ),
+                ),
+                ("prefix", models.CharField(max_length=16, verbose_name="Prefix")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Available Account Number",
+                "verbose_name_plural": "Available Account Numbers",
+                "indexes": [
+                    models.Index(
+                        fields=["prefix", "id"], name="accounts_av_prefix_215b06_idx"
+                    )
+                ],
+            },
+        ),
+    ]
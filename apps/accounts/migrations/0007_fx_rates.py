@@ -0,0 +1,225 @@
+# Generated by Django 5.2 on 2026-10-18 20:06
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_account_number_pool"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ledgerentry",
+            name="ledger_account",
+            field=models.CharField(
+                choices=[
+                    ("customer", "Customer Account"),
+                    ("cash", "Teller Cash"),
+                    ("interest_expense", "Interest Expense"),
+                    ("fx_settlement", "FX Settlement"),
+                ],
+                default="customer",
+                max_length=20,
+                verbose_name="Ledger Account",
+            ),
+        ),
+        migrations.CreateModel(
+            name="FXRateSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "version",
+                    models.PositiveIntegerField(unique=True, verbose_name="Version"),
+                ),
+                (
+                    "source",
+                    models.CharField(blank=True, max_length=100, verbose_name="Source"),
+                ),
+                (
+                    "published_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "FX Rate Snapshot",
+                "verbose_name_plural": "FX Rate Snapshots",
+                "ordering": ["-version"],
+            },
+        ),
+        migrations.CreateModel(
+            name="FXQuote",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "source_amount",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=12, verbose_name="Source Amount"
+                    ),
+                ),
+                (
+                    "source_currency",
+                    models.CharField(
+                        choices=[
+                            ("us_dollar", "US Dollar"),
+                            ("pound_sterling", "Pound Sterling"),
+                            ("naira", "Naira"),
+                        ],
+                        max_length=20,
+                        verbose_name="Source Currency",
+                    ),
+                ),
+                (
+                    "target_amount",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=12, verbose_name="Target Amount"
+                    ),
+                ),
+                (
+                    "target_currency",
+                    models.CharField(
+                        choices=[
+                            ("us_dollar", "US Dollar"),
+                            ("pound_sterling", "Pound Sterling"),
+                            ("naira", "Naira"),
+                        ],
+                        max_length=20,
+                        verbose_name="Target Currency",
+                    ),
+                ),
+                (
+                    "rate",
+                    models.DecimalField(
+                        decimal_places=8, max_digits=18, verbose_name="Rate"
+                    ),
+                ),
+                ("expires_at", models.DateTimeField(verbose_name="Expires At")),
+                (
+                    "receiver_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+                (
+                    "sender_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="fx_quote",
+                        to="accounts.transaction",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fx_quotes",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "snapshot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="quotes",
+                        to="accounts.fxratesnapshot",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "FX Quote",
+                "verbose_name_plural": "FX Quotes",
+            },
+        ),
+        migrations.CreateModel(
+            name="FXRate",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "base_currency",
+                    models.CharField(
+                        choices=[
+                            ("us_dollar", "US Dollar"),
+                            ("pound_sterling", "Pound Sterling"),
+                            ("naira", "Naira"),
+                        ],
+                        max_length=20,
+                        verbose_name="Base Currency",
+                    ),
+                ),
+                (
+                    "quote_currency",
+                    models.CharField(
+                        choices=[
+                            ("us_dollar", "US Dollar"),
+                            ("pound_sterling", "Pound Sterling"),
+                            ("naira", "Naira"),
+                        ],
+                        max_length=20,
+                        verbose_name="Quote Currency",
+                    ),
+                ),
+                (
+                    "rate",
+                    models.DecimalField(
+                        decimal_places=8, max_digits=18, verbose_name="Rate"
+                    ),
+                ),
+                (
+                    "snapshot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rates",
+                        to="accounts.fxratesnapshot",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "FX Rate",
+                "verbose_name_plural": "FX Rates",
+                "unique_together": {("snapshot", "base_currency", "quote_currency")},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 20:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_fx_rates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bankaccount",
+            name="shard_count",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, verbose_name="Balance Shards"
+            ),
+        ),
+        migrations.CreateModel(
+            name="BalanceShard",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("shard_no", models.PositiveSmallIntegerField(verbose_name="Shard")),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Balance",
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_shards",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Balance Shard",
+                "verbose_name_plural": "Balance Shards",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "shard_no"), name="unique_account_shard"
+                    )
+                ],
+            },
+        ),
+    ]
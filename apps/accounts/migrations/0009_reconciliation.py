@@ -0,0 +1,203 @@
+# Generated by Django 5.2 on 2026-10-18 20:15
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_balance_shards"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReconciliationRun",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("running", "Running"), ("completed", "Completed")],
+                        default="running",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "chunk_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Chunk Count"),
+                ),
+                (
+                    "chunks_completed",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Chunks Completed"
+                    ),
+                ),
+                (
+                    "accounts_checked",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Checked"
+                    ),
+                ),
+                (
+                    "discrepancy_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Discrepancies"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Finished At"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Reconciliation Run",
+                "verbose_name_plural": "Reconciliation Runs",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ReconciliationDiscrepancy",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "recorded_balance",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=12, verbose_name="Recorded Balance"
+                    ),
+                ),
+                (
+                    "ledger_balance",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=14, verbose_name="Ledger Balance"
+                    ),
+                ),
+                (
+                    "difference",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=14, verbose_name="Difference"
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="discrepancies",
+                        to="accounts.reconciliationrun",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Reconciliation Discrepancy",
+                "verbose_name_plural": "Reconciliation Discrepancies",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("run", "account"), name="unique_run_discrepancy"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ReconciliationChunk",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "start_account_id",
+                    models.UUIDField(
+                        blank=True, null=True, verbose_name="First Account"
+                    ),
+                ),
+                (
+                    "end_account_id",
+                    models.UUIDField(blank=True, null=True, verbose_name="End Account"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Attempts"
+                    ),
+                ),
+                (
+                    "accounts_checked",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Checked"
+                    ),
+                ),
+                (
+                    "discrepancy_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Discrepancies"
+                    ),
+                ),
+                (
+                    "duration_ms",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Duration (ms)"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Last Error")),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="accounts.reconciliationrun",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Reconciliation Chunk",
+                "verbose_name_plural": "Reconciliation Chunks",
+                "indexes": [
+                    models.Index(
+                        fields=["run", "status"], name="accounts_re_run_id_8320c8_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,169 @@
+# Generated by Django 5.2 on 2026-10-18 20:19
+
+import re
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+TABLE = "accounts_transaction"
+OLD_TABLE = "accounts_transaction_unpartitioned"
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    # Months are cut at local midnight, matching apps.accounts.partitions.
+    tz = ZoneInfo(settings.TIME_ZONE)
+    return datetime.combine(month, time.min, tzinfo=tz).isoformat()
+
+
+def _indexes_and_foreign_keys(cursor):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [TABLE],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+        "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass "
+        "AND contype = 'p')",
+        [TABLE, TABLE],
+    )
+    return [row[0] for row in cursor.fetchall()], foreign_keys
+
+
+def partition_transactions(apps, schema_editor):
+    # Rebuilds the transaction table as monthly range partitions on created_at.
+    # Other databases keep the plain table.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _indexes_and_foreign_keys(cursor)
+        cursor.execute(f"SELECT min(created_at) FROM {TABLE}")
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS "
+            "INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)"
+        )
+        # A partitioned table's primary key must contain the partition key.
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)")
+
+        tz = ZoneInfo(settings.TIME_ZONE)
+        this_month = datetime.now(tz).date().replace(day=1)
+        month = oldest.astimezone(tz).date().replace(day=1) if oldest else this_month
+        while month <= _add_months(this_month, MONTHS_AHEAD):
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{_bound(month)}') "
+                f"TO ('{_bound(_add_months(month, 1))}')"
+            )
+            month = _add_months(month, 1)
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}")
+        cursor.execute(f"DROP TABLE {OLD_TABLE}")
+
+        for indexdef in indexes:
+            cursor.execute(
+                re.sub(r" ON (ONLY )?\S+ ", f" ON {TABLE} ", indexdef, count=1)
+            )
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+
+
+def unpartition_transactions(apps, schema_editor):
+    # Folds the partitions back into one plain table keyed by id. Months that
+    # were archived stay in their archive files.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _indexes_and_foreign_keys(cursor)
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS "
+            "INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}")
+        # Dropping the partitioned table drops its partitions too.
+        cursor.execute(f"DROP TABLE {OLD_TABLE}")
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id)")
+
+        for indexdef in indexes:
+            cursor.execute(
+                re.sub(r" ON (ONLY )?\S+ ", f" ON {TABLE} ", indexdef, count=1)
+            )
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0009_reconciliation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransactionArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(unique=True, verbose_name="Month")),
+                ("path", models.CharField(max_length=500, verbose_name="Path")),
+                (
+                    "row_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Rows"),
+                ),
+                (
+                    "archived_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Archived At"),
+                ),
+            ],
+            options={
+                "verbose_name": "Transaction Archive",
+                "verbose_name_plural": "Transaction Archives",
+                "ordering": ["month"],
+            },
+        ),
+        migrations.AlterField(
+            model_name="fxquote",
+            name="transaction",
+            field=models.OneToOneField(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="fx_quote",
+                to="accounts.transaction",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ledgerentry",
+            name="transaction",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="entries",
+                to="accounts.transaction",
+            ),
+        ),
+        migrations.RunPython(partition_transactions, unpartition_transactions),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0010_transaction_partitions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=20, verbose_name="Kind")),
+                ("source", models.CharField(max_length=500, verbose_name="Source")),
+                (
+                    "rows_read",
+                    models.PositiveBigIntegerField(default=0, verbose_name="Rows Read"),
+                ),
+                (
+                    "rows_imported",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Rows Imported"
+                    ),
+                ),
+                (
+                    "rows_rejected",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Rows Rejected"
+                    ),
+                ),
+                (
+                    "completed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Completed At"
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Import Checkpoint",
+                "verbose_name_plural": "Import Checkpoints",
+                "unique_together": {("kind", "source")},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 20:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0011_import_checkpoint"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="txn_sender_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="txn_receiver_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=[
+                    "sender_account",
+                    "-created_at",
+                    "-id",
+                    "transaction_type",
+                    "status",
+                    "amount",
+                ],
+                name="txn_sender_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=[
+                    "receiver_account",
+                    "-created_at",
+                    "-id",
+                    "transaction_type",
+                    "status",
+                    "amount",
+                ],
+                name="txn_receiver_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["transaction_type", "-created_at", "-id", "status", "amount"],
+                name="txn_type_search_idx",
+            ),
+        ),
+    ]
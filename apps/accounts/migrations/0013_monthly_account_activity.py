@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2026-10-18 20:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0012_transaction_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyAccountActivity",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("month", models.DateField(verbose_name="Month")),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Deposit"),
+                            ("withdrawal", "Withdrawal"),
+                            ("transfer", "Transfer"),
+                            ("interest", "Interest"),
+                        ],
+                        max_length=20,
+                        verbose_name="Transaction Type",
+                    ),
+                ),
+                (
+                    "direction",
+                    models.CharField(
+                        choices=[("inflow", "Inflow"), ("outflow", "Outflow")],
+                        max_length=7,
+                        verbose_name="Direction",
+                    ),
+                ),
+                (
+                    "total",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=16, verbose_name="Total"
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="Count")),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="monthly_activity",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Monthly Account Activity",
+                "verbose_name_plural": "Monthly Account Activity",
+                "ordering": ["-month"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "month", "transaction_type", "direction"),
+                        name="unique_monthly_account_activity",
+                    )
+                ],
+            },
+        ),
+    ]
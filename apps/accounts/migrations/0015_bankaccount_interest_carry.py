@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0014_scheduled_transfer"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bankaccount",
+            name="interest_carry",
+            field=models.PositiveBigIntegerField(
+                default=0, editable=False, verbose_name="Interest Carry"
+            ),
+        ),
+    ]
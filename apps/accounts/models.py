@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from apps.common.models import TimeStampedModel
@@ -46,7 +47,19 @@ class BankAccount(TimeStampedModel):
         max_length=20,
         choices=AccountType.choices,
     )
-
+    entries_since_checkpoint = models.PositiveIntegerField(
+        _("Ledger Entries Since Checkpoint"), default=0, editable=False
+    )
+    # Above zero, money moves through this many BalanceShard rows and
+    # account_balance is their sum as of the last consolidation.
+    shard_count = models.PositiveSmallIntegerField(
+        _("Balance Shards"), default=0, editable=False
+    )
+    # Daily interest below one minor unit, kept in units of 1/(10_000 * 365) of
+    # a minor unit and added to the next day's accrual.
+    interest_carry = models.PositiveBigIntegerField(
+        _("Interest Carry"), default=0, editable=False
+    )
 
     def __str__(self) -> str:
         return (
@@ -95,17 +108,21 @@ class Transaction(TimeStampedModel):
         User, on_delete=models.SET_NULL, null=True, related_name="sent_transactions"
     )
 
+    # Both account columns lead composite indexes in Meta, so the default
+    # single-column FK indexes would only add write cost.
     receiver_account = models.ForeignKey(
         BankAccount,
         on_delete=models.SET_NULL,
         null=True,
         related_name="received_transactions",
+        db_index=False,
     )
     sender_account = models.ForeignKey(
         BankAccount,
         on_delete=models.SET_NULL,
         null=True,
         related_name="sent_transactions",
+        db_index=False,
     )
     status = models.CharField(
         choices=TransactionStatus.choices,
@@ -119,4 +136,601 @@ class Transaction(TimeStampedModel):
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["created_at"])]
\ No newline at end of file
+        indexes = [
+            models.Index(fields=["created_at"]),
+            # History pages walk the leading columns; transaction search also
+            # filters on the trailing ones without leaving the index.
+            models.Index(
+                fields=[
+                    "sender_account",
+                    "-created_at",
+                    "-id",
+                    "transaction_type",
+                    "status",
+                    "amount",
+                ],
+                name="txn_sender_search_idx",
+            ),
+            models.Index(
+                fields=[
+                    "receiver_account",
+                    "-created_at",
+                    "-id",
+                    "transaction_type",
+                    "status",
+                    "amount",
+                ],
+                name="txn_receiver_search_idx",
+            ),
+            models.Index(
+                fields=["transaction_type", "-created_at", "-id", "status", "amount"],
+                name="txn_type_search_idx",
+            ),
+            models.Index(
+                fields=["sender_account", "created_at"],
+                condition=models.Q(status="pending"),
+                name="txn_sender_pending_idx",
+            ),
+            models.Index(
+                fields=["receiver_account", "created_at"],
+                condition=models.Q(status="pending"),
+                name="txn_receiver_pending_idx",
+            ),
+        ]
+
+
+class LedgerEntry(models.Model):
+    class EntryType(models.TextChoices):
+        DEBIT = ("debit", _("Debit"))
+        CREDIT = ("credit", _("Credit"))
+
+    class LedgerAccount(models.TextChoices):
+        CUSTOMER = ("customer", _("Customer Account"))
+        CASH = ("cash", _("Teller Cash"))
+        INTEREST_EXPENSE = ("interest_expense", _("Interest Expense"))
+        FX_SETTLEMENT = ("fx_settlement", _("FX Settlement"))
+
+    # A sequential key keeps entries for one account in posting order, which
+    # is what checkpoints point at.
+    id = models.BigAutoField(primary_key=True)
+    # No database constraint: on PostgreSQL transactions live in monthly
+    # partitions keyed by (id, created_at), and archived months are dropped
+    # while their ledger legs stay.
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.PROTECT,
+        related_name="entries",
+        db_constraint=False,
+    )
+    account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+    )
+    ledger_account = models.CharField(
+        _("Ledger Account"),
+        max_length=20,
+        choices=LedgerAccount.choices,
+        default=LedgerAccount.CUSTOMER,
+    )
+    entry_type = models.CharField(
+        _("Entry Type"), max_length=6, choices=EntryType.choices
+    )
+    amount = models.DecimalField(_("Amount"), decimal_places=2, max_digits=12)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        verbose_name = _("Ledger Entry")
+        verbose_name_plural = _("Ledger Entries")
+        indexes = [
+            models.Index(fields=["account", "id"]),
+            models.Index(fields=["account", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.entry_type} {self.amount} - {self.ledger_account}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError(_("Ledger entries are append-only."))
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError(_("Ledger entries are append-only."))
+
+
+class BalanceShard(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="balance_shards"
+    )
+    shard_no = models.PositiveSmallIntegerField(_("Shard"))
+    balance = models.DecimalField(
+        _("Balance"), decimal_places=2, max_digits=12, default=0
+    )
+
+    class Meta:
+        verbose_name = _("Balance Shard")
+        verbose_name_plural = _("Balance Shards")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "shard_no"], name="unique_account_shard"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.account_id} #{self.shard_no}: {self.balance}"
+
+
+class BalanceCheckpoint(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="balance_checkpoints"
+    )
+    entry = models.ForeignKey(
+        LedgerEntry,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text=_("Last ledger entry included in the balance."),
+    )
+    balance = models.DecimalField(_("Balance"), decimal_places=2, max_digits=12)
+    as_of = models.DateTimeField(_("As Of"))
+
+    class Meta:
+        verbose_name = _("Balance Checkpoint")
+        verbose_name_plural = _("Balance Checkpoints")
+        indexes = [models.Index(fields=["account", "as_of"])]
+
+    def __str__(self) -> str:
+        return f"{self.account_id} - {self.balance} as of {self.as_of}"
+
+
+class AccountBalanceSnapshot(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="balance_snapshots"
+    )
+    date = models.DateField(_("Date"))
+    opening_balance = models.DecimalField(
+        _("Opening Balance"), decimal_places=2, max_digits=12
+    )
+    closing_balance = models.DecimalField(
+        _("Closing Balance"), decimal_places=2, max_digits=12
+    )
+    total_credits = models.DecimalField(
+        _("Total Credits"), decimal_places=2, max_digits=14, default=0
+    )
+    total_debits = models.DecimalField(
+        _("Total Debits"), decimal_places=2, max_digits=14, default=0
+    )
+    entry_count = models.PositiveIntegerField(_("Entry Count"), default=0)
+
+    class Meta:
+        verbose_name = _("Account Balance Snapshot")
+        verbose_name_plural = _("Account Balance Snapshots")
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "date"], name="unique_account_snapshot_date"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.account_id} - {self.date}: {self.closing_balance}"
+
+
+class MonthlyAccountActivity(models.Model):
+    class Direction(models.TextChoices):
+        INFLOW = ("inflow", _("Inflow"))
+        OUTFLOW = ("outflow", _("Outflow"))
+
+    id = models.BigAutoField(primary_key=True)
+    account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="monthly_activity"
+    )
+    month = models.DateField(_("Month"))
+    transaction_type = models.CharField(
+        _("Transaction Type"),
+        max_length=20,
+        choices=Transaction.TransactionType.choices,
+    )
+    direction = models.CharField(
+        _("Direction"), max_length=7, choices=Direction.choices
+    )
+    total = models.DecimalField(_("Total"), decimal_places=2, max_digits=16, default=0)
+    count = models.PositiveIntegerField(_("Count"), default=0)
+
+    class Meta:
+        verbose_name = _("Monthly Account Activity")
+        verbose_name_plural = _("Monthly Account Activity")
+        ordering = ["-month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "month", "transaction_type", "direction"],
+                name="unique_monthly_account_activity",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.account_id} {self.month:%Y-%m} {self.transaction_type} "
+            f"{self.direction}: {self.total}"
+        )
+
+
+class RollupWatermark(models.Model):
+    name = models.CharField(_("Name"), max_length=50, unique=True)
+    last_entry_id = models.BigIntegerField(_("Last Ledger Entry"), default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Rollup Watermark")
+        verbose_name_plural = _("Rollup Watermarks")
+
+    def __str__(self) -> str:
+        return f"{self.name} at entry {self.last_entry_id}"
+
+
+class InterestRun(TimeStampedModel):
+    class RunStatus(models.TextChoices):
+        RUNNING = ("running", _("Running"))
+        COMPLETED = ("completed", _("Completed"))
+
+    accrual_date = models.DateField(_("Accrual Date"), unique=True)
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=RunStatus.choices,
+        default=RunStatus.RUNNING,
+    )
+    chunk_count = models.PositiveIntegerField(_("Chunk Count"), default=0)
+    accounts_credited = models.PositiveIntegerField(_("Accounts Credited"), default=0)
+    total_interest = models.DecimalField(
+        _("Total Interest"), decimal_places=2, max_digits=16, default=0
+    )
+
+    class Meta:
+        verbose_name = _("Interest Run")
+        verbose_name_plural = _("Interest Runs")
+        ordering = ["-accrual_date"]
+
+    def __str__(self) -> str:
+        return f"Interest for {self.accrual_date} - {self.status}"
+
+
+class InterestRunChunk(TimeStampedModel):
+    class ChunkStatus(models.TextChoices):
+        PENDING = ("pending", _("Pending"))
+        COMPLETED = ("completed", _("Completed"))
+        FAILED = ("failed", _("Failed"))
+
+    run = models.ForeignKey(
+        InterestRun, on_delete=models.CASCADE, related_name="chunks"
+    )
+    # Accounts with start_account_id <= pk < end_account_id; a null bound is open.
+    start_account_id = models.UUIDField(_("First Account"), null=True, blank=True)
+    end_account_id = models.UUIDField(_("End Account"), null=True, blank=True)
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=ChunkStatus.choices,
+        default=ChunkStatus.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    accounts_credited = models.PositiveIntegerField(_("Accounts Credited"), default=0)
+    total_interest = models.DecimalField(
+        _("Total Interest"), decimal_places=2, max_digits=16, default=0
+    )
+    error = models.TextField(_("Last Error"), blank=True)
+
+    class Meta:
+        verbose_name = _("Interest Run Chunk")
+        verbose_name_plural = _("Interest Run Chunks")
+        indexes = [models.Index(fields=["run", "status"])]
+
+    def __str__(self) -> str:
+        return f"{self.run.accrual_date} [{self.start_account_id}, ...) - {self.status}"
+
+
+class AvailableAccountNumber(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    number = models.CharField(_("Account Number"), max_length=20, unique=True)
+    currency = models.CharField(
+        _("Currency"), max_length=20, choices=BankAccount.AccountCurrency.choices
+    )
+    prefix = models.CharField(_("Prefix"), max_length=16)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Available Account Number")
+        verbose_name_plural = _("Available Account Numbers")
+        indexes = [models.Index(fields=["prefix", "id"])]
+
+    def __str__(self) -> str:
+        return self.number
+
+
+class FXRateSnapshot(TimeStampedModel):
+    # Snapshots are never edited; a rate change is published as a new version.
+    version = models.PositiveIntegerField(_("Version"), unique=True)
+    source = models.CharField(_("Source"), max_length=100, blank=True)
+    published_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    class Meta:
+        verbose_name = _("FX Rate Snapshot")
+        verbose_name_plural = _("FX Rate Snapshots")
+        ordering = ["-version"]
+
+    def __str__(self) -> str:
+        return f"FX rates v{self.version}"
+
+
+class FXRate(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    snapshot = models.ForeignKey(
+        FXRateSnapshot, on_delete=models.CASCADE, related_name="rates"
+    )
+    base_currency = models.CharField(
+        _("Base Currency"), max_length=20, choices=BankAccount.AccountCurrency.choices
+    )
+    quote_currency = models.CharField(
+        _("Quote Currency"),
+        max_length=20,
+        choices=BankAccount.AccountCurrency.choices,
+    )
+    # Units of quote currency per one unit of base currency.
+    rate = models.DecimalField(_("Rate"), max_digits=18, decimal_places=8)
+
+    class Meta:
+        verbose_name = _("FX Rate")
+        verbose_name_plural = _("FX Rates")
+        unique_together = ["snapshot", "base_currency", "quote_currency"]
+
+    def __str__(self) -> str:
+        return f"{self.base_currency}/{self.quote_currency} {self.rate}"
+
+
+class FXQuote(TimeStampedModel):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="fx_quotes")
+    snapshot = models.ForeignKey(
+        FXRateSnapshot, on_delete=models.PROTECT, related_name="quotes"
+    )
+    sender_account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="+"
+    )
+    receiver_account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="+"
+    )
+    source_amount = models.DecimalField(
+        _("Source Amount"), decimal_places=2, max_digits=12
+    )
+    source_currency = models.CharField(
+        _("Source Currency"),
+        max_length=20,
+        choices=BankAccount.AccountCurrency.choices,
+    )
+    target_amount = models.DecimalField(
+        _("Target Amount"), decimal_places=2, max_digits=12
+    )
+    target_currency = models.CharField(
+        _("Target Currency"),
+        max_length=20,
+        choices=BankAccount.AccountCurrency.choices,
+    )
+    rate = models.DecimalField(_("Rate"), max_digits=18, decimal_places=8)
+    expires_at = models.DateTimeField(_("Expires At"))
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="fx_quote",
+        db_constraint=False,
+    )
+
+    class Meta:
+        verbose_name = _("FX Quote")
+        verbose_name_plural = _("FX Quotes")
+
+    def __str__(self) -> str:
+        return (
+            f"{self.source_amount} {self.source_currency} -> "
+            f"{self.target_amount} {self.target_currency}"
+        )
+
+
+class ReconciliationRun(TimeStampedModel):
+    class RunStatus(models.TextChoices):
+        RUNNING = ("running", _("Running"))
+        COMPLETED = ("completed", _("Completed"))
+
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=RunStatus.choices,
+        default=RunStatus.RUNNING,
+    )
+    chunk_count = models.PositiveIntegerField(_("Chunk Count"), default=0)
+    chunks_completed = models.PositiveIntegerField(_("Chunks Completed"), default=0)
+    accounts_checked = models.PositiveIntegerField(_("Accounts Checked"), default=0)
+    discrepancy_count = models.PositiveIntegerField(_("Discrepancies"), default=0)
+    finished_at = models.DateTimeField(_("Finished At"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Reconciliation Run")
+        verbose_name_plural = _("Reconciliation Runs")
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"Reconciliation of {self.created_at:%Y-%m-%d %H:%M} - {self.status}"
+
+
+class ReconciliationChunk(TimeStampedModel):
+    class ChunkStatus(models.TextChoices):
+        PENDING = ("pending", _("Pending"))
+        COMPLETED = ("completed", _("Completed"))
+        FAILED = ("failed", _("Failed"))
+
+    run = models.ForeignKey(
+        ReconciliationRun, on_delete=models.CASCADE, related_name="chunks"
+    )
+    # Accounts with start_account_id <= pk < end_account_id; a null bound is open.
+    start_account_id = models.UUIDField(_("First Account"), null=True, blank=True)
+    end_account_id = models.UUIDField(_("End Account"), null=True, blank=True)
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=ChunkStatus.choices,
+        default=ChunkStatus.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    accounts_checked = models.PositiveIntegerField(_("Accounts Checked"), default=0)
+    discrepancy_count = models.PositiveIntegerField(_("Discrepancies"), default=0)
+    duration_ms = models.PositiveIntegerField(_("Duration (ms)"), default=0)
+    error = models.TextField(_("Last Error"), blank=True)
+
+    class Meta:
+        verbose_name = _("Reconciliation Chunk")
+        verbose_name_plural = _("Reconciliation Chunks")
+        indexes = [models.Index(fields=["run", "status"])]
+
+    def __str__(self) -> str:
+        return f"{self.run_id} [{self.start_account_id}, ...) - {self.status}"
+
+
+class ReconciliationDiscrepancy(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    run = models.ForeignKey(
+        ReconciliationRun, on_delete=models.CASCADE, related_name="discrepancies"
+    )
+    account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="+"
+    )
+    recorded_balance = models.DecimalField(
+        _("Recorded Balance"), decimal_places=2, max_digits=12
+    )
+    ledger_balance = models.DecimalField(
+        _("Ledger Balance"), decimal_places=2, max_digits=14
+    )
+    difference = models.DecimalField(_("Difference"), decimal_places=2, max_digits=14)
+
+    class Meta:
+        verbose_name = _("Reconciliation Discrepancy")
+        verbose_name_plural = _("Reconciliation Discrepancies")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["run", "account"], name="unique_run_discrepancy"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.account_id}: {self.recorded_balance} vs {self.ledger_balance}"
+
+
+class TransactionArchive(models.Model):
+    month = models.DateField(_("Month"), unique=True)
+    path = models.CharField(_("Path"), max_length=500)
+    row_count = models.PositiveIntegerField(_("Rows"), default=0)
+    archived_at = models.DateTimeField(_("Archived At"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Transaction Archive")
+        verbose_name_plural = _("Transaction Archives")
+        ordering = ["month"]
+
+    def __str__(self) -> str:
+        return f"Transactions for {self.month:%Y-%m} ({self.row_count} rows)"
+
+
+class ImportCheckpoint(models.Model):
+    kind = models.CharField(_("Kind"), max_length=20)
+    source = models.CharField(_("Source"), max_length=500)
+    rows_read = models.PositiveBigIntegerField(_("Rows Read"), default=0)
+    rows_imported = models.PositiveBigIntegerField(_("Rows Imported"), default=0)
+    rows_rejected = models.PositiveBigIntegerField(_("Rows Rejected"), default=0)
+    completed_at = models.DateTimeField(_("Completed At"), null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Import Checkpoint")
+        verbose_name_plural = _("Import Checkpoints")
+        unique_together = ["kind", "source"]
+
+    def __str__(self) -> str:
+        return f"{self.kind} from {self.source} at row {self.rows_read}"
+
+
+class ScheduledTransfer(TimeStampedModel):
+    class Frequency(models.TextChoices):
+        ONCE = ("once", _("Once"))
+        DAILY = ("daily", _("Daily"))
+        WEEKLY = ("weekly", _("Weekly"))
+        MONTHLY = ("monthly", _("Monthly"))
+
+    class ScheduleStatus(models.TextChoices):
+        ACTIVE = ("active", _("Active"))
+        COMPLETED = ("completed", _("Completed"))
+        CANCELLED = ("cancelled", _("Cancelled"))
+        FAILED = ("failed", _("Failed"))
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="scheduled_transfers"
+    )
+    sender_account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="scheduled_transfers"
+    )
+    receiver_account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="+"
+    )
+    amount = models.DecimalField(_("Amount"), decimal_places=2, max_digits=12)
+    description = models.CharField(_("Description"), max_length=500, blank=True)
+    frequency = models.CharField(
+        _("Frequency"), max_length=10, choices=Frequency.choices
+    )
+    start_at = models.DateTimeField(_("Start At"))
+    end_date = models.DateField(_("End Date"), null=True, blank=True)
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=ScheduleStatus.choices,
+        default=ScheduleStatus.ACTIVE,
+    )
+    # due_at is the occurrence still to be paid. next_run_at is when the
+    # dispatcher looks at the schedule again: normally due_at, pushed forward
+    # while a worker holds a claim, and cleared once the schedule ends.
+    due_at = models.DateTimeField(_("Due At"), null=True, blank=True)
+    next_run_at = models.DateTimeField(_("Next Run At"), null=True, blank=True)
+    occurrences = models.PositiveIntegerField(_("Occurrences"), default=0)
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    last_error = models.TextField(_("Last Error"), blank=True)
+    last_transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        db_constraint=False,
+    )
+
+    class Meta:
+        verbose_name = _("Scheduled Transfer")
+        verbose_name_plural = _("Scheduled Transfers")
+        indexes = [
+            models.Index(
+                fields=["next_run_at"],
+                name="scheduled_transfer_due_idx",
+                condition=models.Q(status="active"),
+            )
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.amount} {self.frequency} from {self.sender_account_id} "
+            f"to {self.receiver_account_id}"
+        )
@@ -0,0 +1,304 @@
+import json
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+from loguru import logger
+
+ALERT_QUEUE_KEY = "monitoring:alerts"
+# After Redis fails, evaluation is skipped for this long so posting money never
+# waits on a dead connection more than once in a while.
+BACKOFF_SECONDS = 30
+PIPELINE_BATCH = 500
+ALERT_COOLDOWN_SECONDS = 3600
+
+Event = namedtuple(
+    "Event", "transaction_id account_id account_number receiver_id amount type"
+)
+
+_skip_until = 0.0
+
+
+class MonitoringUnavailable(Exception):
+    pass
+
+
+def _rule_config(name):
+    return getattr(settings, "SUSPICIOUS_ACTIVITY_RULES", {}).get(name)
+
+
+def _window_keys(name, account_id, window, now):
+    # Sliding window counters are approximated from two fixed windows: the
+    # current one plus the previous one weighted by how much of it still falls
+    # inside the sliding window. Every read and write is O(1).
+    index = int(now // window)
+    return (
+        f"monitoring:{name}:{account_id}:{index}",
+        f"monitoring:{name}:{account_id}:{index - 1}",
+    )
+
+
+def _estimate(current, previous, window, now):
+    weight = 1 - (now % window) / window
+    return int(current or 0) + int(previous or 0) * weight
+
+
+class Rule:
+    name = ""
+
+    def __init__(self, config):
+        self.config = config
+
+    def window(self):
+        return 0
+
+    def stage(self, pipe, event, now):
+        return 0
+
+    def follow_up(self, pipe, event, results, now):
+        return 0
+
+    def check(self, event, results, follow_results, now):
+        return None
+
+
+class VelocityRule(Rule):
+    name = "velocity"
+
+    def window(self):
+        return self.config["window_minutes"] * 60
+
+    def stage(self, pipe, event, now):
+        current, previous = _window_keys(
+            self.name, event.account_id, self.window(), now
+        )
+        pipe.incr(current)
+        pipe.expire(current, self.window() * 2)
+        pipe.get(previous)
+        return 3
+
+    def check(self, event, results, follow_results, now):
+        count = _estimate(results[0], results[2], self.window(), now)
+        if count > self.config["max_transfers"]:
+            return (
+                f"{int(count)} outgoing payments in the last "
+                f"{self.config['window_minutes']} minutes"
+            )
+        return None
+
+
+class AmountSpikeRule(Rule):
+    name = "amount_spike"
+
+    def window(self):
+        return self.config["window_days"] * 86400
+
+    def stage(self, pipe, event, now):
+        total, previous_total = _window_keys(
+            f"{self.name}:total", event.account_id, self.window(), now
+        )
+        count, previous_count = _window_keys(
+            f"{self.name}:count", event.account_id, self.window(), now
+        )
+        # The reads are queued before the increments, so the average compared
+        # against excludes the payment being checked.
+        pipe.mget(total, previous_total, count, previous_count)
+        pipe.incrby(total, event.amount)
+        pipe.expire(total, self.window() * 2)
+        pipe.incr(count)
+        pipe.expire(count, self.window() * 2)
+        return 5
+
+    def check(self, event, results, follow_results, now):
+        total, previous_total, count, previous_count = results[0]
+        count = _estimate(count, previous_count, self.window(), now)
+        if count < self.config["min_history"]:
+            return None
+        average = _estimate(total, previous_total, self.window(), now) / count
+        if event.amount > average * self.config["factor"]:
+            return (
+                f"Amount is {event.amount / average:.1f}x the account's "
+                f"{self.config['window_days']}-day average"
+            )
+        return None
+
+
+class NewReceiversRule(Rule):
+    name = "new_receivers"
+
+    def window(self):
+        return self.config["window_minutes"] * 60
+
+    def stage(self, pipe, event, now):
+        if event.receiver_id is None:
+            return 0
+        known = f"monitoring:receivers:{event.account_id}"
+        pipe.sadd(known, event.receiver_id)
+        pipe.expire(known, self.config["remember_days"] * 86400)
+        return 2
+
+    def follow_up(self, pipe, event, results, now):
+        # Only a receiver the account has not paid before moves the counter.
+        if not results or not results[0]:
+            return 0
+        current, previous = _window_keys(
+            self.name, event.account_id, self.window(), now
+        )
+        pipe.incr(current)
+        pipe.expire(current, self.window() * 2)
+        pipe.get(previous)
+        return 3
+
+    def check(self, event, results, follow_results, now):
+        if not follow_results:
+            return None
+        count = _estimate(follow_results[0], follow_results[2], self.window(), now)
+        if count > self.config["max_new_receivers"]:
+            return (
+                f"{int(count)} new receivers in the last "
+                f"{self.config['window_minutes']} minutes"
+            )
+        return None
+
+
+RULE_CLASSES = [VelocityRule, AmountSpikeRule, NewReceiversRule]
+
+
+def active_rules():
+    return [
+        cls(_rule_config(cls.name)) for cls in RULE_CLASSES if _rule_config(cls.name)
+    ]
+
+
+def _event(txn):
+    # Only money leaving a customer account is scored.
+    if txn.sender_account_id is None:
+        return None
+    return Event(
+        transaction_id=str(txn.pk),
+        account_id=str(txn.sender_account_id),
+        account_number=txn.sender_account.account_number,
+        receiver_id=(
+            str(txn.receiver_account_id) if txn.receiver_account_id else None
+        ),
+        amount=int(txn.amount.scaleb(2)),
+        type=txn.transaction_type,
+    )
+
+
+def _run_phase(conn, staged):
+    pipe = conn.pipeline(transaction=False)
+    sizes = [step(pipe) for step in staged]
+    results = pipe.execute() if any(sizes) else []
+    out, position = [], 0
+    for size in sizes:
+        out.append(results[position : position + size])
+        position += size
+    return out
+
+
+def _evaluate(conn, rules, events, now):
+    pairs = [(rule, event) for event in events for rule in rules]
+    staged = _run_phase(
+        conn, [lambda pipe, r=r, e=e: r.stage(pipe, e, now) for r, e in pairs]
+    )
+    followed = _run_phase(
+        conn,
+        [
+            lambda pipe, r=r, e=e, res=res: r.follow_up(pipe, e, res, now)
+            for (r, e), res in zip(pairs, staged)
+        ],
+    )
+
+    hits = []
+    for (rule, event), results, follow_results in zip(pairs, staged, followed):
+        reason = rule.check(event, results, follow_results, now)
+        if reason:
+            hits.append((rule, event, reason))
+    return hits
+
+
+def _queue_alerts(conn, hits):
+    # One alert per account and rule per window; the rest of the burst is the
+    # same incident.
+    pipe = conn.pipeline(transaction=False)
+    for rule, event, _reason in hits:
+        pipe.set(
+            f"monitoring:flagged:{rule.name}:{event.account_id}",
+            1,
+            nx=True,
+            ex=int(min(rule.window(), ALERT_COOLDOWN_SECONDS)),
+        )
+    fresh = pipe.execute()
+
+    detected_at = timezone.now().isoformat()
+    alerts = [
+        json.dumps(
+            {
+                "rule": rule.name,
+                "account_number": event.account_number,
+                "transaction_id": event.transaction_id,
+                "transaction_type": event.type,
+                "amount": f"{event.amount / 100:.2f}",
+                "reason": reason,
+                "detected_at": detected_at,
+            }
+        )
+        for (rule, event, reason), is_new in zip(hits, fresh)
+        if is_new
+    ]
+    if alerts:
+        conn.rpush(ALERT_QUEUE_KEY, *alerts)
+    return len(alerts)
+
+
+def observe(transactions, raise_errors=False):
+    # With raise_errors, an unreachable Redis raises instead of skipping the
+    # transactions, so an outbox message that carries them is retried.
+    global _skip_until
+    if time.monotonic() < _skip_until:
+        if raise_errors:
+            raise MonitoringUnavailable("Redis is backing off after a failure")
+        return 0
+
+    rules = active_rules()
+    events = [event for event in map(_event, transactions) if event]
+    if not rules or not events:
+        return 0
+
+    queued = 0
+    try:
+        conn = get_redis_connection("redis")
+        for start in range(0, len(events), PIPELINE_BATCH):
+            batch = events[start : start + PIPELINE_BATCH]
+            hits = _evaluate(conn, rules, batch, time.time())
+            if hits:
+                queued += _queue_alerts(conn, hits)
+    except Exception as e:
+        _skip_until = time.monotonic() + BACKOFF_SECONDS
+        logger.warning(f"Suspicious activity monitoring unavailable: {str(e)}")
+        if raise_errors:
+            raise MonitoringUnavailable(str(e)) from e
+        return queued
+
+    if queued:
+        logger.warning(f"{queued} suspicious activity alerts queued")
+    return queued
+
+
+def pop_alerts(limit):
+    conn = get_redis_connection("redis")
+    pipe = conn.pipeline()
+    pipe.lrange(ALERT_QUEUE_KEY, 0, limit - 1)
+    pipe.ltrim(ALERT_QUEUE_KEY, limit, -1)
+    raw, _trimmed = pipe.execute()
+    return [json.loads(item) for item in raw]
+
+
+def requeue_alerts(alerts):
+    if alerts:
+        get_redis_connection("redis").lpush(
+            ALERT_QUEUE_KEY, *[json.dumps(alert) for alert in reversed(alerts)]
+        )
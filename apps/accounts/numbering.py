@@ -0,0 +1,107 @@
+import secrets
+
+from django.conf import settings
+from django.db import transaction
+from loguru import logger
+
+from . import luhn
+from .models import AvailableAccountNumber, BankAccount
+
+GENERATE_BATCH_SIZE = 1000
+
+
+class AccountNumberError(Exception):
+    pass
+
+
+def prefix_for(currency, branch_code=None) -> str:
+    currency_code = settings.ACCOUNT_CURRENCY_CODES.get(currency)
+    if not currency_code:
+        raise AccountNumberError(f"Invalid currency: {currency}")
+    if branch_code is None:
+        branch_code = settings.BANK_BRANCH_CODE
+    return f"{settings.BANK_CODE}{branch_code}{currency_code}"
+
+
+def generate(prefix: str, count: int):
+    width = settings.ACCOUNT_NUMBER_LENGTH - len(prefix) - 1
+    if width < 1:
+        raise AccountNumberError(f"Prefix {prefix} leaves no room for random digits")
+    # One draw per number rather than one per digit.
+    numbers = set()
+    while len(numbers) < count:
+        payload = f"{prefix}{secrets.randbelow(10**width):0{width}d}"
+        numbers.add(f"{payload}{luhn.check_digit(payload)}")
+    return numbers
+
+
+def refill(currency, branch_code=None, target=None, low_water=None) -> int:
+    prefix = prefix_for(currency, branch_code)
+    target = target or settings.ACCOUNT_NUMBER_POOL_SIZE
+    pool = AvailableAccountNumber.objects.filter(prefix=prefix)
+    available = pool.count()
+    if low_water is not None and available >= low_water:
+        return 0
+
+    created = 0
+    while available < target:
+        candidates = generate(prefix, min(target - available, GENERATE_BATCH_SIZE))
+        taken = set(
+            BankAccount.objects.filter(account_number__in=candidates).values_list(
+                "account_number", flat=True
+            )
+        )
+        # Numbers already in the pool are skipped by the unique constraint.
+        AvailableAccountNumber.objects.bulk_create(
+            [
+                AvailableAccountNumber(number=number, currency=currency, prefix=prefix)
+                for number in sorted(candidates - taken)
+            ],
+            ignore_conflicts=True,
+        )
+        added = pool.count() - available
+        if not added:
+            logger.warning(f"No unused account numbers left for prefix {prefix}")
+            break
+        available += added
+        created += added
+
+    if created:
+        logger.info(f"Added {created} account numbers to the {prefix} pool")
+    return created
+
+
+def refill_all(branch_code=None) -> int:
+    return sum(
+        refill(
+            currency,
+            branch_code,
+            low_water=settings.ACCOUNT_NUMBER_POOL_LOW_WATER,
+        )
+        for currency, code in settings.ACCOUNT_CURRENCY_CODES.items()
+        if code
+    )
+
+
+def claim(currency, branch_code=None) -> str:
+    prefix = prefix_for(currency, branch_code)
+    while True:
+        with transaction.atomic():
+            # SKIP LOCKED lets concurrent openings each take a different row
+            # instead of queueing behind the first one.
+            row = (
+                AvailableAccountNumber.objects.select_for_update(skip_locked=True)
+                .filter(prefix=prefix)
+                .order_by("id")
+                .first()
+            )
+            if row is None:
+                break
+            deleted, _rows = AvailableAccountNumber.objects.filter(pk=row.pk).delete()
+            if deleted:
+                return row.number
+
+    logger.warning(f"Account number pool for {prefix} is empty, refilling inline")
+    if not refill(currency, branch_code, target=GENERATE_BATCH_SIZE):
+        raise AccountNumberError(f"No account numbers available for {prefix}")
+    return claim(currency, branch_code)
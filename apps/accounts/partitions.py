@@ -0,0 +1,125 @@
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from loguru import logger
+
+from .models import Transaction
+
+TABLE = Transaction._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+MONTHS_AHEAD = getattr(settings, "TRANSACTION_PARTITIONS_AHEAD", 3)
+
+# On PostgreSQL the transaction table is partitioned by month of created_at
+# (migration 0010). Every index is per partition, so the indexes the hot paths
+# use only cover recent months; old months are archived and dropped whole.
+# Months are cut at local midnight, the same bounds the archive exports by.
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date):
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(month, time.min), tz),
+        timezone.make_aware(datetime.combine(add_months(month, 1), time.min), tz),
+    )
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions():
+    # Monthly partitions as (name, month), oldest first; the default partition
+    # is left out.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            ORDER BY child.relname
+            """,
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f"{TABLE}_p"
+    return [
+        (name, date(int(name[-6:-2]), int(name[-2:]), 1))
+        for name in names
+        if name.startswith(prefix) and name[len(prefix) :].isdigit()
+    ]
+
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD) -> list:
+    if not is_partitioned():
+        return []
+    existing = {month for _name, month in partitions()}
+    this_month = month_start(timezone.localdate())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(this_month, offset)
+        if month in existing:
+            continue
+        start, end = month_bounds(month)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE "{partition_name(month)}" PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        created.append(month)
+        logger.info(f"Created transaction partition {partition_name(month)}")
+    return created
+
+
+def lock_month(month: date):
+    # SHARE mode keeps the month readable but holds back every write to it until
+    # the caller's transaction ends. Returns the month's own partition, if any;
+    # without one its rows sit in the default partition.
+    if connection.vendor != "postgresql":
+        return None
+    partition = None
+    tables = [TABLE]
+    if is_partitioned():
+        if month in {m for _name, m in partitions()}:
+            partition = partition_name(month)
+        tables = [name for name in (partition, DEFAULT_PARTITION) if name]
+    names = ", ".join(f'"{table}"' for table in tables)
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {names} IN SHARE MODE")
+    return partition
+
+
+def row_count(table: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM "{table}"')
+        return cursor.fetchone()[0]
+
+
+def drop_partition(month: date):
+    name = partition_name(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+        cursor.execute(f'DROP TABLE "{name}"')
+    logger.info(f"Dropped transaction partition {name}")
@@ -0,0 +1,216 @@
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from loguru import logger
+
+from .ledger import SIGNED_AMOUNT
+from .models import (
+    BalanceCheckpoint,
+    BalanceShard,
+    BankAccount,
+    LedgerEntry,
+    ReconciliationChunk,
+    ReconciliationDiscrepancy,
+    ReconciliationRun,
+)
+from .services import pk_bounds
+
+CHUNK_SIZE = getattr(settings, "RECONCILIATION_CHUNK_SIZE", 5000)
+CENT = Decimal("0.01")
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+BEFORE_LEDGER = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def plan_run(size=CHUNK_SIZE) -> ReconciliationRun:
+    with transaction.atomic():
+        run = ReconciliationRun.objects.create()
+        chunks = ReconciliationChunk.objects.bulk_create(
+            [
+                ReconciliationChunk(run=run, start_account_id=start, end_account_id=end)
+                for start, end in pk_bounds(BankAccount.objects.all(), size)
+            ],
+            batch_size=1000,
+        )
+        run.chunk_count = len(chunks)
+        run.save(update_fields=["chunk_count", "updated_at"])
+    logger.info(f"Planned reconciliation run {run.pk} in {len(chunks)} chunks")
+    return run
+
+
+def _balances(chunk: ReconciliationChunk):
+    # One statement for the whole range: each account's recorded balance next
+    # to the net of its ledger legs. A single statement reads one snapshot, so
+    # postings committing meanwhile never show up as half applied. Accounts
+    # opened before the ledger start from the opening checkpoint migration 0002
+    # wrote for them, and only legs after it count, as in ledger.balance_at.
+    opening = BalanceCheckpoint.objects.filter(
+        account=OuterRef("pk"), entry__isnull=True
+    ).order_by("-as_of", "-id")
+    ledger_net = (
+        LedgerEntry.objects.filter(
+            account=OuterRef("pk"), created_at__gt=OuterRef("opening_as_of")
+        )
+        .order_by()
+        .values("account")
+        .annotate(total=Sum(SIGNED_AMOUNT))
+        .values("total")
+    )
+    shard_total = (
+        BalanceShard.objects.filter(account=OuterRef("pk"))
+        .order_by()
+        .values("account")
+        .annotate(total=Sum("balance"))
+        .values("total")
+    )
+    accounts = BankAccount.objects.all()
+    if chunk.start_account_id:
+        accounts = accounts.filter(pk__gte=chunk.start_account_id)
+    if chunk.end_account_id:
+        accounts = accounts.filter(pk__lt=chunk.end_account_id)
+    return accounts.annotate(
+        opening_as_of=Coalesce(
+            Subquery(opening.values("as_of")[:1]), Value(BEFORE_LEDGER)
+        ),
+        opening_balance=Coalesce(
+            Subquery(opening.values("balance")[:1], output_field=MONEY),
+            Value(0),
+            output_field=MONEY,
+        ),
+    ).annotate(
+        ledger_balance=F("opening_balance")
+        + Coalesce(
+            Subquery(ledger_net, output_field=MONEY), Value(0), output_field=MONEY
+        ),
+        shard_balance=Coalesce(
+            Subquery(shard_total, output_field=MONEY), Value(0), output_field=MONEY
+        ),
+    ).values_list(
+        "pk", "account_balance", "shard_count", "ledger_balance", "shard_balance"
+    )
+
+
+def reconcile_chunk(chunk_id) -> ReconciliationChunk:
+    started = time.perf_counter()
+    with transaction.atomic():
+        chunk = (
+            ReconciliationChunk.objects.select_for_update()
+            .select_related("run")
+            .get(pk=chunk_id)
+        )
+        if chunk.status == ReconciliationChunk.ChunkStatus.COMPLETED:
+            return chunk
+
+        checked = 0
+        discrepancies = []
+        rows = _balances(chunk)
+        for pk, recorded, shard_count, ledger_balance, shard_balance in rows:
+            checked += 1
+            # A sharded account's live balance is its shards; account_balance
+            # only catches up at consolidation.
+            if shard_count:
+                recorded = shard_balance
+            recorded = Decimal(recorded).quantize(CENT)
+            ledger_balance = Decimal(ledger_balance).quantize(CENT)
+            if recorded != ledger_balance:
+                discrepancies.append(
+                    ReconciliationDiscrepancy(
+                        run_id=chunk.run_id,
+                        account_id=pk,
+                        recorded_balance=recorded,
+                        ledger_balance=ledger_balance,
+                        difference=recorded - ledger_balance,
+                    )
+                )
+        ReconciliationDiscrepancy.objects.bulk_create(discrepancies, batch_size=1000)
+
+        chunk.status = ReconciliationChunk.ChunkStatus.COMPLETED
+        chunk.accounts_checked = checked
+        chunk.discrepancy_count = len(discrepancies)
+        chunk.duration_ms = int((time.perf_counter() - started) * 1000)
+        chunk.error = ""
+        chunk.save()
+        ReconciliationRun.objects.filter(pk=chunk.run_id).update(
+            chunks_completed=F("chunks_completed") + 1,
+            accounts_checked=F("accounts_checked") + checked,
+            discrepancy_count=F("discrepancy_count") + len(discrepancies),
+            updated_at=timezone.now(),
+        )
+
+    finish_run(chunk.run)
+    return chunk
+
+
+def record_failure(chunk_id, error):
+    ReconciliationChunk.objects.filter(pk=chunk_id).exclude(
+        status=ReconciliationChunk.ChunkStatus.COMPLETED
+    ).update(
+        status=ReconciliationChunk.ChunkStatus.FAILED,
+        attempts=F("attempts") + 1,
+        error=str(error)[:2000],
+        updated_at=timezone.now(),
+    )
+
+
+def finish_run(run: ReconciliationRun):
+    if pending_chunks(run).exists():
+        return False
+    updated = ReconciliationRun.objects.filter(
+        pk=run.pk, status=ReconciliationRun.RunStatus.RUNNING
+    ).update(
+        status=ReconciliationRun.RunStatus.COMPLETED,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    if updated:
+        run.refresh_from_db()
+        elapsed = (run.finished_at - run.created_at).total_seconds()
+        message = (
+            f"Reconciliation run {run.pk} completed: {run.accounts_checked} accounts "
+            f"in {elapsed:.1f}s, {run.discrepancy_count} discrepancies"
+        )
+        if run.discrepancy_count:
+            logger.warning(message)
+        else:
+            logger.info(message)
+    return True
+
+
+def pending_chunks(run: ReconciliationRun):
+    return run.chunks.exclude(status=ReconciliationChunk.ChunkStatus.COMPLETED)
+
+
+def progress(run: ReconciliationRun):
+    run.refresh_from_db()
+    timings = run.chunks.filter(
+        status=ReconciliationChunk.ChunkStatus.COMPLETED
+    ).aggregate(total_ms=Sum("duration_ms"))
+    elapsed = ((run.finished_at or timezone.now()) - run.created_at).total_seconds()
+    return {
+        "run": run.pk,
+        "status": run.status,
+        "chunks_completed": run.chunks_completed,
+        "chunk_count": run.chunk_count,
+        "accounts_checked": run.accounts_checked,
+        "discrepancies": run.discrepancy_count,
+        "elapsed_seconds": round(elapsed, 1),
+        "accounts_per_second": round(run.accounts_checked / elapsed) if elapsed else 0,
+        "chunk_seconds": round((timings["total_ms"] or 0) / 1000, 1),
+    }
+
+
+def discrepancy_report(run: ReconciliationRun):
+    return (
+        run.discrepancies.order_by("account__account_number")
+        .values_list(
+            "account__account_number",
+            "recorded_balance",
+            "ledger_balance",
+            "difference",
+        )
+    )
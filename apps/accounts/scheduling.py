@@ -0,0 +1,193 @@
+import calendar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from loguru import logger
+
+from . import services
+from .models import BankAccount, ScheduledTransfer
+
+CLAIM_BATCH_SIZE = getattr(settings, "SCHEDULED_TRANSFER_CLAIM_BATCH", 100)
+CLAIM_LEASE = getattr(settings, "SCHEDULED_TRANSFER_LEASE", timedelta(minutes=5))
+RETRY_DELAY = getattr(settings, "SCHEDULED_TRANSFER_RETRY_DELAY", timedelta(hours=1))
+MAX_ATTEMPTS = getattr(settings, "SCHEDULED_TRANSFER_MAX_ATTEMPTS", 3)
+WORKERS = getattr(settings, "SCHEDULED_TRANSFER_WORKERS", 8)
+# How long one worker keeps claiming batches, kept under the task soft limit.
+WORKER_SECONDS = getattr(settings, "SCHEDULED_TRANSFER_WORKER_SECONDS", 40)
+
+Frequency = ScheduledTransfer.Frequency
+ScheduleStatus = ScheduledTransfer.ScheduleStatus
+
+# Due schedules are found through the partial index on next_run_at, which only
+# holds active schedules, so a scan costs what is due rather than what exists.
+# A worker claims a batch by pushing next_run_at out by CLAIM_LEASE under SKIP
+# LOCKED, pays each one in its own transaction and moves next_run_at on to the
+# next occurrence. If a worker dies or stalls, the lease runs out and another
+# worker claims the schedule under a new lease; a stalled worker then finds its
+# lease gone and leaves the schedule alone.
+
+
+def occurrence(schedule: ScheduledTransfer, index: int):
+    # Works in local time so a 09:00 standing order stays at 09:00 across DST,
+    # and a monthly one set up on the 31st falls on the last day of short months.
+    start = timezone.localtime(schedule.start_at)
+    if schedule.frequency == Frequency.ONCE:
+        due = start if index == 0 else None
+    elif schedule.frequency == Frequency.DAILY:
+        due = start + timedelta(days=index)
+    elif schedule.frequency == Frequency.WEEKLY:
+        due = start + timedelta(weeks=index)
+    else:
+        year, month = divmod(start.year * 12 + start.month - 1 + index, 12)
+        day = min(start.day, calendar.monthrange(year, month + 1)[1])
+        due = start.replace(year=year, month=month + 1, day=day)
+    if due is None or (schedule.end_date and due.date() > schedule.end_date):
+        return None
+    return due
+
+
+def schedule_transfer(
+    user,
+    sender_account: BankAccount,
+    receiver_account: BankAccount,
+    amount,
+    frequency,
+    start_at,
+    end_date=None,
+    description="",
+) -> ScheduledTransfer:
+    if sender_account.pk == receiver_account.pk:
+        raise services.TransactionError(_("You cannot transfer to the same account."))
+    # FX quotes expire within minutes, so only same-currency payments can be
+    # scheduled ahead.
+    if sender_account.currency != receiver_account.currency:
+        raise services.TransactionError(
+            _("Scheduled transfers must be between accounts in the same currency.")
+        )
+    schedule = ScheduledTransfer(
+        user=user,
+        sender_account=sender_account,
+        receiver_account=receiver_account,
+        amount=services.normalize_amount(amount),
+        frequency=frequency,
+        start_at=start_at,
+        end_date=end_date,
+        description=description or "",
+    )
+    schedule.due_at = schedule.next_run_at = occurrence(schedule, 0)
+    if schedule.due_at is None:
+        raise services.TransactionError(
+            _("The end date must not be before the first payment.")
+        )
+    schedule.save()
+    logger.info(f"Scheduled transfer {schedule.pk} created for {schedule.due_at}")
+    return schedule
+
+
+def cancel(schedule: ScheduledTransfer) -> bool:
+    # Waits for a worker that is paying this schedule right now, so a cancel
+    # never lands between a payment and the move to the next occurrence.
+    return bool(
+        ScheduledTransfer.objects.filter(
+            pk=schedule.pk, status=ScheduleStatus.ACTIVE
+        ).update(status=ScheduleStatus.CANCELLED, due_at=None, next_run_at=None)
+    )
+
+
+def has_due() -> bool:
+    return ScheduledTransfer.objects.filter(
+        status=ScheduleStatus.ACTIVE, next_run_at__lte=timezone.now()
+    ).exists()
+
+
+def claim(batch_size=CLAIM_BATCH_SIZE):
+    # Returns the claimed ids and the lease they were claimed until, which
+    # execute checks so a worker whose lease was taken over stands down.
+    now = timezone.now()
+    lease = now + CLAIM_LEASE
+    with transaction.atomic():
+        ids = list(
+            ScheduledTransfer.objects.select_for_update(skip_locked=True)
+            .filter(status=ScheduleStatus.ACTIVE, next_run_at__lte=now)
+            .order_by("next_run_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        ScheduledTransfer.objects.filter(pk__in=ids).update(next_run_at=lease)
+    return ids, lease
+
+
+def _advance(schedule: ScheduledTransfer):
+    schedule.occurrences += 1
+    schedule.attempts = 0
+    schedule.due_at = schedule.next_run_at = occurrence(
+        schedule, schedule.occurrences
+    )
+    if schedule.due_at is None:
+        schedule.status = ScheduleStatus.COMPLETED
+
+
+def execute(schedule_id, lease) -> bool:
+    with transaction.atomic():
+        schedule = (
+            ScheduledTransfer.objects.select_for_update(of=("self",))
+            .select_related("user", "sender_account", "receiver_account")
+            .filter(pk=schedule_id)
+            .first()
+        )
+        if (
+            schedule is None
+            or schedule.status != ScheduleStatus.ACTIVE
+            or schedule.next_run_at != lease
+            or schedule.due_at > timezone.now()
+        ):
+            # Cancelled, or claimed again after this worker's lease ran out.
+            return False
+
+        try:
+            with transaction.atomic():
+                txn = services.transfer(
+                    schedule.sender_account,
+                    schedule.receiver_account,
+                    schedule.amount,
+                    performed_by=schedule.user,
+                    description=schedule.description or None,
+                )
+        except services.TransactionError as e:
+            schedule.attempts += 1
+            schedule.last_error = str(e)
+            logger.warning(
+                f"Scheduled transfer {schedule.pk} failed "
+                f"(attempt {schedule.attempts}): {str(e)}"
+            )
+            if schedule.attempts < MAX_ATTEMPTS:
+                schedule.next_run_at = timezone.now() + RETRY_DELAY
+            elif schedule.frequency == Frequency.ONCE:
+                schedule.status = ScheduleStatus.FAILED
+                schedule.due_at = schedule.next_run_at = None
+            else:
+                # A standing order skips the payment it could not make and
+                # carries on with the next one.
+                _advance(schedule)
+            succeeded = False
+        else:
+            schedule.last_transaction = txn
+            schedule.last_error = ""
+            _advance(schedule)
+            succeeded = True
+
+        schedule.save(
+            update_fields=[
+                "status",
+                "due_at",
+                "next_run_at",
+                "occurrences",
+                "attempts",
+                "last_error",
+                "last_transaction",
+                "updated_at",
+            ]
+        )
+    return succeeded
@@ -0,0 +1,111 @@
+from django import forms
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from django_filters import rest_framework as filters
+
+from .models import BankAccount, Transaction
+from .statements import period_bounds
+
+MAX_WINDOW_DAYS = getattr(settings, "TRANSACTION_SEARCH_MAX_WINDOW_DAYS", 31)
+
+# Every accepted search starts from an index, and the other filters only narrow
+# what that index returns:
+#   account or sender/receiver   txn_sender_search_idx / txn_receiver_search_idx
+#   transaction_type             txn_type_search_idx
+#   a bounded date window        the created_at index
+# Amount and status are trailing columns of the first three, so they are checked
+# inside the index. Filters that would have to read the whole table on their
+# own, such as an amount range or a status, are refused.
+
+
+class TransactionSearchForm(forms.Form):
+    def clean(self):
+        data = super().clean()
+        after, before = data.get("created_after"), data.get("created_before")
+        if after and before and after > before:
+            raise forms.ValidationError(
+                _("created_after must not be after created_before.")
+            )
+        low, high = data.get("amount_min"), data.get("amount_max")
+        if low is not None and high is not None and low > high:
+            raise forms.ValidationError(_("amount_min must not exceed amount_max."))
+
+        anchored = any(
+            data.get(name)
+            for name in (
+                "account",
+                "sender_account",
+                "receiver_account",
+                "transaction_type",
+            )
+        )
+        if not anchored:
+            if not (after and before):
+                raise forms.ValidationError(
+                    _(
+                        "Filter by account or transaction_type, or give both "
+                        "created_after and created_before."
+                    )
+                )
+            if (before - after).days >= MAX_WINDOW_DAYS:
+                raise forms.ValidationError(
+                    _(
+                        "Without an account or transaction_type the date range "
+                        "is limited to %(days)s days."
+                    )
+                    % {"days": MAX_WINDOW_DAYS}
+                )
+        return data
+
+
+class TransactionSearchFilter(filters.FilterSet):
+    account = filters.ModelChoiceFilter(
+        queryset=BankAccount.objects.all(),
+        to_field_name="account_number",
+        method="filter_account",
+    )
+    sender_account = filters.ModelChoiceFilter(
+        queryset=BankAccount.objects.all(), to_field_name="account_number"
+    )
+    receiver_account = filters.ModelChoiceFilter(
+        queryset=BankAccount.objects.all(), to_field_name="account_number"
+    )
+    transaction_type = filters.ChoiceFilter(choices=Transaction.TransactionType.choices)
+    status = filters.ChoiceFilter(choices=Transaction.TransactionStatus.choices)
+    amount_min = filters.NumberFilter(field_name="amount", lookup_expr="gte")
+    amount_max = filters.NumberFilter(field_name="amount", lookup_expr="lte")
+    created_after = filters.DateFilter(method="filter_created_after")
+    created_before = filters.DateFilter(method="filter_created_before")
+
+    class Meta:
+        model = Transaction
+        form = TransactionSearchForm
+        fields = []
+
+    def filter_account(self, queryset, name, value):
+        # Applied by search_querysets, which splits it into a sender and a
+        # receiver search so each side walks its own index.
+        return queryset
+
+    def filter_created_after(self, queryset, name, value):
+        start, _end = period_bounds(value, value)
+        return queryset.filter(created_at__gte=start)
+
+    def filter_created_before(self, queryset, name, value):
+        _start, end = period_bounds(value, value)
+        return queryset.filter(created_at__lt=end)
+
+
+def search_querysets(params):
+    # Returns the querysets to merge, newest first, or the filter's errors.
+    base = Transaction.objects.select_related("sender_account", "receiver_account")
+    filterset = TransactionSearchFilter(params, queryset=base)
+    if not filterset.is_valid():
+        return None, filterset.errors
+    account = filterset.form.cleaned_data.get("account")
+    if account is None:
+        return [filterset.qs], None
+    return [
+        filterset.qs.filter(sender_account=account),
+        filterset.qs.filter(receiver_account=account),
+    ], None
@@ -0,0 +1,286 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+from .analytics import MAX_MONTHS
+from .models import (
+    AccountBalanceSnapshot,
+    BankAccount,
+    FXQuote,
+    ScheduledTransfer,
+    Transaction,
+)
+from .partitions import add_months
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    sender_account = serializers.SlugRelatedField(
+        slug_field="account_number", read_only=True
+    )
+    receiver_account = serializers.SlugRelatedField(
+        slug_field="account_number", read_only=True
+    )
+
+    class Meta:
+        model = Transaction
+        fields = [
+            "id",
+            "amount",
+            "description",
+            "sender_account",
+            "receiver_account",
+            "status",
+            "transaction_type",
+            "created_at",
+        ]
+
+
+class DepositSerializer(serializers.Serializer):
+    account_number = serializers.CharField(max_length=20)
+    amount = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal("0.01")
+    )
+    description = serializers.CharField(
+        max_length=500, required=False, allow_blank=True
+    )
+
+    def validate_account_number(self, value):
+        try:
+            return BankAccount.objects.select_related("user").get(
+                account_number=value
+            )
+        except BankAccount.DoesNotExist:
+            raise serializers.ValidationError(_("Invalid account number."))
+
+
+class WithdrawalSerializer(DepositSerializer):
+    def validate_account_number(self, value):
+        user = self.context["request"].user
+        try:
+            return BankAccount.objects.select_related("user").get(
+                account_number=value, user=user
+            )
+        except BankAccount.DoesNotExist:
+            raise serializers.ValidationError(
+                _("Invalid account number or you do not own this account.")
+            )
+
+
+class SenderAccountSerializer(serializers.Serializer):
+    sender_account = serializers.CharField(max_length=20)
+
+    def validate_sender_account(self, value):
+        user = self.context["request"].user
+        try:
+            return BankAccount.objects.select_related("user").get(
+                account_number=value, user=user
+            )
+        except BankAccount.DoesNotExist:
+            raise serializers.ValidationError(
+                _("Invalid account number or you do not own this account.")
+            )
+
+
+class TransferSerializer(SenderAccountSerializer):
+    receiver_account = serializers.CharField(max_length=20)
+    amount = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal("0.01")
+    )
+    description = serializers.CharField(
+        max_length=500, required=False, allow_blank=True
+    )
+    quote_id = serializers.UUIDField(required=False)
+    otp = serializers.RegexField(r"^\d{6}$", required=False)
+
+    def validate_receiver_account(self, value):
+        try:
+            return BankAccount.objects.select_related("user").get(
+                account_number=value
+            )
+        except BankAccount.DoesNotExist:
+            raise serializers.ValidationError(_("Invalid account number."))
+
+    def validate_quote_id(self, value):
+        try:
+            return FXQuote.objects.get(pk=value, user=self.context["request"].user)
+        except FXQuote.DoesNotExist:
+            raise serializers.ValidationError(_("Invalid quote."))
+
+    def validate(self, data):
+        if data["sender_account"] == data["receiver_account"]:
+            raise serializers.ValidationError(
+                _("You cannot transfer to the same account.")
+            )
+        return data
+
+
+class FXQuoteRequestSerializer(TransferSerializer):
+    description = None
+    quote_id = None
+    otp = None
+
+
+class FXQuoteSerializer(serializers.ModelSerializer):
+    sender_account = serializers.SlugRelatedField(
+        slug_field="account_number", read_only=True
+    )
+    receiver_account = serializers.SlugRelatedField(
+        slug_field="account_number", read_only=True
+    )
+    rate_version = serializers.IntegerField(source="snapshot.version", read_only=True)
+
+    class Meta:
+        model = FXQuote
+        fields = [
+            "id",
+            "sender_account",
+            "receiver_account",
+            "source_amount",
+            "source_currency",
+            "target_amount",
+            "target_currency",
+            "rate",
+            "rate_version",
+            "expires_at",
+        ]
+
+
+class ScheduledTransferRequestSerializer(TransferSerializer):
+    quote_id = None
+    frequency = serializers.ChoiceField(choices=ScheduledTransfer.Frequency.choices)
+    start_at = serializers.DateTimeField()
+    end_date = serializers.DateField(required=False, allow_null=True)
+
+    def validate_start_at(self, value):
+        if value <= timezone.now():
+            raise serializers.ValidationError(
+                _("The first payment must be in the future.")
+            )
+        return value
+
+    def validate(self, data):
+        data = super().validate(data)
+        if data["sender_account"].currency != data["receiver_account"].currency:
+            raise serializers.ValidationError(
+                _("Scheduled transfers must be between accounts in the same currency.")
+            )
+        return data
+
+
+class ScheduledTransferSerializer(serializers.ModelSerializer):
+    sender_account = serializers.SlugRelatedField(
+        slug_field="account_number", read_only=True
+    )
+    receiver_account = serializers.SlugRelatedField(
+        slug_field="account_number", read_only=True
+    )
+
+    class Meta:
+        model = ScheduledTransfer
+        fields = [
+            "id",
+            "sender_account",
+            "receiver_account",
+            "amount",
+            "description",
+            "frequency",
+            "start_at",
+            "end_date",
+            "status",
+            "due_at",
+            "occurrences",
+            "last_error",
+            "created_at",
+        ]
+
+
+class BulkTransferSerializer(SenderAccountSerializer):
+    # Lines are validated one by one in services.bulk_transfer so a bad line is
+    # reported in the results instead of rejecting the whole payroll file.
+    transfers = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.BULK_TRANSFER_MAX_LINES,
+    )
+    otp = serializers.RegexField(r"^\d{6}$", required=False)
+
+
+class AccountResolveSerializer(serializers.Serializer):
+    account_numbers = serializers.ListField(
+        child=serializers.CharField(max_length=20, trim_whitespace=True),
+        allow_empty=False,
+        max_length=settings.ACCOUNT_RESOLVE_MAX_NUMBERS,
+    )
+
+
+class AccountStatusSerializer(serializers.Serializer):
+    account_numbers = serializers.ListField(
+        child=serializers.CharField(max_length=20, trim_whitespace=True),
+        allow_empty=False,
+        max_length=settings.ACCOUNT_STATUS_MAX_NUMBERS,
+    )
+    account_status = serializers.ChoiceField(
+        choices=BankAccount.AccountStatus.choices,
+        default=BankAccount.AccountStatus.ACTIVE,
+    )
+
+
+class StatementQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, data):
+        if data["start"] > data["end"]:
+            raise serializers.ValidationError(
+                _("The start date must be on or before the end date.")
+            )
+        return data
+
+
+class AccountActivityQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False, input_formats=["%Y-%m", "iso-8601"])
+    end = serializers.DateField(required=False, input_formats=["%Y-%m", "iso-8601"])
+
+    def validate(self, data):
+        end = data.get("end") or timezone.localdate()
+        end = end.replace(day=1)
+        start = data.get("start") or add_months(end, -5)
+        start = start.replace(day=1)
+        if start > end:
+            raise serializers.ValidationError(
+                _("The start month must be on or before the end month.")
+            )
+        if (end.year - start.year) * 12 + end.month - start.month >= MAX_MONTHS:
+            raise serializers.ValidationError(
+                _("Analytics cover at most %(months)s months.")
+                % {"months": MAX_MONTHS}
+            )
+        return {"start": start, "end": end}
+
+
+class ActivityTotalsSerializer(serializers.Serializer):
+    inflow = serializers.DecimalField(max_digits=18, decimal_places=2)
+    outflow = serializers.DecimalField(max_digits=18, decimal_places=2)
+    count = serializers.IntegerField()
+
+
+class MonthlyActivitySerializer(ActivityTotalsSerializer):
+    month = serializers.CharField()
+    net = serializers.DecimalField(max_digits=18, decimal_places=2)
+    by_type = serializers.DictField(child=ActivityTotalsSerializer())
+
+
+class AccountBalanceSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AccountBalanceSnapshot
+        fields = [
+            "date",
+            "opening_balance",
+            "closing_balance",
+            "total_credits",
+            "total_debits",
+            "entry_count",
+        ]
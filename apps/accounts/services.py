@@ -0,0 +1,516 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from loguru import logger
+
+from apps.common import outbox
+
+from . import ledger, shards
+from .models import BankAccount, FXQuote, LedgerEntry, Transaction
+
+
+BULK_CHUNK_SIZE = 1000
+AMOUNT_FIELD = Transaction._meta.get_field("amount")
+DESCRIPTION_MAX_LENGTH = Transaction._meta.get_field("description").max_length
+
+
+class TransactionError(Exception):
+    pass
+
+
+class InsufficientFundsError(TransactionError):
+    pass
+
+
+class InactiveAccountError(TransactionError):
+    pass
+
+
+def normalize_amount(amount) -> Decimal:
+    try:
+        amount = Decimal(str(amount)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        raise TransactionError(_("Enter a valid amount."))
+    # NaN and Infinity survive quantize, and comparing NaN raises.
+    if not amount.is_finite():
+        raise TransactionError(_("Enter a valid amount."))
+    if amount <= 0:
+        raise TransactionError(_("Amount must be greater than zero."))
+    if amount.adjusted() >= AMOUNT_FIELD.max_digits - AMOUNT_FIELD.decimal_places:
+        raise TransactionError(_("Amount is too large."))
+    return amount
+
+
+def normalize_description(description):
+    if description in (None, ""):
+        return None
+    if not isinstance(description, str):
+        raise TransactionError(_("Enter a valid description."))
+    if len(description) > DESCRIPTION_MAX_LENGTH:
+        raise TransactionError(
+            _("The description must be at most %(limit)d characters.")
+            % {"limit": DESCRIPTION_MAX_LENGTH}
+        )
+    return description
+
+
+def chunked(items, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def pk_bounds(queryset, size):
+    # Splits a queryset into half-open primary key ranges of `size` rows. Each
+    # boundary is found with one index range scan from the previous one, so
+    # planning a million rows never loads their ids.
+    bounds = [None]
+    ids = queryset.order_by("pk").values_list("pk", flat=True)
+    while True:
+        start = bounds[-1]
+        qs = ids if start is None else ids.filter(pk__gte=start)
+        boundary = qs[size : size + 1].first()
+        if boundary is None:
+            break
+        bounds.append(boundary)
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+def lock_accounts(*account_ids):
+    # Rows are always locked in primary key order, so two transfers touching the
+    # same pair of accounts queue behind each other instead of deadlocking.
+    # Sharded accounts are read without their row lock; their money moves
+    # through shard rows, after every account row lock has been taken.
+    account_ids = sorted(set(account_ids))
+    locked = {}
+    for chunk in chunked(account_ids):
+        accounts = (
+            BankAccount.objects.select_related("user")
+            .select_for_update(of=("self",))
+            .filter(pk__in=chunk, shard_count=0)
+            .order_by("pk")
+        )
+        locked.update((account.pk, account) for account in accounts)
+    sharded = [pk for pk in account_ids if pk not in locked]
+    for chunk in chunked(sharded):
+        locked.update(
+            BankAccount.objects.select_related("user")
+            .filter(pk__in=chunk)
+            .in_bulk()
+        )
+    return locked
+
+
+def _move(account: BankAccount, amount: Decimal, entries=1):
+    # Applies a signed amount to a locked account or to a sharded account's
+    # shards. Callers move accounts in primary key order.
+    if shards.is_sharded(account):
+        if amount > 0:
+            shards.credit(account, amount)
+        elif not shards.debit(account, -amount):
+            raise InsufficientFundsError(_("Insufficient funds."))
+        return
+    BankAccount.objects.filter(pk=account.pk).update(
+        account_balance=F("account_balance") + amount,
+        entries_since_checkpoint=F("entries_since_checkpoint") + entries,
+    )
+    account.account_balance += amount
+    account.entries_since_checkpoint += entries
+
+
+def _checkpoint_if_due(account: BankAccount, entry: LedgerEntry):
+    if not shards.is_sharded(account):
+        ledger.checkpoint_if_due(account, entry)
+
+
+def _new_balance(account: BankAccount) -> Decimal:
+    if shards.is_sharded(account):
+        return shards.balance(account)
+    return account.account_balance
+
+
+def deposit(account: BankAccount, amount, performed_by=None, description=None):
+    amount = normalize_amount(amount)
+
+    with transaction.atomic():
+        updated = BankAccount.objects.filter(pk=account.pk, shard_count=0).update(
+            account_balance=F("account_balance") + amount,
+            entries_since_checkpoint=F("entries_since_checkpoint") + 1,
+        )
+        account.refresh_from_db(
+            fields=["account_balance", "entries_since_checkpoint", "shard_count"]
+        )
+        if not updated:
+            shards.credit(account, amount)
+
+        txn = Transaction.objects.create(
+            user=performed_by,
+            amount=amount,
+            description=description,
+            receiver=account.user,
+            receiver_account=account,
+            status=Transaction.TransactionStatus.COMPLETED,
+            transaction_type=Transaction.TransactionType.DEPOSIT,
+        )
+        entry, _cash = ledger.post(
+            txn,
+            ledger.credit(account, amount),
+            ledger.debit(None, amount, LedgerEntry.LedgerAccount.CASH),
+        )
+        _checkpoint_if_due(account, entry)
+
+        outbox.publish(
+            "accounts.deposit_email",
+            user_id=account.user_id,
+            user_email=account.user.email,
+            amount=amount,
+            currency=account.get_currency_display(),
+            new_balance=_new_balance(account),
+            account_number=account.account_number,
+        )
+
+    logger.info(f"Deposit of {amount} into {account.account_number} completed")
+    return txn
+
+
+def withdraw(account: BankAccount, amount, performed_by=None, description=None):
+    amount = normalize_amount(amount)
+
+    with transaction.atomic():
+        # The balance check and the debit happen in a single conditional UPDATE,
+        # so no separate locking read is needed for a one-account movement.
+        updated = BankAccount.objects.filter(
+            pk=account.pk,
+            account_status=BankAccount.AccountStatus.ACTIVE,
+            account_balance__gte=amount,
+            shard_count=0,
+        ).update(
+            account_balance=F("account_balance") - amount,
+            entries_since_checkpoint=F("entries_since_checkpoint") + 1,
+        )
+
+        account.refresh_from_db(
+            fields=[
+                "account_balance",
+                "account_status",
+                "entries_since_checkpoint",
+                "shard_count",
+            ]
+        )
+
+        if not updated:
+            if account.account_status != BankAccount.AccountStatus.ACTIVE:
+                raise InactiveAccountError(_("This account is not active."))
+            if not shards.is_sharded(account) or not shards.debit(account, amount):
+                raise InsufficientFundsError(_("Insufficient funds."))
+
+        txn = Transaction.objects.create(
+            user=performed_by,
+            amount=amount,
+            description=description,
+            sender=account.user,
+            sender_account=account,
+            status=Transaction.TransactionStatus.COMPLETED,
+            transaction_type=Transaction.TransactionType.WITHDRAWAL,
+        )
+        entry, _cash = ledger.post(
+            txn,
+            ledger.debit(account, amount),
+            ledger.credit(None, amount, LedgerEntry.LedgerAccount.CASH),
+        )
+        _checkpoint_if_due(account, entry)
+
+        outbox.publish(
+            "accounts.withdrawal_email",
+            user_id=account.user_id,
+            user_email=account.user.email,
+            amount=amount,
+            currency=account.get_currency_display(),
+            new_balance=_new_balance(account),
+            account_number=account.account_number,
+        )
+        outbox.publish("accounts.monitor", transaction_ids=[txn.pk])
+
+    logger.info(f"Withdrawal of {amount} from {account.account_number} completed")
+    return txn
+
+
+def _claim_quote(quote, sender, receiver, amount) -> FXQuote:
+    if quote is None:
+        raise TransactionError(
+            _("Transfers between currencies need an exchange rate quote.")
+        )
+    quote = FXQuote.objects.select_for_update().get(pk=quote.pk)
+    if quote.transaction_id is not None:
+        raise TransactionError(_("This quote has already been used."))
+    if quote.expires_at <= timezone.now():
+        raise TransactionError(_("This quote has expired. Request a new one."))
+    if (
+        quote.sender_account_id != sender.pk
+        or quote.receiver_account_id != receiver.pk
+        or quote.source_amount != amount
+        or quote.source_currency != sender.currency
+        or quote.target_currency != receiver.currency
+    ):
+        raise TransactionError(_("This quote does not match the transfer."))
+    return quote
+
+
+def transfer(
+    sender_account: BankAccount,
+    receiver_account: BankAccount,
+    amount,
+    performed_by=None,
+    description=None,
+    quote=None,
+):
+    amount = normalize_amount(amount)
+
+    if sender_account.pk == receiver_account.pk:
+        raise TransactionError(_("You cannot transfer to the same account."))
+
+    with transaction.atomic():
+        locked = lock_accounts(sender_account.pk, receiver_account.pk)
+        sender = locked[sender_account.pk]
+        receiver = locked[receiver_account.pk]
+
+        if sender.account_status != BankAccount.AccountStatus.ACTIVE:
+            raise InactiveAccountError(_("The sender account is not active."))
+        credit_amount = amount
+        if sender.currency != receiver.currency:
+            quote = _claim_quote(quote, sender, receiver, amount)
+            credit_amount = quote.target_amount
+        if not shards.is_sharded(sender) and sender.account_balance < amount:
+            raise InsufficientFundsError(_("Insufficient funds."))
+
+        movements = [(sender, -amount), (receiver, credit_amount)]
+        for account, delta in sorted(movements, key=lambda m: m[0].pk):
+            _move(account, delta)
+
+        txn = Transaction.objects.create(
+            user=performed_by,
+            amount=amount,
+            description=description,
+            sender=sender.user,
+            receiver=receiver.user,
+            sender_account=sender,
+            receiver_account=receiver,
+            status=Transaction.TransactionStatus.COMPLETED,
+            transaction_type=Transaction.TransactionType.TRANSFER,
+        )
+        if sender.currency == receiver.currency:
+            sender_entry, receiver_entry = ledger.post(
+                txn, ledger.debit(sender, amount), ledger.credit(receiver, amount)
+            )
+        else:
+            # The FX settlement account buys the source currency and sells the
+            # target currency, so each currency balances on its own.
+            settlement = LedgerEntry.LedgerAccount.FX_SETTLEMENT
+            sender_entry, _bought, _sold, receiver_entry = ledger.post(
+                txn,
+                ledger.debit(sender, amount),
+                ledger.credit(None, amount, settlement),
+                ledger.debit(None, credit_amount, settlement),
+                ledger.credit(receiver, credit_amount),
+            )
+            FXQuote.objects.filter(pk=quote.pk).update(transaction=txn)
+        _checkpoint_if_due(sender, sender_entry)
+        _checkpoint_if_due(receiver, receiver_entry)
+
+        outbox.publish(
+            "accounts.transfer_email",
+            sender_name=sender.user.full_name,
+            sender_email=sender.user.email,
+            receiver_name=receiver.user.full_name,
+            receiver_email=receiver.user.email,
+            amount=amount,
+            currency=sender.get_currency_display(),
+            sender_new_balance=_new_balance(sender),
+            receiver_new_balance=_new_balance(receiver),
+            sender_account_number=sender.account_number,
+            receiver_account_number=receiver.account_number,
+        )
+        outbox.publish("accounts.monitor", transaction_ids=[txn.pk])
+
+    logger.info(
+        f"Transfer of {amount} from {sender.account_number} to "
+        f"{receiver.account_number} completed"
+    )
+    return txn
+
+
+def add_per_account(field, amounts, output_field):
+    return F(field) + Case(
+        *[When(pk=pk, then=Value(amount)) for pk, amount in amounts.items()],
+        output_field=output_field,
+    )
+
+
+def _failed_line(index, number, error):
+    return {
+        "line": index,
+        "receiver_account": number,
+        "status": "failed",
+        "error": str(error),
+    }
+
+
+def bulk_transfer(sender_account: BankAccount, lines, performed_by=None):
+    results = [None] * len(lines)
+    accepted = []
+
+    for index, line in enumerate(lines):
+        number = str(line.get("receiver_account") or "").strip()
+        try:
+            amount = normalize_amount(line.get("amount"))
+            description = normalize_description(line.get("description"))
+        except TransactionError as e:
+            results[index] = _failed_line(index, number, e)
+            continue
+        accepted.append((index, number, amount, description))
+
+    receivers = {}
+    for chunk in chunked(list({number for _i, number, _a, _d in accepted})):
+        receivers.update(
+            BankAccount.objects.filter(account_number__in=chunk)
+            .only("pk", "account_number", "currency", "user_id")
+            .in_bulk(field_name="account_number")
+        )
+
+    valid = []
+    for index, number, amount, description in accepted:
+        receiver = receivers.get(number)
+        error = None
+        if receiver is None:
+            error = _("Invalid account number.")
+        elif receiver.pk == sender_account.pk:
+            error = _("You cannot transfer to the same account.")
+        elif receiver.currency != sender_account.currency:
+            error = _(
+                "Transfers are only allowed between accounts of the same currency."
+            )
+        if error:
+            results[index] = _failed_line(index, number, error)
+            continue
+        valid.append((index, receiver, amount, description))
+
+    total = sum((amount for _i, _r, amount, _d in valid), Decimal("0.00"))
+
+    with transaction.atomic():
+        # The sender and every receiver are locked together, in primary key
+        # order, once for the whole batch.
+        locked = lock_accounts(
+            sender_account.pk, *{receiver.pk for _i, receiver, _a, _d in valid}
+        )
+        sender = locked[sender_account.pk]
+
+        if sender.account_status != BankAccount.AccountStatus.ACTIVE:
+            raise InactiveAccountError(_("The sender account is not active."))
+        if not shards.is_sharded(sender) and sender.account_balance < total:
+            raise InsufficientFundsError(
+                _("Insufficient funds to cover the valid lines of this batch.")
+            )
+
+        credited = {}
+        credit_counts = {}
+        for _i, receiver, amount, _d in valid:
+            credited[receiver.pk] = credited.get(receiver.pk, Decimal("0.00")) + amount
+            credit_counts[receiver.pk] = credit_counts.get(receiver.pk, 0) + 1
+        plain = [pk for pk in credited if not shards.is_sharded(locked[pk])]
+
+        # Balances move before the ledger is written: locked rows first, then
+        # the shards of sharded accounts in primary key order.
+        if valid and not shards.is_sharded(sender):
+            _move(sender, -total, entries=len(valid))
+
+        # One UPDATE per chunk of receivers, each row picking its own credit
+        # total out of a CASE expression.
+        for chunk in chunked(plain, 500):
+            amounts = {pk: credited[pk] for pk in chunk}
+            counts = {pk: credit_counts[pk] for pk in chunk}
+            BankAccount.objects.filter(pk__in=chunk).update(
+                account_balance=add_per_account(
+                    "account_balance",
+                    amounts,
+                    DecimalField(max_digits=12, decimal_places=2),
+                ),
+                entries_since_checkpoint=add_per_account(
+                    "entries_since_checkpoint", counts, IntegerField()
+                ),
+            )
+        for pk in plain:
+            locked[pk].account_balance += credited[pk]
+            locked[pk].entries_since_checkpoint += credit_counts[pk]
+
+        movements = [
+            (locked[pk], amount)
+            for pk, amount in credited.items()
+            if shards.is_sharded(locked[pk])
+        ]
+        if valid and shards.is_sharded(sender):
+            movements.append((sender, -total))
+        for account, delta in sorted(movements, key=lambda m: m[0].pk):
+            _move(account, delta)
+
+        txns = [
+            Transaction(
+                user=performed_by,
+                amount=amount,
+                description=description,
+                sender_id=sender.user_id,
+                receiver_id=receiver.user_id,
+                sender_account=sender,
+                receiver_account_id=receiver.pk,
+                status=Transaction.TransactionStatus.COMPLETED,
+                transaction_type=Transaction.TransactionType.TRANSFER,
+            )
+            for _i, receiver, amount, description in valid
+        ]
+        Transaction.objects.bulk_create(txns, batch_size=BULK_CHUNK_SIZE)
+
+        entries = ledger.post_many(
+            [
+                (
+                    txn,
+                    (
+                        ledger.debit(sender, txn.amount),
+                        ledger.credit(locked[txn.receiver_account_id], txn.amount),
+                    ),
+                )
+                for txn in txns
+            ],
+            batch_size=BULK_CHUNK_SIZE,
+        )
+
+        last_entries = {entry.account_id: entry for entry in entries}
+        if txns:
+            _checkpoint_if_due(sender, last_entries[sender.pk])
+        for pk in credited:
+            _checkpoint_if_due(locked[pk], last_entries[pk])
+
+        if txns:
+            outbox.publish(
+                "accounts.monitor", transaction_ids=[txn.pk for txn in txns]
+            )
+
+    for txn, (index, receiver, amount, _d) in zip(txns, valid):
+        results[index] = {
+            "line": index,
+            "receiver_account": receiver.account_number,
+            "amount": str(amount),
+            "status": "completed",
+            "transaction_id": str(txn.id),
+        }
+
+    logger.info(
+        f"Bulk transfer of {total} from {sender.account_number} completed: "
+        f"{len(txns)} credited, {len(lines) - len(txns)} failed"
+    )
+    return {
+        "completed": len(txns),
+        "failed": len(lines) - len(txns),
+        "total_amount": str(total),
+        "results": results,
+    }
@@ -0,0 +1,112 @@
+import random
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from loguru import logger
+
+from .models import BalanceCheckpoint, BalanceShard, BankAccount, LedgerEntry
+
+# A hot account spreads its balance over several rows. A credit picks one row
+# at random and a debit takes the first row that covers it, so concurrent
+# postings to the account mostly lock different rows and never its
+# BankAccount row. Postings do not touch account_balance or the checkpoint
+# counter; consolidate() folds the shards back in and writes the checkpoint.
+# Postings must move the shards before writing their ledger entries, so a
+# consolidation waiting on the shard locks never misses an entry.
+
+
+def is_sharded(account: BankAccount) -> bool:
+    return account.shard_count > 0
+
+
+def balance(account: BankAccount) -> Decimal:
+    total = account.balance_shards.aggregate(total=Sum("balance"))["total"]
+    return Decimal(total or 0).quantize(Decimal("0.01"))
+
+
+def credit(account: BankAccount, amount: Decimal):
+    BalanceShard.objects.filter(
+        account_id=account.pk, shard_no=random.randrange(account.shard_count)
+    ).update(balance=F("balance") + amount)
+
+
+def debit(account: BankAccount, amount: Decimal) -> bool:
+    start = random.randrange(account.shard_count)
+    for offset in range(account.shard_count):
+        shard_no = (start + offset) % account.shard_count
+        if BalanceShard.objects.filter(
+            account_id=account.pk, shard_no=shard_no, balance__gte=amount
+        ).update(balance=F("balance") - amount):
+            return True
+
+    # No single shard covers the amount: lock them all, in shard order, and
+    # draw it from several.
+    shards = list(
+        BalanceShard.objects.select_for_update()
+        .filter(account_id=account.pk)
+        .order_by("shard_no")
+    )
+    if sum(shard.balance for shard in shards) < amount:
+        return False
+    remaining = amount
+    for shard in sorted(shards, key=lambda shard: shard.balance, reverse=True):
+        take = min(shard.balance, remaining)
+        if take > 0:
+            BalanceShard.objects.filter(pk=shard.pk).update(
+                balance=F("balance") - take
+            )
+            remaining -= take
+        if not remaining:
+            break
+    return True
+
+
+def enable(account: BankAccount, shard_count: int) -> BankAccount:
+    with transaction.atomic():
+        account = BankAccount.objects.select_for_update().get(pk=account.pk)
+        if account.shard_count:
+            raise ValueError(f"{account.account_number} is already sharded")
+        BalanceShard.objects.bulk_create(
+            [
+                BalanceShard(
+                    account=account,
+                    shard_no=shard_no,
+                    balance=account.account_balance if shard_no == 0 else 0,
+                )
+                for shard_no in range(shard_count)
+            ]
+        )
+        account.shard_count = shard_count
+        account.save(update_fields=["shard_count", "updated_at"])
+    logger.info(f"Balance of {account.account_number} split into {shard_count} shards")
+    return account
+
+
+def consolidate(account: BankAccount):
+    with transaction.atomic():
+        account = BankAccount.objects.select_for_update().get(pk=account.pk)
+        # Holding every shard means each committed posting is in the sum and
+        # every later one will get a higher ledger id than `last`.
+        shards = list(
+            BalanceShard.objects.select_for_update()
+            .filter(account_id=account.pk)
+            .order_by("shard_no")
+        )
+        total = sum((shard.balance for shard in shards), Decimal("0.00"))
+        last = LedgerEntry.objects.filter(account=account).order_by("-id").first()
+        if last and not BalanceCheckpoint.objects.filter(entry=last).exists():
+            BalanceCheckpoint.objects.create(
+                account=account, entry=last, balance=total, as_of=last.created_at
+            )
+        BankAccount.objects.filter(pk=account.pk).update(
+            account_balance=total, entries_since_checkpoint=0
+        )
+    return total
+
+
+def consolidate_all():
+    accounts = list(BankAccount.objects.filter(shard_count__gt=0).only("pk"))
+    for account in accounts:
+        consolidate(account)
+    return len(accounts)
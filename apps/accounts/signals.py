@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.settings.base import AUTH_USER_MODEL
+from apps.accounts.lookup import invalidate_names
+from apps.accounts.models import BankAccount
+
+NAME_FIELDS = {"first_name", "last_name"}
+
+
+@receiver(post_save, sender=BankAccount)
+@receiver(post_delete, sender=BankAccount)
+def invalidate_account_name(sender, instance, **kwargs):
+    # Invalidated again after commit so a read racing the write cannot put the
+    # old row back into the cache for a full TTL.
+    numbers = [instance.account_number]
+    invalidate_names(numbers)
+    transaction.on_commit(lambda: invalidate_names(numbers))
+
+
+@receiver(post_save, sender=AUTH_USER_MODEL)
+def invalidate_owner_names(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and not NAME_FIELDS & set(update_fields):
+        return
+    numbers = list(instance.bank_accounts.values_list("account_number", flat=True))
+    invalidate_names(numbers)
+    transaction.on_commit(lambda: invalidate_names(numbers))
@@ -0,0 +1,257 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from . import ledger
+from .models import (
+    AccountBalanceSnapshot,
+    BalanceCheckpoint,
+    BankAccount,
+    LedgerEntry,
+    RollupWatermark,
+)
+
+ROLLUP_NAME = "balance-snapshots"
+ROLLUP_BATCH_SIZE = 50_000
+ROLLUP_ACCOUNT_CHUNK = 500
+# Ledger ids are handed out before the posting commits, so a freshly committed
+# entry can carry a lower id than one already visible. Entries younger than this
+# are left for the next run instead of being skipped past by the watermark.
+ROLLUP_SETTLE_DELAY = timedelta(minutes=2)
+
+ZERO = Decimal("0.00")
+
+
+def _money(value) -> Decimal:
+    return Decimal(value or 0).quantize(Decimal("0.01"))
+
+
+def _day_start(day):
+    return timezone.make_aware(
+        datetime.combine(day, time.min), timezone.get_current_timezone()
+    )
+
+
+def _daily_movements(after_id, upto_id):
+    rows = (
+        LedgerEntry.objects.filter(
+            id__gt=after_id, id__lte=upto_id, account__isnull=False
+        )
+        .annotate(day=TruncDate("created_at"))
+        .values("account_id", "day")
+        .annotate(
+            credits=Sum(
+                Case(
+                    When(entry_type=LedgerEntry.EntryType.CREDIT, then=F("amount")),
+                    default=ZERO,
+                )
+            ),
+            debits=Sum(
+                Case(
+                    When(entry_type=LedgerEntry.EntryType.DEBIT, then=F("amount")),
+                    default=ZERO,
+                )
+            ),
+            count=Count("id"),
+        )
+        .order_by()
+    )
+    movements = defaultdict(dict)
+    for row in rows:
+        movements[row["account_id"]][row["day"]] = (
+            _money(row["credits"]),
+            _money(row["debits"]),
+            row["count"],
+        )
+    return movements
+
+
+def _apply(movements):
+    first_day = min(day for days in movements.values() for day in days)
+    accounts = BankAccount.objects.filter(pk__in=movements).annotate(
+        opened_on=_opened_on(),
+        previous_closing=Subquery(
+            AccountBalanceSnapshot.objects.filter(
+                account=OuterRef("pk"),
+                date__lt=first_day,
+                date__gt=OuterRef("opened_on"),
+            )
+            .order_by("-date")
+            .values("closing_balance")[:1]
+        )
+    )
+    existing = defaultdict(dict)
+    for snapshot in AccountBalanceSnapshot.objects.filter(
+        account_id__in=movements, date__gte=first_day
+    ):
+        existing[snapshot.account_id][snapshot.date] = snapshot
+
+    to_create, to_update = [], []
+    for account in accounts:
+        days = movements[account.pk]
+        snapshots = existing[account.pk]
+        running = account.previous_closing
+
+        # Every snapshot from the first touched day on is walked in order, so a
+        # late entry on an older day also moves the balances of the days after.
+        previous = None
+        for day in sorted(set(days) | set(snapshots)):
+            if running is None or (previous and previous <= account.opened_on < day):
+                # Start from the ledger, which also picks up a balance restated
+                # by an opening checkpoint on a day since the last one walked.
+                running = ledger.balance_at(account, _day_start(day))
+            previous = day
+            credits, debits, count = days.get(day, (ZERO, ZERO, 0))
+            snapshot = snapshots.get(day)
+            if snapshot is None:
+                snapshot = AccountBalanceSnapshot(account=account, date=day)
+                snapshot.total_credits = snapshot.total_debits = ZERO
+                snapshot.entry_count = 0
+                to_create.append(snapshot)
+            else:
+                to_update.append(snapshot)
+            snapshot.opening_balance = running
+            snapshot.total_credits += credits
+            snapshot.total_debits += debits
+            snapshot.entry_count += count
+            snapshot.closing_balance = (
+                running + snapshot.total_credits - snapshot.total_debits
+            )
+            running = snapshot.closing_balance
+
+    AccountBalanceSnapshot.objects.bulk_create(to_create, batch_size=1000)
+    AccountBalanceSnapshot.objects.bulk_update(
+        to_update,
+        [
+            "opening_balance",
+            "closing_balance",
+            "total_credits",
+            "total_debits",
+            "entry_count",
+        ],
+        batch_size=1000,
+    )
+
+
+def settled_upto(after_id, batch_size):
+    # The last id of the next batch of settled entries after the watermark.
+    settled = LedgerEntry.objects.filter(
+        id__gt=after_id,
+        created_at__lte=timezone.now() - ROLLUP_SETTLE_DELAY,
+    ).order_by("id")
+    ids = settled.values_list("id", flat=True)
+    return ids[batch_size - 1 : batch_size].first() or ids.last()
+
+
+def rollup(batch_size=ROLLUP_BATCH_SIZE) -> int:
+    with transaction.atomic():
+        # The row lock keeps two workers from rolling up the same range.
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+            name=ROLLUP_NAME
+        )
+        upto_id = settled_upto(watermark.last_entry_id, batch_size)
+        if upto_id is None:
+            return 0
+
+        processed = LedgerEntry.objects.filter(
+            id__gt=watermark.last_entry_id, id__lte=upto_id
+        ).count()
+        movements = _daily_movements(watermark.last_entry_id, upto_id)
+        account_ids = sorted(movements)
+        for i in range(0, len(account_ids), ROLLUP_ACCOUNT_CHUNK):
+            chunk = account_ids[i : i + ROLLUP_ACCOUNT_CHUNK]
+            _apply({pk: movements[pk] for pk in chunk})
+
+        watermark.last_entry_id = upto_id
+        watermark.save(update_fields=["last_entry_id", "updated_at"])
+    return processed
+
+
+def _opening_checkpoints(day_end=None):
+    # Opening checkpoints (migration 0002, legacy imports) restate a balance
+    # that history loaded behind them does not add up to, so snapshots up to
+    # the day an account was opened this way do not count.
+    checkpoints = BalanceCheckpoint.objects.filter(entry__isnull=True)
+    if day_end:
+        checkpoints = checkpoints.filter(as_of__lt=day_end)
+    return checkpoints.order_by("-as_of")
+
+
+def _opened_on(day_end=None):
+    # For BankAccount querysets: the local date of the account's last opening
+    # checkpoint, or date.min.
+    return Coalesce(
+        TruncDate(
+            Subquery(
+                _opening_checkpoints(day_end)
+                .filter(account=OuterRef("pk"))
+                .values("as_of")[:1]
+            )
+        ),
+        Value(date.min),
+    )
+
+
+def closing_balance(account: BankAccount, day) -> Decimal:
+    # One lookup on the (account, date) unique index. Days after the last rollup
+    # fall back to the ledger.
+    day_end = _day_start(day + timedelta(days=1))
+    snapshots = AccountBalanceSnapshot.objects.filter(account=account, date__lte=day)
+    opened = (
+        _opening_checkpoints(day_end)
+        .filter(account=account)
+        .values_list("as_of", flat=True)
+        .first()
+    )
+    if opened:
+        snapshots = snapshots.filter(date__gt=timezone.localdate(opened))
+    snapshot = snapshots.order_by("-date").first()
+    watermark = RollupWatermark.objects.filter(name=ROLLUP_NAME).first()
+    if watermark and snapshot:
+        newer = LedgerEntry.objects.filter(
+            account=account,
+            id__gt=watermark.last_entry_id,
+            created_at__lt=day_end,
+        )
+        if not newer.exists():
+            return snapshot.closing_balance
+    return ledger.balance_at(account, day_end)
+
+
+def closing_balances(accounts, day) -> dict:
+    # closing_balance for many accounts at once. While the rollup has covered
+    # the whole day, one query answers every account that has a snapshot; the
+    # rest go through closing_balance one by one.
+    accounts = list(accounts)
+    day_end = _day_start(day + timedelta(days=1))
+    watermark = RollupWatermark.objects.filter(name=ROLLUP_NAME).first()
+    balances = {}
+    if watermark and not LedgerEntry.objects.filter(
+        id__gt=watermark.last_entry_id, created_at__lt=day_end
+    ).exists():
+        balances = dict(
+            BankAccount.objects.filter(pk__in=[account.pk for account in accounts])
+            .annotate(
+                opened_on=_opened_on(day_end),
+                closing=Subquery(
+                    AccountBalanceSnapshot.objects.filter(
+                        account=OuterRef("pk"),
+                        date__lte=day,
+                        date__gt=OuterRef("opened_on"),
+                    )
+                    .order_by("-date")
+                    .values("closing_balance")[:1]
+                )
+            )
+            .filter(closing__isnull=False)
+            .values_list("pk", "closing")
+        )
+    for account in accounts:
+        if account.pk not in balances:
+            balances[account.pk] = closing_balance(account, day)
+    return balances
@@ -0,0 +1,218 @@
+import csv
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from . import ledger
+from .archive import ArchiveReader
+from .models import BankAccount, LedgerEntry, Transaction
+
+STATEMENT_CHUNK_SIZE = 2000
+
+CSV_HEADER = ["Date", "Reference", "Type", "Description", "Debit", "Credit", "Balance"]
+
+
+def period_bounds(start, end):
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def statement_rows(account: BankAccount, start, end):
+    period_start, period_end = period_bounds(start, end)
+
+    # The opening balance comes from the nearest checkpoint, and every row after
+    # it only adds to a running total, so memory stays flat for any period.
+    balance = ledger.balance_at(account, period_start)
+    yield None, None, None, "Opening balance", None, None, balance
+
+    entries = (
+        LedgerEntry.objects.filter(
+            account=account,
+            created_at__gt=period_start,
+            created_at__lte=period_end,
+        )
+        .order_by("id")
+        .iterator(chunk_size=STATEMENT_CHUNK_SIZE)
+    )
+    # Transactions are looked up per chunk rather than joined, because months
+    # moved to the archive no longer have rows while their ledger legs stay.
+    archived = None
+    for chunk in _batches(entries, STATEMENT_CHUNK_SIZE):
+        details = {
+            pk: (kind, description)
+            for pk, kind, description in Transaction.objects.filter(
+                pk__in={entry.transaction_id for entry in chunk}
+            ).values_list("id", "transaction_type", "description")
+        }
+        for entry in chunk:
+            debit = credit = None
+            if entry.entry_type == LedgerEntry.EntryType.CREDIT:
+                credit = entry.amount
+                balance += entry.amount
+            else:
+                debit = entry.amount
+                balance -= entry.amount
+            if entry.transaction_id not in details:
+                if archived is None:
+                    archived = ArchiveReader(account.pk)
+                row = archived.get(entry.transaction_id, entry.created_at) or {}
+                details[entry.transaction_id] = (
+                    row.get("transaction_type"),
+                    row.get("description"),
+                )
+            kind, description = details[entry.transaction_id]
+            yield (
+                timezone.localtime(entry.created_at),
+                entry.transaction_id,
+                str(Transaction.TransactionType(kind).label) if kind else "",
+                description or "",
+                debit,
+                credit,
+                balance,
+            )
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+def stream_csv(account: BankAccount, start, end):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for row in statement_rows(account, start, end):
+        yield writer.writerow([_cell(value) for value in row])
+
+
+class PDFWriter:
+    # A minimal text-only PDF writer. Pages are flushed to the file as soon as
+    # they are full, so only the object offsets are kept in memory.
+    page_width = 612
+    page_height = 792
+    font_size = 8
+    leading = 11
+    margin = 36
+
+    def __init__(self, fileobj):
+        self.file = fileobj
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 4
+        self.lines = []
+        self.file.write(b"%PDF-1.4\n")
+        self._write_object(
+            3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>"
+        )
+
+    @property
+    def lines_per_page(self):
+        return (self.page_height - 2 * self.margin) // self.leading
+
+    def _write_object(self, obj_id, body: bytes):
+        self.offsets[obj_id] = self.file.tell()
+        self.file.write(f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    @staticmethod
+    def _escape(text):
+        text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        return text.encode("latin-1", "replace")
+
+    def add_line(self, text):
+        self.lines.append(text)
+        if len(self.lines) >= self.lines_per_page:
+            self.flush_page()
+
+    def flush_page(self):
+        if not self.lines:
+            return
+        top = self.page_height - self.margin
+        content = [
+            f"BT /F1 {self.font_size} Tf {self.leading} TL "
+            f"{self.margin} {top} Td".encode()
+        ]
+        for line in self.lines:
+            content.append(b"(" + self._escape(line) + b") Tj T*")
+        content.append(b"ET")
+        stream = b"\n".join(content)
+
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._write_object(
+            content_id,
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream",
+        )
+        self._write_object(
+            page_id,
+            (
+                f"<< /Type /Page /Parent 2 0 R "
+                f"/MediaBox [0 0 {self.page_width} {self.page_height}] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+            ).encode(),
+        )
+        self.page_ids.append(page_id)
+        self.lines = []
+
+    def close(self):
+        self.flush_page()
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._write_object(
+            2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode()
+        )
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self.file.tell()
+        size = self.next_id
+        self.file.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for obj_id in range(1, size):
+            self.file.write(f"{self.offsets[obj_id]:010d} 00000 n \n".encode())
+        self.file.write(
+            f"trailer\n<< /Size {size} /Root 1 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n".encode()
+        )
+
+
+def _amount(value):
+    return f"{value:,.2f}" if isinstance(value, Decimal) else ""
+
+
+def write_pdf(account: BankAccount, start, end, fileobj):
+    pdf = PDFWriter(fileobj)
+    pdf.add_line(f"Account statement - {account.account_number}")
+    pdf.add_line(f"{account.user.full_name} - {account.get_currency_display()}")
+    pdf.add_line(f"Period: {start:%Y-%m-%d} to {end:%Y-%m-%d}")
+    pdf.add_line("")
+    pdf.add_line(
+        f"{'Date':<19}  {'Type':<10}  {'Description':<24}  "
+        f"{'Debit':>14}  {'Credit':>14}  {'Balance':>14}"
+    )
+    for when, _ref, kind, description, debit, credit, balance in statement_rows(
+        account, start, end
+    ):
+        pdf.add_line(
+            f"{_cell(when):<19}  {(kind or ''):<10.10}  {description:<24.24}  "
+            f"{_amount(debit):>14}  {_amount(credit):>14}  {_amount(balance):>14}"
+        )
+    pdf.close()
@@ -0,0 +1,197 @@
+import tempfile
+import time
+from datetime import date, timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from loguru import logger
+
+from . import (
+    analytics,
+    interest,
+    monitoring,
+    numbering,
+    partitions,
+    reconciliation,
+    scheduling,
+    shards,
+    snapshots,
+)
+from .emails import send_full_activation_emails, send_suspicious_activity_alert
+from .models import BankAccount
+from .services import chunked
+from .statements import write_pdf
+
+ACTIVATION_EMAIL_BATCH = 200
+
+
+def statement_pdf_path(account: BankAccount, start: date, end: date) -> str:
+    return f"statements/{account.pk}/{start:%Y%m%d}-{end:%Y%m%d}.pdf"
+
+
+@shared_task
+def generate_statement_pdf(account_id, start, end):
+    account = BankAccount.objects.select_related("user").get(pk=account_id)
+    start, end = date.fromisoformat(start), date.fromisoformat(end)
+    path = statement_pdf_path(account, start, end)
+
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            write_pdf(account, start, end, tmp)
+            tmp.seek(0)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            default_storage.save(path, File(tmp))
+        logger.info(f"Statement {path} generated")
+    finally:
+        cache.delete(f"statement-pdf:{path}")
+    return path
+
+
+@shared_task
+def rollup_balance_snapshots():
+    # Only ledger entries past the watermark are read, so a run costs what was
+    # posted since the previous one rather than what is in the table.
+    total = 0
+    while True:
+        processed = snapshots.rollup()
+        total += processed
+        if processed < snapshots.ROLLUP_BATCH_SIZE:
+            break
+    logger.info(f"Rolled {total} ledger entries into balance snapshots")
+    return total
+
+
+@shared_task
+def rollup_monthly_activity():
+    total = 0
+    while True:
+        processed = analytics.rollup()
+        total += processed
+        if processed < analytics.ROLLUP_BATCH_SIZE:
+            break
+    logger.info(f"Rolled {total} ledger entries into monthly account activity")
+    return total
+
+
+@shared_task
+def accrue_interest(accrual_date=None):
+    # Runs after midnight for the day that just closed. Calling it again for the
+    # same date only re-dispatches the chunks that have not completed.
+    if accrual_date:
+        accrual_date = date.fromisoformat(accrual_date)
+    else:
+        accrual_date = timezone.localdate() - timedelta(days=1)
+    run = interest.plan_run(accrual_date)
+    chunk_ids = list(interest.pending_chunks(run).values_list("pk", flat=True))
+    for chunk_id in chunk_ids:
+        accrue_interest_chunk.delay(str(chunk_id))
+    logger.info(f"Dispatched {len(chunk_ids)} interest chunks for {accrual_date}")
+    return len(chunk_ids)
+
+
+@shared_task(bind=True, max_retries=3)
+def accrue_interest_chunk(self, chunk_id):
+    try:
+        chunk = interest.accrue_chunk(chunk_id)
+    except Exception as e:
+        interest.record_failure(chunk_id, e)
+        logger.error(f"Interest chunk {chunk_id} failed: {str(e)}")
+        raise self.retry(exc=e, countdown=60)
+    return chunk.accounts_credited
+
+
+@shared_task
+def send_suspicious_activity_alerts():
+    # Everything flagged since the last run goes out in one email per batch.
+    sent = 0
+    while True:
+        alerts = monitoring.pop_alerts(settings.SUSPICIOUS_ACTIVITY_ALERT_BATCH)
+        if not alerts:
+            break
+        if not send_suspicious_activity_alert(alerts):
+            monitoring.requeue_alerts(alerts)
+            break
+        sent += len(alerts)
+    return sent
+
+
+@shared_task
+def refill_account_number_pool():
+    return numbering.refill_all()
+
+
+@shared_task
+def consolidate_sharded_balances():
+    # Folds each sharded account's sub-balances back into account_balance and
+    # checkpoints the ledger at that point.
+    return shards.consolidate_all()
+
+
+@shared_task
+def send_activation_emails(account_ids):
+    sent = 0
+    for chunk in chunked(account_ids, ACTIVATION_EMAIL_BATCH):
+        accounts = BankAccount.objects.select_related("user").filter(pk__in=chunk)
+        sent += send_full_activation_emails(accounts)
+    logger.info(f"Sent {sent} of {len(account_ids)} account activation emails")
+    return sent
+
+
+@shared_task
+def reconcile_ledger():
+    run = reconciliation.plan_run()
+    chunk_ids = list(reconciliation.pending_chunks(run).values_list("pk", flat=True))
+    for chunk_id in chunk_ids:
+        reconcile_ledger_chunk.delay(str(chunk_id))
+    logger.info(f"Dispatched {len(chunk_ids)} reconciliation chunks for run {run.pk}")
+    return str(run.pk)
+
+
+@shared_task(bind=True, max_retries=3)
+def reconcile_ledger_chunk(self, chunk_id):
+    try:
+        chunk = reconciliation.reconcile_chunk(chunk_id)
+    except Exception as e:
+        reconciliation.record_failure(chunk_id, e)
+        logger.error(f"Reconciliation chunk {chunk_id} failed: {str(e)}")
+        raise self.retry(exc=e, countdown=60)
+    return chunk.discrepancy_count
+
+
+@shared_task
+def maintain_transaction_partitions():
+    # Keeps the next few months of transaction partitions in place so inserts
+    # never fall through to the default partition. A no-op off PostgreSQL.
+    created = partitions.ensure_partitions()
+    return [f"{month:%Y-%m}" for month in created]
+
+
+@shared_task
+def dispatch_scheduled_transfers():
+    # One beat entry for every schedule: when anything is due, a fixed number of
+    # workers is started and they share the due schedules between them.
+    if not scheduling.has_due():
+        return 0
+    for _worker in range(scheduling.WORKERS):
+        run_scheduled_transfers.delay()
+    return scheduling.WORKERS
+
+
+@shared_task
+def run_scheduled_transfers():
+    paid = claimed = 0
+    deadline = time.monotonic() + scheduling.WORKER_SECONDS
+    while time.monotonic() < deadline:
+        schedule_ids, lease = scheduling.claim()
+        claimed += len(schedule_ids)
+        paid += sum(scheduling.execute(pk, lease) for pk in schedule_ids)
+        if len(schedule_ids) < scheduling.CLAIM_BATCH_SIZE:
+            break
+    if claimed:
+        logger.info(f"Paid {paid} of {claimed} claimed scheduled transfers")
+    return paid
@@ -1,3 +1,1317 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.common import outbox
+from apps.common.models import OutboxMessage
+from apps.common.replicas import replica_reads
+from apps.userauth import otp as otp_service
+
+from . import (
+    analytics,
+    archive,
+    fx,
+    importer,
+    interest,
+    ledger,
+    lookup,
+    luhn,
+    monitoring,
+    numbering,
+    partitions,
+    reconciliation,
+    scheduling,
+    services,
+    shards,
+    snapshots,
+    statements,
+)
+from .models import (
+    AvailableAccountNumber,
+    BalanceCheckpoint,
+    BankAccount,
+    FXQuote,
+    FXRateSnapshot,
+    LedgerEntry,
+    MonthlyAccountActivity,
+    ReconciliationDiscrepancy,
+    ScheduledTransfer,
+    Transaction,
+)
+
+User = get_user_model()
+
+
+def make_user(number):
+    return User.objects.create(
+        username=number,
+        email=f"{number}@example.com",
+        first_name="Test",
+        last_name=number,
+        id_no=int(number),
+        security_question="birth_city",
+        security_answer="lagos",
+    )
+
+
+def make_account(number, balance="0.00", currency=BankAccount.AccountCurrency.NAIRA):
+    return BankAccount.objects.create(
+        user=make_user(number),
+        account_number=number,
+        currency=currency,
+        account_type=BankAccount.AccountType.CURRENT,
+        account_status=BankAccount.AccountStatus.ACTIVE,
+        account_balance=Decimal(balance),
+    )
+
+
+@override_settings(OUTBOX_PUBLISH=False)
+class ConcurrentTransferTests(TransactionTestCase):
+    def test_concurrent_transfers_between_hot_accounts(self):
+        accounts = [make_account(f"100000010{i}") for i in range(4)]
+        for account in accounts:
+            services.deposit(account, 1000)
+
+        def worker(offset):
+            # Every thread walks the accounts in a different direction, so
+            # transfers lock the same rows from both sides.
+            done = rejected = 0
+            try:
+                for i in range(25):
+                    sender = accounts[(offset + i) % 4]
+                    receiver = accounts[(offset + i + 1 + offset % 2) % 4]
+                    try:
+                        services.transfer(sender, receiver, (i % 7 + 1) * 10)
+                        done += 1
+                    except services.InsufficientFundsError:
+                        rejected += 1
+            finally:
+                connection.close()
+            return done, rejected
+
+        # A deadlock or lock timeout surfaces here as an OperationalError.
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            outcomes = list(executor.map(worker, range(8)))
+
+        self.assertEqual(sum(done + rejected for done, rejected in outcomes), 200)
+        transfers = Transaction.objects.filter(
+            transaction_type=Transaction.TransactionType.TRANSFER
+        )
+        self.assertEqual(transfers.count(), sum(done for done, _r in outcomes))
+        for account in accounts:
+            account.refresh_from_db()
+            sent = transfers.filter(sender_account=account).aggregate(t=Sum("amount"))
+            received = transfers.filter(receiver_account=account).aggregate(
+                t=Sum("amount")
+            )
+            expected = Decimal(1000) - (sent["t"] or 0) + (received["t"] or 0)
+            self.assertEqual(account.account_balance, expected)
+            self.assertEqual(ledger.balance_at(account), expected)
+            self.assertGreaterEqual(account.account_balance, 0)
+        self.assertEqual(
+            sum(account.account_balance for account in accounts), Decimal(4000)
+        )
+
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "redis": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shared",
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NameEnquiryTests(TestCase):
+    def setUp(self):
+        lookup._shared_skip_until = 0.0
+        for alias in LOCMEM_CACHES:
+            caches[alias].clear()
+
+    def test_cache_is_filled_from_the_primary_inside_replica_reads(self):
+        account = make_account("1000000031")
+        # No such database is configured, so any query routed to it fails.
+        with replica_reads("lagging-replica"):
+            entry = lookup.name_enquiry(account.account_number)
+            self.assertIsNone(lookup.name_enquiry("1000000039"))
+        self.assertEqual(entry["account_name"], account.user.full_name)
+
+    def test_rename_replaces_the_cached_name(self):
+        account = make_account("1000000032")
+        lookup.name_enquiry(account.account_number)
+        account.user.first_name = "Renamed"
+        account.user.save()
+
+        entry = lookup.name_enquiry(account.account_number)
+        self.assertEqual(entry["account_name"], account.user.full_name)
+        self.assertEqual(
+            caches["redis"].get(lookup.name_cache_key(account.account_number)),
+            entry,
+        )
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class ArchiveTests(TestCase):
+    def setUp(self):
+        fx._table = None
+        self.addCleanup(setattr, fx, "_table", None)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(archive, "ARCHIVE_DIR", Path(tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_archiving_clears_links_to_archived_transactions(self):
+        naira, dollar = (
+            BankAccount.AccountCurrency.NAIRA,
+            BankAccount.AccountCurrency.DOLLAR,
+        )
+        sender = make_account("1000000041")
+        receiver = make_account("1000000042", currency=dollar)
+        services.deposit(sender, 5000)
+        fx.publish([(dollar, naira, "1500")])
+        quote = fx.create_quote(sender.user, sender, receiver, Decimal("3000.00"))
+        txn = services.transfer(sender, receiver, quote.source_amount, quote=quote)
+        schedule = scheduling.schedule_transfer(
+            sender.user,
+            sender,
+            make_account("1000000043"),
+            10,
+            "monthly",
+            timezone.now(),
+        )
+        ScheduledTransfer.objects.filter(pk=schedule.pk).update(last_transaction=txn)
+
+        month = partitions.add_months(partitions.month_start(timezone.localdate()), -24)
+        start, _end = partitions.month_bounds(month)
+        Transaction.objects.update(created_at=start + timedelta(days=3))
+
+        record = archive.archive_month(month)
+
+        self.assertEqual(record.row_count, 2)
+        self.assertFalse(Transaction.objects.exists())
+        quote.refresh_from_db()
+        schedule.refresh_from_db()
+        self.assertIsNone(quote.transaction_id)
+        self.assertIsNone(schedule.last_transaction_id)
+        self.assertEqual(
+            archive.ArchiveReader(sender.pk).get(txn.pk, start)["amount"], "3000.00"
+        )
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class FXRateTests(TestCase):
+    def setUp(self):
+        fx._table = None
+        self.addCleanup(setattr, fx, "_table", None)
+        caches["redis"].clear()
+
+    def test_quoted_transfer_credits_the_converted_amount_once(self):
+        naira, dollar = (
+            BankAccount.AccountCurrency.NAIRA,
+            BankAccount.AccountCurrency.DOLLAR,
+        )
+        sender = make_account("1000000111")
+        receiver = make_account("1000000112", currency=dollar)
+        services.deposit(sender, 5000)
+        fx.publish([(dollar, naira, "1500")])
+
+        with self.assertRaises(services.TransactionError):
+            services.transfer(sender, receiver, 3000)
+        quote = fx.create_quote(sender.user, sender, receiver, Decimal("3000.00"))
+        self.assertEqual(quote.target_amount, Decimal("2.00"))
+        services.transfer(sender, receiver, 3000, quote=quote)
+        with self.assertRaises(services.TransactionError):
+            services.transfer(sender, receiver, 3000, quote=quote)
+
+        sender.refresh_from_db()
+        receiver.refresh_from_db()
+        self.assertEqual(sender.account_balance, Decimal("2000.00"))
+        self.assertEqual(receiver.account_balance, Decimal("2.00"))
+        self.assertEqual(ledger.balance_at(receiver), Decimal("2.00"))
+
+    def test_expired_quote_is_refused(self):
+        naira, dollar = (
+            BankAccount.AccountCurrency.NAIRA,
+            BankAccount.AccountCurrency.DOLLAR,
+        )
+        sender = make_account("1000000113")
+        receiver = make_account("1000000114", currency=dollar)
+        services.deposit(sender, 5000)
+        fx.publish([(dollar, naira, "1500")])
+        quote = fx.create_quote(sender.user, sender, receiver, Decimal("3000.00"))
+        FXQuote.objects.filter(pk=quote.pk).update(expires_at=timezone.now())
+
+        with self.assertRaises(services.TransactionError):
+            services.transfer(sender, receiver, 3000, quote=quote)
+        receiver.refresh_from_db()
+        self.assertEqual(receiver.account_balance, Decimal("0.00"))
+
+    def test_load_fx_rates_rejects_unusable_rates(self):
+        naira, dollar = (
+            BankAccount.AccountCurrency.NAIRA,
+            BankAccount.AccountCurrency.DOLLAR,
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            for rate in ("NaN", "sNaN", "Infinity", "abc", "0", "1e12"):
+                path = Path(tmp) / "rates.csv"
+                path.write_text(f"base,quote,rate\n{dollar},{naira},{rate}\n")
+                with self.subTest(rate=rate), self.assertRaises(CommandError):
+                    call_command("load_fx_rates", str(path))
+        self.assertFalse(FXRateSnapshot.objects.exists())
+
+
+@override_settings(
+    OUTBOX_PUBLISH=False,
+    SAVINGS_INTEREST_RATES_BPS={BankAccount.AccountCurrency.NAIRA: 400},
+)
+class InterestTests(TestCase):
+    def make_savings(self, number, deposit):
+        account = make_account(number)
+        BankAccount.objects.filter(pk=account.pk).update(
+            account_type=BankAccount.AccountType.SAVINGS
+        )
+        services.deposit(account, deposit)
+        return account
+
+    def accrue(self, day):
+        run = interest.plan_run(day)
+        for chunk in interest.pending_chunks(run):
+            interest.accrue_chunk(chunk.pk)
+
+    def test_interest_is_on_the_closing_balance_of_the_accrual_date(self):
+        account = self.make_savings("1000000051", "100000.00")
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Transaction.objects.update(created_at=timezone.now() - timedelta(days=2))
+        LedgerEntry.objects.update(created_at=timezone.now() - timedelta(days=2))
+        # Money that arrived after the accrual date earns nothing for it.
+        services.deposit(account, "900000.00")
+
+        self.accrue(yesterday)
+
+        account.refresh_from_db()
+        # 100,000.00 * 4% / 365 = 10.958..., the rest carried.
+        self.assertEqual(account.account_balance, Decimal("1000010.95"))
+        self.assertEqual(account.interest_carry, 10**7 * 400 % 3_650_000)
+        self.assertFalse(reconcile().exists())
+
+    def test_sub_unit_interest_is_carried_until_it_adds_up(self):
+        account = self.make_savings("1000000052", "10.00")
+        today = timezone.localdate()
+        # 1,000 kobo at 4% is 0.1096 kobo a day: nothing for nine days, then 1.
+        for day in range(9):
+            self.accrue(today + timedelta(days=day))
+        account.refresh_from_db()
+        self.assertEqual(account.account_balance, Decimal("10.00"))
+        self.assertEqual(account.interest_carry, 9 * 1000 * 400)
+
+        self.accrue(today + timedelta(days=9))
+        account.refresh_from_db()
+        self.assertEqual(account.account_balance, Decimal("10.01"))
+        self.assertEqual(account.interest_carry, 10 * 1000 * 400 - 3_650_000)
+
+
+def reconcile():
+    run = reconciliation.plan_run()
+    for chunk in reconciliation.pending_chunks(run):
+        reconciliation.reconcile_chunk(chunk.pk)
+    return ReconciliationDiscrepancy.objects.filter(run=run)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class BulkTransferTests(TestCase):
+    def test_unusable_amounts_fail_their_line_only(self):
+        sender = make_account("2000000001")
+        receiver = make_account("2000000002")
+        services.deposit(sender, 100)
+        lines = [
+            {"receiver_account": receiver.account_number, "amount": amount}
+            for amount in ("NaN", "Infinity", "-Infinity", "1e20", "25")
+        ]
+
+        result = services.bulk_transfer(sender, lines)
+
+        self.assertEqual(result["completed"], 1)
+        self.assertEqual(result["failed"], 4)
+        self.assertEqual(
+            [line["status"] for line in result["results"]],
+            ["failed", "failed", "failed", "failed", "completed"],
+        )
+        receiver.refresh_from_db()
+        self.assertEqual(receiver.account_balance, Decimal("25.00"))
+
+    def test_bad_description_fails_its_line_only(self):
+        sender = make_account("2000000003")
+        receiver = make_account("2000000004")
+        services.deposit(sender, 100)
+        lines = [
+            {"receiver_account": receiver.account_number, "amount": 10, **extra}
+            for extra in ({"description": "x" * 501}, {"description": 5}, {})
+        ]
+
+        result = services.bulk_transfer(sender, lines)
+
+        self.assertEqual(result["completed"], 1)
+        self.assertEqual(result["failed"], 2)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class ReconciliationTests(TestCase):
+
+    def test_account_opened_before_the_ledger_is_not_a_discrepancy(self):
+        # What migration 0002 leaves behind: a balance with no ledger legs and
+        # an opening checkpoint for it.
+        account = make_account("1000000001", "500.00")
+        BalanceCheckpoint.objects.create(
+            account=account,
+            entry=None,
+            balance=account.account_balance,
+            as_of=timezone.now(),
+        )
+        services.deposit(account, 100)
+
+        self.assertEqual(ledger.balance_at(account), Decimal("600.00"))
+        self.assertFalse(reconcile().exists())
+
+    def test_balance_that_drifts_from_the_ledger_is_reported(self):
+        account = make_account("1000000002")
+        services.deposit(account, 100)
+        BankAccount.objects.filter(pk=account.pk).update(account_balance=90)
+
+        discrepancy = reconcile().get()
+        self.assertEqual(discrepancy.account_id, account.pk)
+        self.assertEqual(discrepancy.recorded_balance, Decimal("90.00"))
+        self.assertEqual(discrepancy.ledger_balance, Decimal("100.00"))
+
+
+class LegacyImportTests(TestCase):
+    def load(self, kind, rows):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / f"{kind}.csv"
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(
+                    f, fieldnames=list({k: 0 for r in rows for k in r})
+                )
+                writer.writeheader()
+                writer.writerows(rows)
+            for _progress in importer.run(kind, path):
+                pass
+
+    def test_imported_accounts_reconcile_with_their_history(self):
+        for number in ("1000000011", "1000000012"):
+            make_user(number)
+        self.load(
+            "accounts",
+            [
+                {
+                    "user_email": f"{number}@example.com",
+                    "account_number": number,
+                    "account_balance": balance,
+                    "currency": BankAccount.AccountCurrency.NAIRA,
+                    "account_type": BankAccount.AccountType.CURRENT,
+                    "account_status": BankAccount.AccountStatus.ACTIVE,
+                }
+                for number, balance in (("1000000011", "500.00"), ("1000000012", "0"))
+            ],
+        )
+        self.load(
+            "transactions",
+            [
+                {
+                    "transaction_type": Transaction.TransactionType.DEPOSIT,
+                    "amount": "100.00",
+                    "receiver_account_number": "1000000011",
+                    "created_at": "2020-01-02T10:00:00+01:00",
+                },
+                {
+                    "transaction_type": Transaction.TransactionType.TRANSFER,
+                    "amount": "250.00",
+                    "sender_account_number": "1000000011",
+                    "receiver_account_number": "1000000012",
+                    "created_at": "2020-01-03T10:00:00+01:00",
+                },
+            ],
+        )
+
+        self.assertEqual(Transaction.objects.count(), 2)
+        first, second = BankAccount.objects.order_by("account_number")
+        self.assertEqual(ledger.balance_at(first), Decimal("500.00"))
+        self.assertEqual(ledger.balance_at(second), Decimal("0.00"))
+        self.assertFalse(reconcile().exists())
+
+        # Snapshots rolled up from the backdated history stop at the opening
+        # checkpoint, so interest reads the imported balances too.
+        snapshots.rollup()
+        today = timezone.localdate()
+        expected = {first.pk: Decimal("500.00"), second.pk: Decimal("0.00")}
+        self.assertEqual(snapshots.closing_balances([first, second], today), expected)
+        self.assertEqual(snapshots.closing_balance(first, today), Decimal("500.00"))
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class OutboxMonitoringTests(TestCase):
+    def setUp(self):
+        monitoring._skip_until = 0.0
+        self.addCleanup(setattr, monitoring, "_skip_until", 0.0)
+
+    def test_monitoring_is_retried_while_redis_is_down(self):
+        sender = make_account("1000000021")
+        receiver = make_account("1000000022")
+        services.deposit(sender, 100)
+        services.transfer(sender, receiver, 10)
+        OutboxMessage.objects.exclude(topic="accounts.monitor").delete()
+
+        down = mock.patch.object(
+            monitoring, "get_redis_connection", side_effect=ConnectionError("down")
+        )
+        with down:
+            outbox.relay()
+            message = OutboxMessage.objects.get(topic="accounts.monitor")
+            self.assertEqual(message.attempts, 1)
+
+            # While backing off, the next attempt fails without touching Redis.
+            OutboxMessage.objects.update(available_at=timezone.now())
+            outbox.relay()
+            message = OutboxMessage.objects.get()
+            self.assertEqual(message.attempts, 2)
+            self.assertEqual(message.status, OutboxMessage.Status.PENDING)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class LedgerTests(TestCase):
+    def test_balance_is_rebuilt_from_the_latest_checkpoint(self):
+        account = make_account("1000000031")
+        with mock.patch.object(ledger, "CHECKPOINT_INTERVAL", 2):
+            services.deposit(account, 100)
+            self.assertFalse(BalanceCheckpoint.objects.exists())
+            services.withdraw(account, 30)
+            services.deposit(account, "5.50")
+
+        checkpoint = BalanceCheckpoint.objects.get(account=account)
+        self.assertEqual(checkpoint.balance, Decimal("70.00"))
+        account.refresh_from_db()
+        self.assertEqual(account.entries_since_checkpoint, 1)
+        self.assertEqual(ledger.balance_at(account), Decimal("75.50"))
+        self.assertEqual(ledger.balance_at(account, checkpoint.as_of), Decimal("70.00"))
+
+    def test_unbalanced_posting_is_rejected(self):
+        account = make_account("1000000032")
+        txn = Transaction.objects.create(
+            amount=Decimal("10.00"),
+            receiver=account.user,
+            receiver_account=account,
+            transaction_type=Transaction.TransactionType.DEPOSIT,
+        )
+
+        with self.assertRaises(ledger.UnbalancedPostingError):
+            ledger.post(
+                txn,
+                ledger.credit(account, Decimal("10.00")),
+                ledger.debit(None, Decimal("9.99"), LedgerEntry.LedgerAccount.CASH),
+            )
+        self.assertFalse(LedgerEntry.objects.exists())
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class TransactionHistoryTests(TestCase):
+    def setUp(self):
+        self.account = make_account("1000000041")
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+        self.url = reverse("account_transactions", args=[self.account.account_number])
+
+    def test_cursor_walks_sent_and_received_without_gaps(self):
+        for amount in (50, 40, 30):
+            services.deposit(self.account, amount)
+        for amount in (5, 4):
+            services.withdraw(self.account, amount)
+        expected = [
+            str(pk)
+            for pk in Transaction.objects.order_by("-created_at", "-id").values_list(
+                "id", flat=True
+            )
+        ]
+
+        seen, url = [], f"{self.url}?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()["transactions"]
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+
+        self.assertEqual(seen, expected)
+
+    def test_malformed_cursor_is_not_found(self):
+        for cursor in (
+            "not-base64!",
+            "bm90LWEtY3Vyc29y",
+            "MjAyNi0wMS0wMXxub3QtYS11dWlk",
+        ):
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class StatementTests(TestCase):
+    def test_csv_carries_the_opening_balance_forward(self):
+        account = make_account("1000000051", "500.00")
+        BalanceCheckpoint.objects.create(
+            account=account,
+            entry=None,
+            balance=account.account_balance,
+            as_of=timezone.now() - timedelta(days=1),
+        )
+        services.deposit(account, 100)
+        services.withdraw(account, 30)
+        client = APIClient()
+        client.force_authenticate(account.user)
+        today = timezone.localdate().isoformat()
+
+        response = client.get(
+            reverse("account_statement_csv", args=[account.account_number]),
+            {"start": today, "end": today},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        rows = list(
+            csv.reader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        self.assertEqual(rows[0], statements.CSV_HEADER)
+        self.assertEqual(
+            [row[2:] for row in rows[1:]],
+            [
+                ["", "Opening balance", "", "", "500.00"],
+                ["Deposit", "", "", "100.00", "600.00"],
+                ["Withdrawal", "", "30.00", "", "570.00"],
+            ],
+        )
+
+    def test_statement_of_another_customer_is_not_found(self):
+        account = make_account("1000000052")
+        client = APIClient()
+        client.force_authenticate(make_user("1000000053"))
+        today = timezone.localdate().isoformat()
+
+        response = client.get(
+            reverse("account_statement_csv", args=[account.account_number]),
+            {"start": today, "end": today},
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class BalanceSnapshotTests(TestCase):
+    def post_on(self, txn, when):
+        LedgerEntry.objects.filter(transaction=txn).update(created_at=when)
+        return timezone.localdate(when)
+
+    def test_late_entry_moves_the_following_days(self):
+        account = make_account("1000000061")
+        now = timezone.now()
+        first = self.post_on(services.deposit(account, 100), now - timedelta(days=2))
+        second = self.post_on(services.deposit(account, 50), now - timedelta(days=1))
+
+        self.assertEqual(snapshots.rollup(), 4)
+        late = self.post_on(services.withdraw(account, 30), now - timedelta(days=2))
+        self.assertEqual(snapshots.rollup(), 2)
+        self.assertEqual(snapshots.rollup(), 0)
+
+        days = {
+            snapshot.date: snapshot
+            for snapshot in account.balance_snapshots.order_by("date")
+        }
+        self.assertEqual(late, first)
+        self.assertEqual(
+            (days[first].opening_balance, days[first].closing_balance),
+            (Decimal("0.00"), Decimal("70.00")),
+        )
+        self.assertEqual(days[first].entry_count, 2)
+        self.assertEqual(
+            (days[second].opening_balance, days[second].closing_balance),
+            (Decimal("70.00"), Decimal("120.00")),
+        )
+        self.assertEqual(snapshots.closing_balance(account, first), Decimal("70.00"))
+        self.assertEqual(
+            snapshots.closing_balances([account], second),
+            {account.pk: Decimal("120.00")},
+        )
+
+    def test_unsettled_entries_wait_for_the_next_rollup(self):
+        account = make_account("1000000062")
+        services.deposit(account, 100)
+
+        self.assertEqual(snapshots.rollup(), 0)
+        self.assertFalse(account.balance_snapshots.exists())
+        self.assertEqual(
+            snapshots.closing_balance(account, timezone.localdate()),
+            Decimal("100.00"),
+        )
+
+
+class FakeRedis:
+    # Just enough of the Redis commands monitoring uses, pipelines included.
+    def __init__(self):
+        self.data = {}
+        self.calls = None
+
+    def pipeline(self, transaction=True):
+        pipe = FakeRedis()
+        pipe.data, pipe.calls = self.data, []
+        return pipe
+
+    def __getattr__(self, name):
+        command = getattr(FakeRedisCommands, name)
+        if self.calls is None:
+            return lambda *args, **kwargs: command(self.data, *args, **kwargs)
+        return lambda *args, **kwargs: self.calls.append((command, args, kwargs))
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        return [command(self.data, *args, **kwargs) for command, args, kwargs in calls]
+
+
+class FakeRedisCommands:
+    @staticmethod
+    def incrby(data, key, amount=1):
+        data[key] = int(data.get(key, 0)) + amount
+        return data[key]
+
+    incr = incrby
+
+    @staticmethod
+    def expire(data, key, seconds):
+        return key in data
+
+    @staticmethod
+    def get(data, key):
+        return data.get(key)
+
+    @staticmethod
+    def mget(data, *keys):
+        return [data.get(key) for key in keys]
+
+    @staticmethod
+    def sadd(data, key, member):
+        members = data.setdefault(key, set())
+        added = member not in members
+        members.add(member)
+        return int(added)
+
+    @staticmethod
+    def set(data, key, value, nx=False, ex=None):
+        if nx and key in data:
+            return None
+        data[key] = value
+        return True
+
+    @staticmethod
+    def hset(data, key, mapping):
+        data.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    @staticmethod
+    def delete(data, *keys):
+        return sum(data.pop(key, None) is not None for key in keys)
+
+    @staticmethod
+    def rpush(data, key, *values):
+        data.setdefault(key, []).extend(values)
+        return len(data[key])
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    SUSPICIOUS_ACTIVITY_RULES={
+        "velocity": {"max_transfers": 2, "window_minutes": 10},
+        "new_receivers": {
+            "max_new_receivers": 2,
+            "window_minutes": 60,
+            "remember_days": 180,
+        },
+    },
+)
+class SuspiciousActivityTests(TestCase):
+    def setUp(self):
+        monitoring._skip_until = 0.0
+        self.redis = FakeRedis()
+        for patcher in (
+            mock.patch.object(
+                monitoring, "get_redis_connection", return_value=self.redis
+            ),
+            # Halfway into a 10 minute window, so the previous one weighs half.
+            mock.patch.object(monitoring.time, "time", return_value=3600 * 1000 + 300),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.sender = make_account("1000000071")
+        services.deposit(self.sender, 1000)
+
+    def alerts(self):
+        return [
+            json.loads(alert)
+            for alert in self.redis.data.get(monitoring.ALERT_QUEUE_KEY, [])
+        ]
+
+    def test_burst_raises_one_alert_per_rule(self):
+        receivers = [make_account(f"100000008{i}") for i in range(4)]
+        for receiver in receivers:
+            txn = services.transfer(self.sender, receiver, 10)
+            monitoring.observe([txn])
+
+        alerts = self.alerts()
+        self.assertEqual(
+            sorted(alert["rule"] for alert in alerts), ["new_receivers", "velocity"]
+        )
+        self.assertEqual(
+            {alert["account_number"] for alert in alerts},
+            {self.sender.account_number},
+        )
+        self.assertTrue(alerts[0]["reason"].startswith("3 "))
+
+    def test_repeat_receiver_is_not_new(self):
+        receiver = make_account("1000000090")
+        for _ in range(2):
+            monitoring.observe([services.transfer(self.sender, receiver, 10)])
+        self.assertEqual(self.alerts(), [])
+
+        monitoring.observe([services.transfer(self.sender, receiver, 10)])
+        self.assertEqual([alert["rule"] for alert in self.alerts()], ["velocity"])
+
+    def test_previous_window_counts_by_its_overlap(self):
+        receiver = make_account("1000000091")
+        now = monitoring.time.time()
+        current, previous = monitoring._window_keys(
+            "velocity", self.sender.pk, 600, now
+        )
+        self.redis.data[previous] = 2
+
+        monitoring.observe([services.transfer(self.sender, receiver, 10)])
+
+        # 1 in this window plus half of the previous window's 2.
+        self.assertEqual(self.alerts(), [])
+        monitoring.observe([services.transfer(self.sender, receiver, 10)])
+        self.assertEqual([alert["rule"] for alert in self.alerts()], ["velocity"])
+
+
+class AccountNumberPoolTests(TestCase):
+    currency = BankAccount.AccountCurrency.NAIRA
+
+    def test_each_pooled_number_is_claimed_once(self):
+        prefix = numbering.prefix_for(self.currency)
+        self.assertEqual(numbering.refill(self.currency, target=3), 3)
+
+        claimed = [numbering.claim(self.currency) for _ in range(3)]
+
+        self.assertEqual(len(set(claimed)), 3)
+        for number in claimed:
+            self.assertTrue(number.startswith(prefix))
+            self.assertTrue(luhn.is_valid(number))
+        self.assertFalse(AvailableAccountNumber.objects.exists())
+
+    def test_refill_skips_numbers_already_in_use(self):
+        taken = make_account("1000000101").account_number
+        fresh = "1000000102"
+        with mock.patch.object(numbering, "generate", return_value={taken, fresh}):
+            self.assertEqual(numbering.refill(self.currency, target=1), 1)
+
+        self.assertEqual(
+            list(AvailableAccountNumber.objects.values_list("number", flat=True)),
+            [fresh],
+        )
+
+    def test_empty_pool_is_refilled_inline(self):
+        number = numbering.claim(self.currency)
+
+        self.assertTrue(luhn.is_valid(number))
+        self.assertEqual(
+            AvailableAccountNumber.objects.count(), numbering.GENERATE_BATCH_SIZE - 1
+        )
+
+
+def reference_check_digit(payload):
+    digits = [int(char) for char in reversed(payload)]
+    total = sum(
+        sum(divmod(digit * 2, 10)) if index % 2 == 0 else digit
+        for index, digit in enumerate(digits)
+    )
+    return (10 - total % 10) % 10
+
+
+class LuhnTests(TestCase):
+    def test_check_digit_matches_the_textbook_algorithm(self):
+        for payload in ("7992739871", "0", "1230001566", "9" * 15, "4" * 14):
+            with self.subTest(payload=payload):
+                digit = luhn.check_digit(payload)
+                self.assertEqual(digit, reference_check_digit(payload))
+                self.assertTrue(luhn.is_valid(f"{payload}{digit}"))
+
+    def test_validate_many_accepts_current_and_legacy_numbers(self):
+        legacy = f"1000000200{luhn.check_digit('10000002000')}"
+        self.assertFalse(luhn.is_valid(legacy))
+
+        self.assertEqual(
+            luhn.validate_many(["79927398713", legacy, "79927398710", "7992a", ""]),
+            {
+                "79927398713": True,
+                legacy: True,
+                "79927398710": False,
+                "7992a": False,
+                "": False,
+            },
+        )
+
+    def test_resolve_many_looks_up_valid_numbers_only(self):
+        account = make_account("79927398713")
+        with self.assertNumQueries(1):
+            results = lookup.resolve_many(
+                ["79927398713", "79927398710", "18", "79927398713"]
+            )
+
+        self.assertEqual(
+            [(row["valid"], row["exists"]) for row in results],
+            [(True, True), (False, False), (True, False)],
+        )
+        self.assertEqual(results[0]["account_name"], account.user.full_name)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class BalanceShardTests(TestCase):
+    def test_sharded_postings_fold_back_into_the_account(self):
+        hot = make_account("1000000121")
+        other = make_account("1000000122")
+        services.deposit(hot, 100)
+        hot = shards.enable(hot, 4)
+
+        services.deposit(hot, 50)
+        services.transfer(hot, other, 120)
+        with self.assertRaises(services.InsufficientFundsError):
+            services.withdraw(hot, 31)
+        services.withdraw(hot, 30)
+
+        hot.refresh_from_db()
+        self.assertEqual(hot.account_balance, Decimal("100.00"))
+        self.assertEqual(shards.balance(hot), Decimal("0.00"))
+        self.assertEqual(shards.consolidate(hot), Decimal("0.00"))
+        hot.refresh_from_db()
+        self.assertEqual(hot.account_balance, Decimal("0.00"))
+        self.assertEqual(
+            BalanceCheckpoint.objects.get(account=hot).balance, Decimal("0.00")
+        )
+        self.assertEqual(ledger.balance_at(hot), Decimal("0.00"))
+        self.assertFalse(reconcile().exists())
+
+    def test_debit_draws_from_several_shards(self):
+        account = shards.enable(make_account("1000000123"), 3)
+        for shard_no, amount in enumerate((10, 20, 30)):
+            account.balance_shards.filter(shard_no=shard_no).update(balance=amount)
+
+        self.assertFalse(shards.debit(account, Decimal("61")))
+        self.assertTrue(shards.debit(account, Decimal("45")))
+        self.assertEqual(shards.balance(account), Decimal("15.00"))
+        self.assertFalse(account.balance_shards.filter(balance__lt=0).exists())
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class TransferOTPTests(TestCase):
+    def setUp(self):
+        self.sender = make_account("1000000131")
+        self.receiver = make_account("1000000132")
+        services.deposit(self.sender, 100)
+        self.client = APIClient()
+        self.client.force_authenticate(self.sender.user)
+        self.challenges = {}
+
+    def issue(self, user, purpose, draft=""):
+        self.challenges[(user.pk, purpose, draft)] = "123456"
+        return "123456"
+
+    def verify(self, user, purpose, code, draft=""):
+        # The check itself is a Lua script and needs a real Redis.
+        expected = self.challenges.pop((user.pk, purpose, draft), None)
+        if expected is None:
+            return otp_service.EXPIRED
+        return otp_service.VERIFIED if code == expected else otp_service.INVALID
+
+    def transfer(self, amount, otp=None):
+        data = {
+            "sender_account": self.sender.account_number,
+            "receiver_account": self.receiver.account_number,
+            "amount": amount,
+        }
+        if otp:
+            data["otp"] = otp
+        return self.client.post(reverse("account_transfer"), data, format="json")
+
+    def test_otp_approves_only_the_transfer_it_was_issued_for(self):
+        with mock.patch.object(otp_service, "issue", self.issue), mock.patch.object(
+            otp_service, "verify", self.verify
+        ):
+            self.assertEqual(self.transfer("10.00").status_code, 202)
+            self.assertFalse(
+                Transaction.objects.filter(sender=self.sender.user).exists()
+            )
+
+            self.assertEqual(self.transfer("90.00", "123456").status_code, 400)
+            self.assertEqual(self.transfer("10.00", "123456").status_code, 201)
+            self.assertEqual(self.transfer("10.00", "123456").status_code, 400)
+
+        self.receiver.refresh_from_db()
+        self.assertEqual(self.receiver.account_balance, Decimal("10.00"))
+
+    def test_issue_stores_a_hashed_code_with_a_ttl(self):
+        redis = FakeRedis()
+        with mock.patch.object(
+            otp_service, "get_redis_connection", return_value=redis
+        ), self.assertNumQueries(0):
+            code = otp_service.issue(self.sender.user, otp_service.TRANSFER, "d-1")
+
+        ((key, challenge),) = redis.data.items()
+        self.assertIn(str(self.sender.user.pk), key)
+        self.assertNotIn(code, challenge["code"])
+        self.assertEqual(challenge["attempts"], 0)
+
+    def test_transfer_is_refused_while_redis_is_down(self):
+        down = mock.patch.object(
+            otp_service, "get_redis_connection", side_effect=ConnectionError("down")
+        )
+        with down:
+            self.assertEqual(self.transfer("10.00").status_code, 503)
+            self.assertEqual(self.transfer("10.00", "123456").status_code, 503)
+        self.receiver.refresh_from_db()
+        self.assertEqual(self.receiver.account_balance, Decimal("0.00"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AccountStatusTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def post(self, user, data):
+        self.client.force_authenticate(user)
+        return self.client.post(reverse("account_bulk_status"), data, format="json")
+
+    def test_only_changed_accounts_are_updated_and_emailed(self):
+        manager = make_user("1000000140")
+        manager.role = "branch_manager"
+        manager.save(update_fields=["role"])
+        dormant = make_account("1000000141")
+        dormant.account_status = BankAccount.AccountStatus.INACTIVE
+        dormant.save(update_fields=["account_status"])
+        active = make_account("1000000142")
+        OutboxMessage.objects.all().delete()
+
+        numbers = [dormant.account_number, active.account_number, "1000000143"]
+        response = self.post(manager, {"account_numbers": numbers + numbers[:1]})
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()["accounts"]
+        self.assertEqual(
+            (result["updated"], result["unchanged"], result["not_found"]),
+            (1, 1, ["1000000143"]),
+        )
+        dormant.refresh_from_db()
+        self.assertEqual(dormant.account_status, BankAccount.AccountStatus.ACTIVE)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.topic, "accounts.activation_emails")
+        self.assertEqual(message.payload["account_ids"], [str(dormant.pk)])
+
+    def test_customers_cannot_change_account_status(self):
+        account = make_account("1000000144")
+        response = self.post(
+            account.user,
+            {
+                "account_numbers": [account.account_number],
+                "account_status": BankAccount.AccountStatus.INACTIVE,
+            },
+        )
+
+        self.assertEqual(response.status_code, 403)
+        account.refresh_from_db()
+        self.assertEqual(account.account_status, BankAccount.AccountStatus.ACTIVE)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class OutboxEmailTests(TestCase):
+    def deposit(self, number):
+        account = make_account(number)
+        services.deposit(account, 100)
+        OutboxMessage.objects.exclude(topic="accounts.deposit_email").delete()
+        return account
+
+    def test_email_is_sent_by_the_relay_after_commit(self):
+        account = make_account("1000000151")
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            services.deposit(account, 100)
+            raise RuntimeError("rolled back")
+        self.assertFalse(OutboxMessage.objects.exists())
+
+        self.deposit("1000000152")
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(outbox.relay(), 1)
+
+        self.assertEqual(mail.outbox[0].to, ["1000000152@example.com"])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_failed_email_is_retried_then_dead_lettered(self):
+        self.deposit("1000000153")
+        failing = mock.patch(
+            "django.core.mail.EmailMultiAlternatives.send",
+            side_effect=OSError("smtp down"),
+        )
+        with failing, mock.patch.object(outbox, "MAX_ATTEMPTS", 2):
+            outbox.relay()
+            message = OutboxMessage.objects.get()
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.available_at, timezone.now())
+            self.assertEqual(outbox.relay(), 0)
+
+            OutboxMessage.objects.update(available_at=timezone.now())
+            outbox.relay()
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.Status.DEAD)
+        self.assertEqual(message.last_error, "smtp down")
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class TransactionSearchTests(TestCase):
+    def setUp(self):
+        teller = make_user("1000000160")
+        teller.role = "teller"
+        teller.save(update_fields=["role"])
+        self.client = APIClient()
+        self.client.force_authenticate(teller)
+
+    def search(self, **params):
+        return self.client.get(reverse("transaction_search"), params)
+
+    def test_account_search_covers_both_sides_and_narrows(self):
+        first = make_account("1000000161")
+        second = make_account("1000000162")
+        deposit = services.deposit(first, 100)
+        sent = services.transfer(first, second, 40)
+        received = services.transfer(second, first, 15)
+        services.deposit(second, 500)
+
+        for params, expected in (
+            ({}, [received, sent, deposit]),
+            ({"amount_min": "20"}, [sent, deposit]),
+            ({"transaction_type": "transfer"}, [received, sent]),
+        ):
+            with self.subTest(params=params):
+                response = self.search(account=first.account_number, **params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [row["id"] for row in response.json()["transactions"]["results"]],
+                    [str(txn.pk) for txn in expected],
+                )
+
+    def test_searches_without_an_indexed_filter_are_refused(self):
+        today = timezone.localdate()
+        for params in (
+            {"amount_min": "10"},
+            {"status": "completed"},
+            {"created_after": today.isoformat()},
+            {
+                "created_after": (today - timedelta(days=31)).isoformat(),
+                "created_before": today.isoformat(),
+            },
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.search(**params).status_code, 400)
+
+        window = {
+            "created_after": (today - timedelta(days=30)).isoformat(),
+            "created_before": today.isoformat(),
+        }
+        self.assertEqual(self.search(**window).status_code, 200)
+
+    def test_customers_cannot_search(self):
+        self.client.force_authenticate(make_user("1000000163"))
+        self.assertEqual(self.search(transaction_type="deposit").status_code, 403)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class MonthlyActivityTests(TestCase):
+    def test_rollup_adds_up_each_month_by_type_and_direction(self):
+        first = make_account("1000000171")
+        second = make_account("1000000172")
+        this_month = partitions.month_start(timezone.localdate())
+        last_month = partitions.add_months(this_month, -1)
+        mid = {
+            month: partitions.month_bounds(month)[0] + timedelta(days=14)
+            for month in (last_month, this_month)
+        }
+
+        def post_in(month, txn):
+            LedgerEntry.objects.filter(transaction=txn).update(created_at=mid[month])
+
+        post_in(last_month, services.deposit(first, 100))
+        post_in(last_month, services.transfer(first, second, 30))
+        self.assertEqual(analytics.rollup(), 4)
+        # A later batch adds to the rows the first one wrote.
+        post_in(last_month, services.deposit(first, 20))
+        post_in(this_month, services.withdraw(first, 5))
+        self.assertEqual(analytics.rollup(), 4)
+
+        months, as_of = analytics.monthly_summary(
+            first, partitions.add_months(this_month, -2), this_month
+        )
+
+        self.assertIsNotNone(as_of)
+        self.assertEqual(
+            [(m["inflow"], m["outflow"], m["net"], m["count"]) for m in months],
+            [
+                (Decimal("0.00"), Decimal("0.00"), Decimal("0.00"), 0),
+                (Decimal("120.00"), Decimal("30.00"), Decimal("90.00"), 3),
+                (Decimal("0.00"), Decimal("5.00"), Decimal("-5.00"), 1),
+            ],
+        )
+        self.assertEqual(
+            months[1]["by_type"]["deposit"],
+            {"inflow": Decimal("120.00"), "outflow": Decimal("0.00"), "count": 2},
+        )
+        self.assertEqual(
+            MonthlyAccountActivity.objects.filter(
+                account=first, month=last_month
+            ).count(),
+            2,
+        )
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class ScheduledTransferTests(TestCase):
+    def setUp(self):
+        self.sender = make_account("1000000181")
+        self.receiver = make_account("1000000182")
+        services.deposit(self.sender, 100)
+
+    def schedule(self, frequency, amount=10):
+        return scheduling.schedule_transfer(
+            self.sender.user,
+            self.sender,
+            self.receiver,
+            amount,
+            frequency,
+            timezone.now() - timedelta(minutes=1),
+        )
+
+    def received(self):
+        self.receiver.refresh_from_db()
+        return self.receiver.account_balance
+
+    def test_monthly_payments_fall_on_the_last_day_of_short_months(self):
+        schedule = ScheduledTransfer(
+            frequency=ScheduledTransfer.Frequency.MONTHLY,
+            start_at=timezone.make_aware(datetime(2025, 1, 31, 9, 0)),
+        )
+        self.assertEqual(
+            [scheduling.occurrence(schedule, i).date() for i in range(3)],
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)],
+        )
+        self.assertEqual(scheduling.occurrence(schedule, 1).hour, 9)
+
+    def test_worker_whose_lease_was_taken_over_stands_down(self):
+        schedule = self.schedule(ScheduledTransfer.Frequency.MONTHLY)
+        (claimed,), stale = scheduling.claim()
+        # The first worker stalls past its lease and another claims the schedule.
+        ScheduledTransfer.objects.filter(pk=claimed).update(next_run_at=timezone.now())
+        _ids, lease = scheduling.claim()
+
+        self.assertFalse(scheduling.execute(claimed, stale))
+        self.assertTrue(scheduling.execute(claimed, lease))
+        self.assertFalse(scheduling.execute(claimed, lease))
+
+        self.assertEqual(self.received(), Decimal("10.00"))
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.occurrences, 1)
+        self.assertEqual(schedule.next_run_at, scheduling.occurrence(schedule, 1))
+        self.assertEqual(scheduling.claim(), ([], mock.ANY))
+
+    def test_one_off_payment_fails_after_its_retries(self):
+        schedule = self.schedule(ScheduledTransfer.Frequency.ONCE, amount=500)
+
+        for attempt in range(1, scheduling.MAX_ATTEMPTS + 1):
+            ScheduledTransfer.objects.filter(pk=schedule.pk).update(
+                next_run_at=timezone.now()
+            )
+            ids, lease = scheduling.claim()
+            self.assertEqual(ids, [schedule.pk])
+            self.assertFalse(scheduling.execute(schedule.pk, lease))
+            schedule.refresh_from_db()
+            self.assertEqual(schedule.attempts, attempt)
+
+        self.assertEqual(schedule.status, ScheduledTransfer.ScheduleStatus.FAILED)
+        self.assertIsNone(schedule.next_run_at)
+        self.assertEqual(self.received(), Decimal("0.00"))
+
+    def test_cancelled_schedule_is_not_paid(self):
+        schedule = self.schedule(ScheduledTransfer.Frequency.DAILY)
+        (claimed,), lease = scheduling.claim()
+
+        self.assertTrue(scheduling.cancel(schedule))
+        self.assertFalse(scheduling.execute(claimed, lease))
+        self.assertEqual(self.received(), Decimal("0.00"))
+
+
+# PostgreSQL rightly prefers a sequential scan on a table this small.
+@skipUnless(connection.vendor == "sqlite", "plans of a tiny fixture")
+class TransactionIndexTests(TestCase):
+    def test_account_lookups_search_an_index(self):
+        out = StringIO()
+        call_command(
+            "benchmark_transaction_queries",
+            rows=300,
+            accounts=5,
+            repeat=2,
+            stdout=out,
+        )
+
+        plans = out.getvalue()
+        self.assertNotIn("SCAN accounts_transaction", plans)
+        for index in (
+            "txn_sender_search_idx",
+            "txn_receiver_search_idx",
+            "txn_sender_pending_idx",
+        ):
+            self.assertIn(f"USING INDEX {index}", plans)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(BankAccount.objects.exists())
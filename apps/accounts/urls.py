@@ -0,0 +1,77 @@
+from django.urls import path
+
+from .views import (
+    AccountActivityView,
+    AccountResolveView,
+    AccountStatusView,
+    BulkTransferView,
+    DailyBalanceView,
+    DepositView,
+    FXQuoteView,
+    FXRatesView,
+    NameEnquiryView,
+    ScheduledTransferDetailView,
+    ScheduledTransferView,
+    StatementCSVView,
+    StatementPDFView,
+    TransactionHistoryView,
+    TransactionSearchView,
+    TransferView,
+    WithdrawalView,
+)
+
+urlpatterns = [
+    path("deposit/", DepositView.as_view(), name="account_deposit"),
+    path("withdraw/", WithdrawalView.as_view(), name="account_withdrawal"),
+    path("transfer/", TransferView.as_view(), name="account_transfer"),
+    path("bulk-transfer/", BulkTransferView.as_view(), name="account_bulk_transfer"),
+    path(
+        "scheduled-transfers/",
+        ScheduledTransferView.as_view(),
+        name="scheduled_transfers",
+    ),
+    path(
+        "scheduled-transfers/<uuid:pk>/",
+        ScheduledTransferDetailView.as_view(),
+        name="scheduled_transfer_detail",
+    ),
+    path("fx/rates/", FXRatesView.as_view(), name="fx_rates"),
+    path("fx/quote/", FXQuoteView.as_view(), name="fx_quote"),
+    path("resolve/", AccountResolveView.as_view(), name="account_resolve"),
+    path("status/", AccountStatusView.as_view(), name="account_bulk_status"),
+    path(
+        "transactions/search/",
+        TransactionSearchView.as_view(),
+        name="transaction_search",
+    ),
+    path(
+        "<str:account_number>/name-enquiry/",
+        NameEnquiryView.as_view(),
+        name="account_name_enquiry",
+    ),
+    path(
+        "<str:account_number>/transactions/",
+        TransactionHistoryView.as_view(),
+        name="account_transactions",
+    ),
+    path(
+        "<str:account_number>/statement/csv/",
+        StatementCSVView.as_view(),
+        name="account_statement_csv",
+    ),
+    path(
+        "<str:account_number>/statement/pdf/",
+        StatementPDFView.as_view(),
+        name="account_statement_pdf",
+    ),
+    path(
+        "<str:account_number>/daily-balances/",
+        DailyBalanceView.as_view(),
+        name="account_daily_balances",
+    ),
+    path(
+        "<str:account_number>/analytics/",
+        AccountActivityView.as_view(),
+        name="account_analytics",
+    ),
+]
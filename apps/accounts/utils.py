@@ -1,61 +1,24 @@
-import secrets
-from os import getenv
-from typing import Union, List
 from django.db import transaction
-from .emails import send_account_creation_email
+
+from apps.common import outbox
+from . import luhn
+from .numbering import claim, generate, prefix_for
 
 from .models import BankAccount
 
 
 def generate_account_number(currency):
-    bank_code = getenv("BANK_CODE")
-    branch_code = getenv("BANK_BRANCH_CODE")
-
-    currency_codes = {
-        "us_dollar": getenv("CURRENCY_CODE_USD"),
-        "pound_sterling": getenv("CURRENCY_CODE_GBP"),
-        "naira": getenv("CURRENCY_CODE_NGN"),
-    }
-    currency_code = currency_codes.get(currency)
-    if not currency_code:
-        raise ValueError(f"Invalid currency: {currency}")
-
-    prefix = f"{bank_code}{branch_code}{currency_code}"
-
-    remaining_digits = 16 - len(prefix) - 1
-
-    random_digits = "".join(
-        secrets.choice("0123456789") for _ in range(remaining_digits)
-    )
-    partial_account_number = f"{prefix}{random_digits}"
-
-    check_digit = calculate_luhn_check_digit(partial_account_number)
-    return f"{partial_account_number}{check_digit}"
+    prefix = prefix_for(currency)
+    return generate(prefix, 1).pop()
 
 
 def calculate_luhn_check_digit(number: str):
-    def split_into_digits(n: Union[str, int]):
-        return [int(digit) for digit in str(n)]
-
-    digits = split_into_digits(number)
-    odd_digits = digits[-1::-2]
-    even_digits = digits[-2::-2]
-    total = sum(odd_digits)
-
-    for d in even_digits:
-        doubled = d * 2
-        total += sum(split_into_digits(doubled))
-
-    return (10 - (total % 10)) % 10
+    return luhn.check_digit(str(number))
 
 
 def create_bank_account(user, currency, account_type):
     with transaction.atomic():
-        while True:
-            account_number = generate_account_number(currency)
-
-            if not BankAccount.objects.filter(account_number=account_number).exists():
-                break
+        account_number = claim(currency)
 
         bank_account = BankAccount.objects.create(
             user=user,
@@ -64,6 +27,6 @@ def create_bank_account(user, currency, account_type):
             account_type=account_type
         )
 
-        send_account_creation_email(user, bank_account)
+        outbox.publish("accounts.account_created", account_id=bank_account.pk)
 
     return bank_account
\ No newline at end of file
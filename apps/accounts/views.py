@@ -1,3 +1,574 @@
-from django.shortcuts import render
+import json
+from datetime import timedelta
 
-# Create your views here.
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from loguru import logger
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.common.idempotency import idempotent
+from apps.common.pagination import KeysetPagination
+from apps.common.permissions import IsBranchManager, IsTeller
+from apps.common.renderers import GenericJSONRenderer
+from apps.common.replicas import reads_from_replica
+from apps.userauth import otp as otp_service
+from . import (
+    activation,
+    analytics,
+    fx,
+    lookup,
+    luhn,
+    scheduling,
+    search,
+    services,
+)
+from .emails import send_transfer_otp_email
+from .models import BankAccount, ScheduledTransfer
+from .statements import stream_csv
+from .tasks import generate_statement_pdf, statement_pdf_path
+from .serializers import (
+    AccountActivityQuerySerializer,
+    AccountBalanceSnapshotSerializer,
+    AccountResolveSerializer,
+    AccountStatusSerializer,
+    BulkTransferSerializer,
+    DepositSerializer,
+    FXQuoteRequestSerializer,
+    FXQuoteSerializer,
+    MonthlyActivitySerializer,
+    ScheduledTransferRequestSerializer,
+    ScheduledTransferSerializer,
+    StatementQuerySerializer,
+    TransactionSerializer,
+    TransferSerializer,
+    WithdrawalSerializer,
+)
+
+
+class DepositView(APIView):
+    permission_classes = [IsTeller]
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "transaction"
+
+    @idempotent
+    def post(self, request: Request) -> Response:
+        serializer = DepositSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            txn = services.deposit(
+                data["account_number"],
+                data["amount"],
+                performed_by=request.user,
+                description=data.get("description"),
+            )
+        except services.TransactionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "message": "Deposit completed successfully.",
+                "data": TransactionSerializer(txn).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class WithdrawalView(APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "transaction"
+
+    @idempotent
+    def post(self, request: Request) -> Response:
+        serializer = WithdrawalSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            txn = services.withdraw(
+                data["account_number"],
+                data["amount"],
+                performed_by=request.user,
+                description=data.get("description"),
+            )
+        except services.TransactionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "message": "Withdrawal completed successfully.",
+                "data": TransactionSerializer(txn).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class TransferOTPMixin:
+    # Returns the response to send instead of going ahead, or None once the OTP
+    # for this draft has been verified.
+    def check_otp(self, request: Request, code, draft):
+        try:
+            if not code:
+                code = otp_service.issue(request.user, otp_service.TRANSFER, draft)
+                send_transfer_otp_email(request.user.email, code)
+                return Response(
+                    {
+                        "message": "An OTP has been sent to your email. Send the "
+                        "same transfer again with it to complete the transfer."
+                    },
+                    status=status.HTTP_202_ACCEPTED,
+                )
+            result = otp_service.verify(request.user, otp_service.TRANSFER, code, draft)
+        except otp_service.OTPUnavailableError as e:
+            logger.error(f"Transfer OTP unavailable: {str(e)}")
+            return Response(
+                {"error": "Transfers are temporarily unavailable. Please try again."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        if result != otp_service.VERIFIED:
+            return Response(
+                {"error": str(otp_service.MESSAGES[result])},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return None
+
+
+class TransferView(TransferOTPMixin, APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "transaction"
+
+    @idempotent
+    def post(self, request: Request) -> Response:
+        serializer = TransferSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        # The OTP is bound to this exact transfer; changing the accounts, amount
+        # or quote needs a new one.
+        quote = data.get("quote_id")
+        draft = otp_service.draft_id(
+            data["sender_account"].pk,
+            data["receiver_account"].pk,
+            data["amount"],
+            quote.pk if quote else "",
+        )
+        rejected = self.check_otp(request, data.get("otp"), draft)
+        if rejected is not None:
+            return rejected
+
+        try:
+            txn = services.transfer(
+                data["sender_account"],
+                data["receiver_account"],
+                data["amount"],
+                performed_by=request.user,
+                description=data.get("description"),
+                quote=quote,
+            )
+        except services.TransactionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "message": "Transfer completed successfully.",
+                "data": TransactionSerializer(txn).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ScheduledTransferView(TransferOTPMixin, APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "scheduled_transfers"
+
+    def get(self, request: Request) -> Response:
+        schedules = (
+            ScheduledTransfer.objects.filter(user=request.user)
+            .select_related("sender_account", "receiver_account")
+            .order_by("-created_at")
+        )
+        serializer = ScheduledTransferSerializer(schedules, many=True)
+        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
+
+    @idempotent
+    def post(self, request: Request) -> Response:
+        serializer = ScheduledTransferRequestSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        # Setting up a standing order authorises every payment it will make, so
+        # it needs the same OTP as a transfer, bound to the whole schedule.
+        draft = otp_service.draft_id(
+            "scheduled",
+            data["sender_account"].pk,
+            data["receiver_account"].pk,
+            data["amount"],
+            data["frequency"],
+            data["start_at"].isoformat(),
+            data.get("end_date") or "",
+        )
+        rejected = self.check_otp(request, data.get("otp"), draft)
+        if rejected is not None:
+            return rejected
+
+        try:
+            schedule = scheduling.schedule_transfer(
+                request.user,
+                data["sender_account"],
+                data["receiver_account"],
+                data["amount"],
+                data["frequency"],
+                data["start_at"],
+                end_date=data.get("end_date"),
+                description=data.get("description"),
+            )
+        except services.TransactionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "message": "Transfer scheduled successfully.",
+                "data": ScheduledTransferSerializer(schedule).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ScheduledTransferDetailView(APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "scheduled_transfer"
+
+    def delete(self, request: Request, pk) -> Response:
+        schedule = get_object_or_404(ScheduledTransfer, pk=pk, user=request.user)
+        if not scheduling.cancel(schedule):
+            return Response(
+                {"error": "Only active scheduled transfers can be cancelled."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {"message": "Scheduled transfer cancelled."}, status=status.HTTP_200_OK
+        )
+
+
+class FXRatesView(APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "fx_rates"
+
+    def get(self, request: Request) -> Response:
+        try:
+            table = fx.current_table()
+        except fx.FXError as e:
+            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            {
+                "version": table.version,
+                "rates": [
+                    {"base": base, "quote": quote, "rate": str(rate)}
+                    for (base, quote), rate in sorted(table.rates.items())
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class FXQuoteView(APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "quote"
+
+    def post(self, request: Request) -> Response:
+        serializer = FXQuoteRequestSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            quote = fx.create_quote(
+                request.user,
+                data["sender_account"],
+                data["receiver_account"],
+                data["amount"],
+            )
+        except fx.FXError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "message": "Quote created. Use its id as quote_id in a transfer.",
+                "data": FXQuoteSerializer(quote).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class BulkTransferView(TransferOTPMixin, APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "bulk_transfer"
+
+    @idempotent
+    def post(self, request: Request) -> Response:
+        serializer = BulkTransferSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        # Bound to a digest of every line, so the OTP approves this exact batch.
+        draft = otp_service.draft_id(
+            "bulk",
+            data["sender_account"].pk,
+            json.dumps(data["transfers"], sort_keys=True, default=str),
+        )
+        rejected = self.check_otp(request, data.get("otp"), draft)
+        if rejected is not None:
+            return rejected
+
+        try:
+            report = services.bulk_transfer(
+                data["sender_account"],
+                data["transfers"],
+                performed_by=request.user,
+            )
+        except services.TransactionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "message": "Bulk transfer processed.",
+                "data": report,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class AccountResolveView(APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "accounts"
+
+    def post(self, request: Request) -> Response:
+        serializer = AccountResolveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = lookup.resolve_many(serializer.validated_data["account_numbers"])
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class AccountStatusView(APIView):
+    permission_classes = [IsBranchManager]
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "accounts"
+
+    def post(self, request: Request) -> Response:
+        serializer = AccountStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        numbers = serializer.validated_data["account_numbers"]
+        new_status = serializer.validated_data["account_status"]
+
+        ids = activation.account_ids_for(numbers)
+        changed = activation.set_status(ids.values(), new_status)
+        logger.info(
+            f"{request.user.email} set {len(changed)} accounts to {new_status}"
+        )
+        return Response(
+            {
+                "account_status": new_status,
+                "updated": len(changed),
+                "unchanged": len(ids) - len(changed),
+                "not_found": [
+                    number for number in dict.fromkeys(numbers) if number not in ids
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class NameEnquiryView(APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "account"
+
+    @reads_from_replica
+    def get(self, request: Request, account_number: str) -> Response:
+        if not (luhn.is_valid(account_number) or luhn.is_valid_legacy(account_number)):
+            return Response(
+                {"error": "Invalid account number."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        entry = lookup.name_enquiry(account_number)
+        if entry is None:
+            return Response(
+                {"error": "Account does not exist."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(entry, status=status.HTTP_200_OK)
+
+
+class TransactionHistoryView(APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "transactions"
+    pagination_class = KeysetPagination
+
+    @reads_from_replica
+    def get(self, request: Request, account_number: str) -> Response:
+        account = get_object_or_404(
+            BankAccount, account_number=account_number, user=request.user
+        )
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(
+            [
+                account.sent_transactions.select_related(
+                    "sender_account", "receiver_account"
+                ),
+                account.received_transactions.select_related(
+                    "sender_account", "receiver_account"
+                ),
+            ],
+            request,
+            view=self,
+        )
+        serializer = TransactionSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class TransactionSearchView(APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "transactions"
+    pagination_class = KeysetPagination
+    permission_classes = [IsTeller | IsBranchManager]
+
+    @reads_from_replica
+    def get(self, request: Request) -> Response:
+        querysets, errors = search.search_querysets(request.query_params)
+        if errors:
+            return Response({"error": errors}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(querysets, request, view=self)
+        serializer = TransactionSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class StatementAccountMixin:
+    def get_account(self, request: Request, account_number: str) -> BankAccount:
+        account = get_object_or_404(
+            BankAccount.objects.select_related("user"), account_number=account_number
+        )
+        if account.user_id != request.user.pk and not IsBranchManager().has_permission(
+            request, self
+        ):
+            raise Http404("Account does not exist")
+        return account
+
+    def get_period(self, request: Request):
+        serializer = StatementQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data["start"], serializer.validated_data["end"]
+
+
+class StatementCSVView(StatementAccountMixin, APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "statement"
+
+    @reads_from_replica
+    def get(self, request: Request, account_number: str):
+        account = self.get_account(request, account_number)
+        start, end = self.get_period(request)
+
+        response = StreamingHttpResponse(
+            stream_csv(account, start, end), content_type="text/csv"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="statement-{account.account_number}-'
+            f'{start:%Y%m%d}-{end:%Y%m%d}.csv"'
+        )
+        return response
+
+
+class StatementPDFView(StatementAccountMixin, APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "statement"
+    # Statements for periods that are still open are regenerated after this long.
+    open_period_ttl = timedelta(minutes=15)
+
+    def is_fresh(self, path, end) -> bool:
+        if not default_storage.exists(path):
+            return False
+        if end < timezone.localdate():
+            return True
+        age = timezone.now() - default_storage.get_modified_time(path)
+        return age < self.open_period_ttl
+
+    @reads_from_replica
+    def get(self, request: Request, account_number: str):
+        account = self.get_account(request, account_number)
+        start, end = self.get_period(request)
+        path = statement_pdf_path(account, start, end)
+
+        if self.is_fresh(path, end):
+            return FileResponse(
+                default_storage.open(path, "rb"),
+                as_attachment=True,
+                filename=path.rsplit("/", 1)[-1],
+                content_type="application/pdf",
+            )
+
+        if cache.add(f"statement-pdf:{path}", True, timeout=600):
+            generate_statement_pdf.delay(
+                str(account.pk), start.isoformat(), end.isoformat()
+            )
+        return Response(
+            {"message": "Your statement is being generated. Please try again shortly."},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class DailyBalanceView(StatementAccountMixin, APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "balances"
+
+    @reads_from_replica
+    def get(self, request: Request, account_number: str) -> Response:
+        account = self.get_account(request, account_number)
+        start, end = self.get_period(request)
+        # Only days with activity have a snapshot; a missing day carries the
+        # previous closing balance.
+        snapshots = account.balance_snapshots.filter(
+            date__gte=start, date__lte=end
+        ).order_by("date")
+        serializer = AccountBalanceSnapshotSerializer(snapshots, many=True)
+        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
+
+
+class AccountActivityView(StatementAccountMixin, APIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "analytics"
+
+    @reads_from_replica
+    def get(self, request: Request, account_number: str) -> Response:
+        account = self.get_account(request, account_number)
+        serializer = AccountActivityQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        # Read from the monthly rollups only, so the cost follows the number of
+        # months asked for rather than the account's transaction volume.
+        months, as_of = analytics.monthly_summary(
+            account,
+            serializer.validated_data["start"],
+            serializer.validated_data["end"],
+        )
+        serializer = MonthlyActivitySerializer(months, many=True)
+        return Response(
+            {
+                "results": serializer.data,
+                # Activity posted after this is not in the totals yet.
+                "as_of": as_of.isoformat() if as_of else None,
+            },
+            status=status.HTTP_200_OK,
+        )
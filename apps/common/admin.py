@@ -4,7 +4,9 @@ from django.contrib.contenttypes.admin import GenericTabularInline
 from django.http import HttpRequest
 from django.utils.translation import gettext_lazy as _
 
-from .models import ContentView
+from django.utils import timezone
+
+from .models import ContentView, OutboxMessage
 
 
 @admin.register(ContentView)
@@ -44,6 +46,36 @@ class ContentViewAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ["id", "topic", "status", "attempts", "available_at", "created_at"]
+    list_filter = ["status", "topic"]
+    readonly_fields = [
+        "topic",
+        "payload",
+        "status",
+        "attempts",
+        "last_error",
+        "available_at",
+        "created_at",
+    ]
+    actions = ["retry_messages"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description=_("Retry selected messages"))
+    def retry_messages(self, request, queryset):
+        count = queryset.update(
+            status=OutboxMessage.Status.PENDING,
+            attempts=0,
+            available_at=timezone.now(),
+        )
+        self.message_user(
+            request, _("%(count)d messages queued again.") % {"count": count}
+        )
+
+
 class ContentViewInline(GenericTabularInline):
     model = ContentView
     extra = 0
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from loguru import logger
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+IN_PROGRESS = IdempotencyRecord.State.IN_PROGRESS.value
+COMPLETED = IdempotencyRecord.State.COMPLETED.value
+PURGE_BATCH_SIZE = 5000
+
+
+def request_fingerprint(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    raw = f"{request.method}:{request.path}:{body}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class CacheStore:
+    # Holds finished responses only, so most retries are answered without a
+    # query. Claims never go through here; see idempotent.
+    def _key(self, user_id, key):
+        return f"idempotency:{user_id}:{key}"
+
+    def get(self, user_id, key):
+        return caches["redis"].get(self._key(user_id, key))
+
+    def complete(self, user_id, key, fingerprint, status_code, body):
+        caches["redis"].set(
+            self._key(user_id, key),
+            {
+                "state": COMPLETED,
+                "fingerprint": fingerprint,
+                "status": status_code,
+                "body": body,
+            },
+            timeout=settings.IDEMPOTENCY_KEY_TTL.total_seconds(),
+        )
+
+
+class DatabaseStore:
+    def get(self, user_id, key):
+        record = IdempotencyRecord.objects.filter(
+            user_id=user_id, key=key, expires_at__gt=timezone.now()
+        ).first()
+        if record is None:
+            return None
+        return {
+            "state": record.state,
+            "fingerprint": record.fingerprint,
+            "status": record.response_status,
+            "body": record.response_body,
+        }
+
+    def claim(self, user_id, key, fingerprint) -> bool:
+        # An expired claim is only taken over once its request is gone: while
+        # that request runs it holds the row locked (see hold), and SKIP LOCKED
+        # leaves it alone.
+        with transaction.atomic():
+            expired = IdempotencyRecord.objects.select_for_update(
+                skip_locked=True
+            ).filter(user_id=user_id, key=key, expires_at__lte=timezone.now())
+            IdempotencyRecord.objects.filter(
+                pk__in=list(expired.values_list("pk", flat=True))
+            ).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    user_id=user_id,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=timezone.now() + settings.IDEMPOTENCY_LOCK_TIMEOUT,
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    def hold(self, user_id, key):
+        IdempotencyRecord.objects.select_for_update().filter(
+            user_id=user_id, key=key
+        ).exists()
+
+    def complete(self, user_id, key, fingerprint, status_code, body):
+        IdempotencyRecord.objects.filter(user_id=user_id, key=key).update(
+            state=COMPLETED,
+            response_status=status_code,
+            response_body=body,
+            expires_at=timezone.now() + settings.IDEMPOTENCY_KEY_TTL,
+        )
+
+    def release(self, user_id, key):
+        IdempotencyRecord.objects.filter(user_id=user_id, key=key).delete()
+
+    def purge(self, batch_size=PURGE_BATCH_SIZE) -> int:
+        purged = 0
+        while True:
+            with transaction.atomic():
+                expired = IdempotencyRecord.objects.select_for_update(
+                    skip_locked=True
+                ).filter(expires_at__lte=timezone.now())
+                ids = list(expired.values_list("pk", flat=True)[:batch_size])
+                if not ids:
+                    return purged
+                purged += IdempotencyRecord.objects.filter(pk__in=ids).delete()[0]
+
+
+cache_store = CacheStore()
+database_store = DatabaseStore()
+
+
+def _lookup(user_id, key):
+    try:
+        entry = cache_store.get(user_id, key)
+    except Exception as e:
+        logger.warning(f"Idempotency cache unavailable, using database: {str(e)}")
+        entry = None
+    return entry or database_store.get(user_id, key)
+
+
+def _cache(user_id, key, fingerprint, status_code, body):
+    try:
+        cache_store.complete(user_id, key, fingerprint, status_code, body)
+    except Exception as e:
+        logger.warning(f"Could not cache idempotent response: {str(e)}")
+
+
+def _replay(entry, fingerprint):
+    if entry["fingerprint"] != fingerprint:
+        return Response(
+            {
+                "error": "This Idempotency-Key was already used with a different "
+                "request."
+            },
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(entry["body"], status=entry["status"])
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(handler):
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return handler(self, request, *args, **kwargs)
+
+        user_id = request.user.pk
+        fingerprint = request_fingerprint(request)
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            # The claim is always the database row, whose unique key lets only
+            # one request in whether or not Redis is up; Redis only answers
+            # retries of requests that already finished.
+            entry = _lookup(user_id, key)
+            if entry and entry["state"] == COMPLETED:
+                return _replay(entry, fingerprint)
+            if entry is None and database_store.claim(user_id, key, fingerprint):
+                break
+            if time.monotonic() >= deadline:
+                return Response(
+                    {
+                        "error": "A request with this Idempotency-Key is still "
+                        "being processed."
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
+            time.sleep(0.1)
+
+        try:
+            # The claim row stays locked until the request ends, however long a
+            # bulk transfer takes, and the stored response commits together
+            # with whatever the request changed.
+            with transaction.atomic():
+                database_store.hold(user_id, key)
+                response = handler(self, request, *args, **kwargs)
+
+                # A 202 asks the client to come back, e.g. with an OTP, so the
+                # key is left free for the follow-up request.
+                if response.status_code >= 500 or response.status_code == 202:
+                    database_store.release(user_id, key)
+                    return response
+
+                body = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+                database_store.complete(
+                    user_id, key, fingerprint, response.status_code, body
+                )
+        except Exception:
+            database_store.release(user_id, key)
+            raise
+
+        _cache(user_id, key, fingerprint, response.status_code, body)
+        return response
+
+    return wrapper
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.common import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the side effects (emails, monitoring, follow-up jobs) queued in the "
+        "outbox. With --loop it keeps polling, as a dedicated relay process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument(
+            "--interval", type=float, default=0.5, help="Seconds between empty polls."
+        )
+        parser.add_argument("--batch-size", type=int, default=outbox.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        while True:
+            relayed = outbox.drain(options["batch_size"])
+            if relayed:
+                self.stdout.write(f"Relayed {relayed} outbox messages")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,22 @@
+from .replicas import pin_primary
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class PrimaryPinMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # DRF authenticates inside the view and copies the user back onto the
+        # Django request, so the user is known by the time the response is out.
+        user = getattr(request, "user", None)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+        ):
+            pin_primary(user.pk)
+        return response
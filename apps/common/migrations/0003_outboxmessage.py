@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 20:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0002_idempotencyrecord"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("topic", models.CharField(max_length=100, verbose_name="Topic")),
+                ("payload", models.JSONField(default=dict, verbose_name="Payload")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("dead", "Dead")],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Attempts"
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Last Error")),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Available At"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Outbox Message",
+                "verbose_name_plural": "Outbox Messages",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at", "id"],
+                        name="common_outb_status_38b1df_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 21:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0003_outboxmessage"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="idempotencyrecord",
+            index=models.Index(
+                fields=["expires_at"], name="common_idem_expires_4c1913_idx"
+            ),
+        ),
+    ]
@@ -66,4 +66,56 @@ class ContentView(TimeStampedModel):
                 view.last_viewed = timezone.now()
                 view.save()
         except IntegrityError:
-            pass
\ No newline at end of file
+            pass
+
+
+class IdempotencyRecord(TimeStampedModel):
+    class State(models.TextChoices):
+        IN_PROGRESS = ("in_progress", _("In Progress"))
+        COMPLETED = ("completed", _("Completed"))
+
+    key = models.CharField(_("Idempotency Key"), max_length=255)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="idempotency_records"
+    )
+    fingerprint = models.CharField(_("Request Fingerprint"), max_length=64)
+    state = models.CharField(
+        _("State"), max_length=20, choices=State.choices, default=State.IN_PROGRESS
+    )
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    expires_at = models.DateTimeField(_("Expires At"))
+
+    class Meta:
+        verbose_name = _("Idempotency Record")
+        verbose_name_plural = _("Idempotency Records")
+        unique_together = ["user", "key"]
+        indexes = [models.Index(fields=["expires_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.key} - {self.state}"
+
+
+class OutboxMessage(models.Model):
+    class Status(models.TextChoices):
+        PENDING = ("pending", _("Pending"))
+        DEAD = ("dead", _("Dead"))
+
+    id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(_("Topic"), max_length=100)
+    payload = models.JSONField(_("Payload"), default=dict)
+    status = models.CharField(
+        _("Status"), max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    last_error = models.TextField(_("Last Error"), blank=True)
+    available_at = models.DateTimeField(_("Available At"), default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Outbox Message")
+        verbose_name_plural = _("Outbox Messages")
+        indexes = [models.Index(fields=["status", "available_at", "id"])]
+
+    def __str__(self) -> str:
+        return f"{self.topic} #{self.pk} - {self.status}"
@@ -0,0 +1,100 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from loguru import logger
+
+from .models import OutboxMessage
+
+BATCH_SIZE = getattr(settings, "OUTBOX_BATCH_SIZE", 200)
+MAX_ATTEMPTS = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 8)
+# How long a relay owns the batch it claimed before another relay may take it.
+CLAIM_LEASE = getattr(settings, "OUTBOX_CLAIM_LEASE", timedelta(minutes=10))
+
+_handlers = {}
+
+
+class UnknownTopicError(Exception):
+    pass
+
+
+def handler(topic):
+    def register(func):
+        _handlers[topic] = func
+        return func
+
+    return register
+
+
+def publish(topic, **payload) -> OutboxMessage | None:
+    # Written in the caller's transaction, so the message exists exactly when
+    # the change it describes does. Nothing is sent until the relay picks it up.
+    if topic not in _handlers:
+        raise UnknownTopicError(topic)
+    # Off only for throwaway fixtures, such as the stress_transfers command.
+    if not getattr(settings, "OUTBOX_PUBLISH", True):
+        return None
+    payload = json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+    return OutboxMessage.objects.create(topic=topic, payload=payload)
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(2**attempts * 5, 3600))
+
+
+def _claim(batch_size):
+    # SKIP LOCKED lets several relays claim side by side, and pushing
+    # available_at out by the lease keeps the rows away from the others once the
+    # claim commits. A relay that dies leaves them to come back after the lease.
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxMessage.Status.PENDING, available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        OutboxMessage.objects.filter(pk__in=[m.pk for m in messages]).update(
+            available_at=now + CLAIM_LEASE
+        )
+    return messages
+
+
+def relay(batch_size=BATCH_SIZE) -> int:
+    # Handlers run outside the claim, so a slow SMTP call holds no locks.
+    # Delivery is at least once: a message whose handler finished but whose
+    # delete did not happen is handled again after the lease.
+    messages = _claim(batch_size)
+    delivered = 0
+    for message in messages:
+        try:
+            with transaction.atomic():
+                _handlers[message.topic](**message.payload)
+        except Exception as e:
+            message.attempts += 1
+            message.last_error = str(e)[:2000]
+            message.available_at = timezone.now() + _retry_delay(message.attempts)
+            if message.attempts >= MAX_ATTEMPTS:
+                message.status = OutboxMessage.Status.DEAD
+                logger.error(f"Outbox message {message} gave up: {str(e)}")
+            message.save(
+                update_fields=["attempts", "last_error", "available_at", "status"]
+            )
+            continue
+        OutboxMessage.objects.filter(pk=message.pk).delete()
+        delivered += 1
+
+    if messages:
+        logger.info(f"Relayed {delivered} of {len(messages)} outbox messages")
+    return len(messages)
+
+
+def drain(batch_size=BATCH_SIZE) -> int:
+    total = 0
+    while True:
+        relayed = relay(batch_size)
+        total += relayed
+        if relayed < batch_size:
+            return total
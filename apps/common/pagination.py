@@ -0,0 +1,97 @@
+import heapq
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# Forward-only pagination over (created_at, id), newest first. Each page is a
+# range scan starting right after the last row of the previous page, so deep
+# pages cost the same as the first one and no COUNT(*) is run. Several querysets
+# can be passed in and their pages are merged, which turns an OR across two
+# indexed columns into two index scans.
+class KeysetPagination(BasePagination):
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        querysets = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        pages = []
+        for qs in querysets:
+            qs = qs.order_by(*self.ordering)
+            if position is not None:
+                created_at, pk = position
+                qs = qs.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+            pages.append(list(qs[: self.page_size + 1]))
+
+        rows = heapq.merge(
+            *pages, key=lambda row: (row.created_at, row.id), reverse=True
+        )
+        rows = list(rows)[: self.page_size + 1]
+
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk = urlsafe_b64decode(encoded.encode()).decode().split("|")
+            created_at = parse_datetime(created_at)
+            pk = uuid.UUID(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(_("Invalid cursor"))
+        if created_at is None:
+            raise NotFound(_("Invalid cursor"))
+        return created_at, pk
+
+    def encode_cursor(self, row) -> str:
+        raw = f"{row.created_at.isoformat()}|{row.id}"
+        return urlsafe_b64encode(raw.encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+        return url
+
+    def get_first_link(self):
+        return remove_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "first": self.get_first_link(),
+                "results": data,
+            }
+        )
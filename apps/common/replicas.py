@@ -0,0 +1,97 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.http import StreamingHttpResponse
+from loguru import logger
+
+REPLICAS = getattr(settings, "DATABASE_REPLICAS", [])
+STICKY_SECONDS = getattr(settings, "REPLICA_STICKY_SECONDS", 15)
+
+# Reads only leave the primary inside replica_reads, which views opt into with
+# reads_from_replica. Everything else, including every write and anything in a
+# worker, stays on "default".
+_replica = ContextVar("replica", default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas copy the primary's schema through replication.
+        return db not in REPLICAS
+
+
+@contextmanager
+def replica_reads(alias=None):
+    token = _replica.set(alias or random.choice(REPLICAS))
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def _pin_key(user_id):
+    return f"primary-pin:{user_id}"
+
+
+def pin_primary(user_id):
+    # After a write the user reads from the primary for STICKY_SECONDS, which
+    # covers replica lag: a transfer is in their history straight away.
+    if not REPLICAS:
+        return
+    try:
+        caches["redis"].set(_pin_key(user_id), True, timeout=STICKY_SECONDS)
+    except Exception as e:
+        logger.warning(f"Could not pin user {user_id} to the primary: {str(e)}")
+
+
+def is_pinned(user_id) -> bool:
+    try:
+        return bool(caches["redis"].get(_pin_key(user_id)))
+    except Exception as e:
+        # Without the pin store a recent write cannot be ruled out.
+        logger.warning(f"Primary pin lookup failed, reading from primary: {str(e)}")
+        return True
+
+
+def _stream(content, alias):
+    # Streaming bodies are produced after the view has returned, so each chunk
+    # is pulled inside the replica context again.
+    iterator = iter(content)
+    while True:
+        with replica_reads(alias):
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+def reads_from_replica(handler):
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        user_id = request.user.pk
+        if not REPLICAS or (user_id is not None and is_pinned(user_id)):
+            return handler(self, request, *args, **kwargs)
+
+        # One replica for the whole request, so every query sees one snapshot.
+        alias = random.choice(REPLICAS)
+        with replica_reads(alias):
+            response = handler(self, request, *args, **kwargs)
+        if isinstance(response, StreamingHttpResponse):
+            response.streaming_content = _stream(response.streaming_content, alias)
+        return response
+
+    return wrapper
@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from . import outbox
+from .idempotency import database_store
+
+
+@shared_task
+def relay_outbox():
+    return outbox.drain()
+
+
+@shared_task
+def purge_idempotency_records():
+    return database_store.purge()
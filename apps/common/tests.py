@@ -1,3 +1,101 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from .idempotency import database_store, idempotent
+from .models import IdempotencyRecord
+
+User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "redis": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shared",
+    },
+}
+
+
+def make_user(number):
+    return User.objects.create(
+        username=number,
+        email=f"{number}@example.com",
+        first_name="Test",
+        last_name=number,
+        id_no=int(number),
+        security_question="birth_city",
+        security_answer="lagos",
+    )
+
+
+class SlowView(APIView):
+    started = finish = calls = None
+
+    @idempotent
+    def post(self, request):
+        self.calls.append(request.data)
+        self.started.set()
+        self.finish.wait(10)
+        return Response({"paid": True}, status=status.HTTP_201_CREATED)
+
+
+# The claim lapses as soon as it is made, as it would during a long bulk
+# transfer.
+@override_settings(CACHES=LOCMEM_CACHES, IDEMPOTENCY_LOCK_TIMEOUT=timedelta(0))
+class IdempotencyClaimTests(TransactionTestCase):
+    def test_retry_does_not_take_over_a_running_request(self):
+        user = make_user("1000000001")
+        started, finish, calls = threading.Event(), threading.Event(), []
+        view = SlowView.as_view(started=started, finish=finish, calls=calls)
+        responses = {}
+
+        def send(name):
+            request = APIRequestFactory().post(
+                "/transfer/", {"amount": "10.00"}, HTTP_IDEMPOTENCY_KEY="k-1"
+            )
+            force_authenticate(request, user=user)
+            try:
+                responses[name] = view(request)
+            finally:
+                connection.close()
+
+        first = threading.Thread(target=send, args=("first",))
+        first.start()
+        self.assertTrue(started.wait(10))
+        retry = threading.Thread(target=send, args=("retry",))
+        retry.start()
+        retry.join(1)
+        finish.set()
+        first.join(10)
+        retry.join(10)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(responses["first"].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(responses["retry"].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(responses["retry"]["Idempotent-Replayed"], "true")
+
+
+class IdempotencyPurgeTests(TestCase):
+    def test_purge_deletes_expired_records_only(self):
+        user = make_user("1000000002")
+        now = timezone.now()
+        for key, expires_at in (
+            ("old", now - timedelta(minutes=1)),
+            ("live", now + timedelta(hours=1)),
+        ):
+            IdempotencyRecord.objects.create(
+                user=user, key=key, fingerprint="x", expires_at=expires_at
+            )
+
+        self.assertEqual(database_store.purge(), 1)
+        self.assertEqual(
+            list(IdempotencyRecord.objects.values_list("key", flat=True)), ["live"]
+        )
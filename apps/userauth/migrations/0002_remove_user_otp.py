@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 20:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userauth", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="user",
+            name="otp",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="otp_expiry_time",
+        ),
+    ]
@@ -65,8 +65,6 @@ class User(AbstractUser):
     )
     failed_login_attempts = models.PositiveSmallIntegerField(default=0)
     last_failed_login = models.DateTimeField(null=True, blank=True)
-    otp = models.CharField(_("OTP"), max_length=6, blank=True)
-    otp_expiry_time = models.DateTimeField(_("OTP Expiry Time"), null=True, blank=True)
 
     objects = UserManager()
     USERNAME_FIELD = "email"
@@ -78,19 +76,6 @@ class User(AbstractUser):
         "security_answer",
     ]
 
-    def set_otp(self, otp: str):
-        self.otp = otp
-        self.otp_expiry_time = timezone.now() + settings.OTP_EXPIRATION
-        self.save()
-
-    def verify_otp(self, otp):
-        if self.otp == otp and self.otp_expiry_time > timezone.now():
-            self.otp = ""
-            self.otp_expiry_time = None
-            self.save()
-            return True
-        return False
-
     def handle_failed_login_attempts(self):
         self.failed_login_attempts += 1
         self.last_failed_login = timezone.now()
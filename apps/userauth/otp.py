@@ -0,0 +1,87 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from django_redis import get_redis_connection
+
+from .utils import generate_otp
+
+LOGIN = "login"
+TRANSFER = "transfer"
+
+VERIFIED = "verified"
+INVALID = "invalid"
+EXPIRED = "expired"
+EXHAUSTED = "exhausted"
+
+MESSAGES = {
+    INVALID: _("Invalid OTP."),
+    EXPIRED: _("This OTP has expired or was not requested. Request a new one."),
+    EXHAUSTED: _("Too many incorrect attempts. Request a new OTP."),
+}
+
+# Checks the code, counts the failure and consumes the challenge in one step, so
+# concurrent guesses cannot share an attempt and a code is only ever used once.
+VERIFY_SCRIPT = """
+local code = redis.call('HGET', KEYS[1], 'code')
+if not code then
+    return 'expired'
+end
+if code == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 'verified'
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return 'exhausted'
+end
+return 'invalid'
+"""
+
+
+class OTPUnavailableError(Exception):
+    pass
+
+
+def draft_id(*parts) -> str:
+    # Identifies what a challenge authorises, e.g. a transfer's accounts and
+    # amount, so a code issued for one draft cannot approve another.
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _key(user, purpose, draft):
+    return f"otp:{purpose}:{user.pk}:{draft}"
+
+
+def _digest(key, code):
+    message = f"{key}:{code}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def issue(user, purpose, draft="") -> str:
+    # A new code replaces any outstanding one for the same draft.
+    key = _key(user, purpose, draft)
+    code = generate_otp()
+    try:
+        pipe = get_redis_connection("redis").pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={"code": _digest(key, code), "attempts": 0})
+        pipe.expire(key, int(settings.OTP_EXPIRATION.total_seconds()))
+        pipe.execute()
+    except Exception as e:
+        raise OTPUnavailableError(str(e))
+    return code
+
+
+def verify(user, purpose, code, draft="") -> str:
+    key = _key(user, purpose, draft)
+    try:
+        result = get_redis_connection("redis").eval(
+            VERIFY_SCRIPT, 1, key, _digest(key, str(code)), settings.OTP_MAX_ATTEMPTS
+        )
+    except Exception as e:
+        raise OTPUnavailableError(str(e))
+    return result.decode() if isinstance(result, bytes) else result
@@ -1,6 +1,6 @@
-import random
+import secrets
 import string
 
 
 def generate_otp(length=6) -> str:
-    return "".join(random.choices(string.digits, k=length))
\ No newline at end of file
+    return "".join(secrets.choice(string.digits) for _ in range(length))
\ No newline at end of file
@@ -1,6 +1,5 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.utils import timezone
 from djoser.views import TokenCreateView
 from djoser.views import User
 from loguru import logger
@@ -11,8 +10,8 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from . import otp as otp_service
 from .emails import send_otp_email
-from .utils import generate_otp
 
 
 def set_auth_cookies(response, access_token: str, refresh_token):
@@ -53,8 +52,14 @@ class CustomTokenCreateView(TokenCreateView):
                 },
                 status=status.HTTP_403_FORBIDDEN,
             )
-        otp = generate_otp()
-        user.set_otp(otp)
+        try:
+            otp = otp_service.issue(user, otp_service.LOGIN)
+        except otp_service.OTPUnavailableError as e:
+            logger.error(f"Could not issue login OTP for {user.email}: {str(e)}")
+            return Response(
+                {"error": "Login is temporarily unavailable. Please try again."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
         send_otp_email(user.email, otp)
         logger.info(f"OTP sent for login to user: {user.email}")
         return Response(
@@ -138,14 +143,15 @@ class OTPVerifyView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
+        email = request.data.get("email")
         otp = request.data.get("otp")
 
-        if not otp:
+        if not email or not otp:
             return Response(
-                {"error": "OTP is required"},
+                {"error": "Email and OTP are required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        user = User.objects.filter(otp=otp, otp_expiry_time__gt=timezone.now()).first()
+        user = User.objects.filter(email=email).first()
 
         if not user:
             return Response(
@@ -163,7 +169,19 @@ class OTPVerifyView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        user.verify_otp(otp)
+        try:
+            result = otp_service.verify(user, otp_service.LOGIN, otp)
+        except otp_service.OTPUnavailableError as e:
+            logger.error(f"Could not verify login OTP for {user.email}: {str(e)}")
+            return Response(
+                {"error": "Login is temporarily unavailable. Please try again."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        if result != otp_service.VERIFIED:
+            return Response(
+                {"error": str(otp_service.MESSAGES[result])},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         refresh = RefreshToken.for_user(user)
         access_token = str(refresh.access_token)
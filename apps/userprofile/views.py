@@ -13,6 +13,7 @@ from rest_framework.request import Request
 
 from apps.common.models import ContentView
 from apps.common.permissions import IsBranchManager
+from apps.common.replicas import reads_from_replica
 from apps.accounts.utils import create_bank_account
 from apps.accounts.models import BankAccount
 from apps.common.renderers import GenericJSONRenderer
@@ -36,6 +37,10 @@ class ProfileListAPIView(generics.ListAPIView):
     search_fields = ["user__first_name", "user__last_name", "user__id_no"]
     filterset_fields = ["user__first_name", "user__last_name", "user__id_no"]
 
+    @reads_from_replica
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         return Profile.objects.exclude(user__is_staff=True).exclude(user__is_superuser=True)
     
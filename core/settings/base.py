@@ -4,6 +4,7 @@ from os import getenv, path
 from loguru import logger
 from datetime import timedelta, date
 import cloudinary
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
@@ -38,7 +39,7 @@ THIRD_PARTY_APPS = [
     "cloudinary",
     "django_filters",
     "djcelery_email",
-    # "django_celery_beat",
+    "django_celery_beat",
 ]
 
 LOCAL_APPS = [
@@ -61,6 +62,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "apps.userauth.middleware.CustomHeaderMiddleware",
+    "apps.common.middleware.PrimaryPinMiddleware",
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -90,6 +92,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # SQLite has no row locks; take the write lock up front so concurrent
+        # money movements wait for each other instead of failing with
+        # "database is locked".
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # An in-memory test database fails concurrent writers outright; a file
+        # lets the threaded tests wait on the write lock like the above.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 # DATABASES = {
@@ -103,6 +115,40 @@ DATABASES = {
 #     }
 # }
 
+# Streaming replicas of "default", one alias per host in
+# POSTGRES_REPLICA_HOSTS. Views marked with reads_from_replica read from them
+# unless the user wrote something in the last REPLICA_STICKY_SECONDS; all
+# writes and every other read go to the primary.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, getenv("POSTGRES_REPLICA_HOSTS", "").split(",")), start=1
+):
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{index}")
+DATABASE_ROUTERS = ["apps.common.replicas.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = 15
+
+# "redis" is shared by every worker and backs idempotency keys; callers must
+# cope with it being unreachable.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "redis": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": getenv("REDIS_URL", "redis://localhost:6379/0"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SOCKET_CONNECT_TIMEOUT": 1,
+            "SOCKET_TIMEOUT": 1,
+        },
+    }
+}
+
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.Argon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
@@ -152,6 +198,9 @@ SITE_ID = 1
 STATIC_URL = "/static/"
 STATIC_ROOT = str(BASE_DIR / "staticfiles")
 
+MEDIA_URL = "/media/"
+MEDIA_ROOT = str(BASE_DIR / "mediafiles")
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -234,6 +283,87 @@ COOKIE_PATH = "/"
 COOKIE_HTTPONLY = True
 COOKIE_SECURE = getenv("COOKIE_SECURE", "True") == "True"
 
+# Account numbers are <bank><branch><currency><random digits><Luhn check digit>,
+# handed out from a pre-generated pool per prefix (apps.accounts.numbering).
+ACCOUNT_NUMBER_LENGTH = 16
+BANK_CODE = getenv("BANK_CODE", "")
+BANK_BRANCH_CODE = getenv("BANK_BRANCH_CODE", "")
+ACCOUNT_CURRENCY_CODES = {
+    "us_dollar": getenv("CURRENCY_CODE_USD"),
+    "pound_sterling": getenv("CURRENCY_CODE_GBP"),
+    "naira": getenv("CURRENCY_CODE_NGN"),
+}
+ACCOUNT_NUMBER_POOL_SIZE = 5000
+ACCOUNT_NUMBER_POOL_LOW_WATER = 1000
+ACCOUNT_RESOLVE_MAX_NUMBERS = 1000
+ACCOUNT_STATUS_MAX_NUMBERS = 10000
+
+# Cross-currency transfers are priced from the published FX rate snapshot at
+# quote time; a quote can be used once, until it expires.
+FX_QUOTE_TTL = timedelta(minutes=5)
+FX_VERSION_CHECK_INTERVAL = 30
+
+# A balance checkpoint is written after this many ledger entries on an account,
+# which bounds the tail summed by apps.accounts.ledger.balance_at.
+LEDGER_CHECKPOINT_INTERVAL = 500
+
+BULK_TRANSFER_MAX_LINES = 50000
+
+# Annual savings rates in basis points, per account currency. Interest accrues
+# daily on the closing balance; currencies missing here earn nothing.
+SAVINGS_INTEREST_RATES_BPS = {
+    "naira": 400,
+    "us_dollar": 100,
+    "pound_sterling": 150,
+}
+RECONCILIATION_CHUNK_SIZE = 5000
+# Transaction searches with no account or type must stay inside this many days.
+TRANSACTION_SEARCH_MAX_WINDOW_DAYS = 31
+# Longest range, in months, the account analytics endpoint will answer.
+ACCOUNT_ANALYTICS_MAX_MONTHS = 120
+# Scheduled transfers are claimed in batches by SCHEDULED_TRANSFER_WORKERS
+# parallel workers. A claim lapses after SCHEDULED_TRANSFER_LEASE, and a failed
+# payment is retried after SCHEDULED_TRANSFER_RETRY_DELAY up to
+# SCHEDULED_TRANSFER_MAX_ATTEMPTS times.
+SCHEDULED_TRANSFER_CLAIM_BATCH = 100
+SCHEDULED_TRANSFER_WORKERS = 8
+SCHEDULED_TRANSFER_WORKER_SECONDS = 40
+SCHEDULED_TRANSFER_LEASE = timedelta(minutes=5)
+SCHEDULED_TRANSFER_RETRY_DELAY = timedelta(hours=1)
+SCHEDULED_TRANSFER_MAX_ATTEMPTS = 3
+
+# On PostgreSQL transactions are range partitioned by month. Months older than
+# TRANSACTION_ARCHIVE_AFTER_MONTHS are moved by `manage.py archive_transactions`
+# to gzipped files under TRANSACTION_ARCHIVE_DIR, which statements still read.
+TRANSACTION_PARTITIONS_AHEAD = 3
+TRANSACTION_ARCHIVE_AFTER_MONTHS = 12
+TRANSACTION_ARCHIVE_BUCKETS = 32
+TRANSACTION_ARCHIVE_DIR = getenv(
+    "TRANSACTION_ARCHIVE_DIR", str(BASE_DIR / "archive" / "transactions")
+)
+INTEREST_CHUNK_SIZE = 2000
+
+# Rules scored by apps.accounts.monitoring on every outgoing payment. Remove a
+# rule to disable it; hits are mailed to ADMIN_EMAIL in batches.
+SUSPICIOUS_ACTIVITY_RULES = {
+    "velocity": {"max_transfers": 10, "window_minutes": 10},
+    "amount_spike": {"factor": 5, "min_history": 5, "window_days": 30},
+    "new_receivers": {
+        "max_new_receivers": 5,
+        "window_minutes": 60,
+        "remember_days": 180,
+    },
+}
+SUSPICIOUS_ACTIVITY_ALERT_BATCH = 500
+
+# Money-moving endpoints replay the stored response for a repeated
+# Idempotency-Key header instead of posting the transfer again. A request
+# holds its claim for as long as it runs; IDEMPOTENCY_LOCK_TIMEOUT is how soon a
+# retry may take over the claim of a request that died.
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(minutes=1)
+IDEMPOTENCY_WAIT_TIMEOUT = 5
+
 LOGGING_CONFIG = None
 
 LOGURU_LOGGING = {
@@ -291,6 +421,52 @@ CELERY_RESULT_BACKEND_ALWAYS_RETRY = True
 CELERY_TASK_TIME_LIMIT = 5 * 60
 CELERY_TASK_SOFT_TIME_LIMIT = 60
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+CELERY_BEAT_SCHEDULE = {
+    "relay-outbox": {
+        "task": "apps.common.tasks.relay_outbox",
+        "schedule": timedelta(seconds=5),
+    },
+    "purge-idempotency-records": {
+        "task": "apps.common.tasks.purge_idempotency_records",
+        "schedule": timedelta(hours=1),
+    },
+    "rollup-balance-snapshots": {
+        "task": "apps.accounts.tasks.rollup_balance_snapshots",
+        "schedule": timedelta(minutes=15),
+    },
+    "rollup-monthly-activity": {
+        "task": "apps.accounts.tasks.rollup_monthly_activity",
+        "schedule": timedelta(minutes=1),
+    },
+    "accrue-savings-interest": {
+        "task": "apps.accounts.tasks.accrue_interest",
+        "schedule": crontab(hour=0, minute=30),
+    },
+    "refill-account-number-pool": {
+        "task": "apps.accounts.tasks.refill_account_number_pool",
+        "schedule": timedelta(minutes=5),
+    },
+    "send-suspicious-activity-alerts": {
+        "task": "apps.accounts.tasks.send_suspicious_activity_alerts",
+        "schedule": timedelta(minutes=5),
+    },
+    "reconcile-ledger": {
+        "task": "apps.accounts.tasks.reconcile_ledger",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "consolidate-sharded-balances": {
+        "task": "apps.accounts.tasks.consolidate_sharded_balances",
+        "schedule": timedelta(minutes=1),
+    },
+    "dispatch-scheduled-transfers": {
+        "task": "apps.accounts.tasks.dispatch_scheduled_transfers",
+        "schedule": timedelta(minutes=1),
+    },
+    "maintain-transaction-partitions": {
+        "task": "apps.accounts.tasks.maintain_transaction_partitions",
+        "schedule": crontab(hour=1, minute=0),
+    },
+}
 CELERY_WORKER_SEND_TASK_EVENTS = True
 
 
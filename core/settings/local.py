@@ -39,4 +39,6 @@ LOCKOUT_DURATION = timedelta(minutes=1)
 
 LOGIN_ATTEMPTS = 3
 
-OTP_EXPIRATION = timedelta(minutes=1)
\ No newline at end of file
+OTP_EXPIRATION = timedelta(minutes=1)
+
+OTP_MAX_ATTEMPTS = 5
\ No newline at end of file